@@ -0,0 +1,295 @@
+"""
+An asyncio front-end to :class:`PdfFileReader<PyPDF2.PdfFileReader>` and
+:class:`PdfFileWriter<PyPDF2.PdfFileWriter>`, for event-loop based servers.
+
+The document's bytes come from an :class:`AsyncByteSource`, which fetches
+byte ranges with awaitable reads (from a local file, a buffer, or anything
+else, such as an HTTP range request).  Parsing and decoding are CPU-bound
+and run in a shared thread pool; while a worker thread waits for bytes, the
+event loop is free to serve other requests::
+
+    from PyPDF2.aio import AsyncPdfFileReader
+
+    async def firstPageText(source):
+        async with await AsyncPdfFileReader.open(source) as reader:
+            page = await reader.get_page(0)
+            return await reader.run(page.extractText)
+
+Operations on one reader are serialised, since a reader's object cache is
+not safe for concurrent use, but any number of them can be awaited at once,
+for instance with ``asyncio.gather``.  This module needs Python 3.5 or
+later.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from .pdf import PdfFileReader
+from .sources import BUFFER_TYPES, ByteSource, SourceStream
+from . import utils
+
+
+_executor = None
+_executorLock = threading.Lock()
+# map PdfFileReader to the lock serialising its use, see AsyncPdfFileReader
+_readerLocks = weakref.WeakKeyDictionary()
+
+
+def getExecutor():
+    """
+    Returns the thread pool shared by all asynchronous readers and writers
+    that were not given an executor of their own, creating it on first use.
+    """
+    global _executor
+    with _executorLock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(min(32, (os.cpu_count() or 1) + 4))
+        return _executor
+
+
+class AsyncByteSource(object):
+    """
+    The interface through which :class:`AsyncPdfFileReader` reads a
+    document.  Subclasses implement :meth:`read_at` and :meth:`size`; the
+    reader asks only for the byte ranges it needs.
+    """
+    name = "<source>"
+
+    async def read_at(self, offset, length):
+        """
+        Returns up to *length* bytes starting at *offset*; fewer only at the
+        end of the source.
+        """
+        raise NotImplementedError
+
+    async def size(self):
+        """Returns the total number of bytes in the source."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class AsyncFileSource(AsyncByteSource):
+    """
+    Reads a local file with positioned reads, run in the event loop's
+    default executor so that a slow disk does not stall the loop.
+    """
+    def __init__(self, path):
+        self.name = path
+        self._file = open(path, "rb")
+        self._lock = threading.Lock() # only needed without os.pread
+
+    def _readAt(self, offset, length):
+        if hasattr(os, "pread"):
+            return os.pread(self._file.fileno(), length, offset)
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    async def read_at(self, offset, length):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._readAt, offset, length)
+
+    async def size(self):
+        return os.fstat(self._file.fileno()).st_size
+
+    async def close(self):
+        self._file.close()
+
+
+class AsyncBufferSource(AsyncByteSource):
+    """Serves a document that is already in memory."""
+    name = "<buffer>"
+
+    def __init__(self, buf):
+        self._buf = memoryview(buf).cast("B")
+
+    async def read_at(self, offset, length):
+        return self._buf[offset:offset + length].tobytes()
+
+    async def size(self):
+        return len(self._buf)
+
+
+def openSource(source):
+    """
+    Turns the *source* argument of :meth:`AsyncPdfFileReader.open` into an
+    :class:`AsyncByteSource`: paths are opened as files, bytes-like objects
+    are served from memory, and sources are returned unchanged.
+    """
+    if utils.isString(source):
+        return AsyncFileSource(source)
+    if isinstance(source, BUFFER_TYPES):
+        return AsyncBufferSource(source)
+    return source
+
+
+class _LoopSource(ByteSource):
+    # Adapts an AsyncByteSource for the synchronous parser, which runs in a
+    # worker thread: each read is scheduled on the event loop while the
+    # worker thread waits for it.
+    def __init__(self, source, size, loop):
+        self.source = source
+        self.name = source.name
+        self.size = size
+        self._loop = loop
+        self._loopThread = threading.get_ident()
+
+    def read_at(self, offset, length):
+        if threading.get_ident() == self._loopThread:
+            raise RuntimeError("PDF data read from the event loop thread; "
+                               "use the AsyncPdfFileReader methods instead")
+        return asyncio.run_coroutine_threadsafe(
+            self.source.read_at(offset, length), self._loop).result()
+
+
+class AsyncPdfFileReader(object):
+    """
+    Reads a PDF document without blocking the event loop.  Create one with
+    :meth:`open`; the methods are coroutines that do the work of the
+    corresponding :class:`PdfFileReader<PyPDF2.PdfFileReader>` methods in an
+    executor.
+
+    :ivar reader: the underlying
+        :class:`PdfFileReader<PyPDF2.PdfFileReader>`.  Only use it through
+        :meth:`run`, as touching objects that have not been read yet needs
+        the event loop.
+    """
+    def __init__(self, reader, source, executor):
+        self.reader = reader
+        self.source = source
+        self.executor = executor
+        self._lock = _readerLocks[reader]
+
+    @classmethod
+    async def open(cls, source, executor=None, **kwargs):
+        """
+        Opens a document, reading its trailer and cross-reference tables.
+
+        :param source: an :class:`AsyncByteSource`, a path, or a bytes-like
+            object.
+        :param executor: the ``concurrent.futures`` executor to parse in;
+            defaults to the shared one from :func:`getExecutor`.  It must run
+            its jobs in threads of this process.
+        :param kwargs: passed to :class:`PdfFileReader<PyPDF2.PdfFileReader>`.
+        :return: the reader.
+        :rtype: :class:`AsyncPdfFileReader`
+        """
+        loop = asyncio.get_event_loop()
+        source = openSource(source)
+        if executor is None:
+            executor = getExecutor()
+        stream = SourceStream(_LoopSource(source, await source.size(), loop))
+        lock = threading.Lock()
+        def openReader():
+            with lock:
+                reader = PdfFileReader(stream, **kwargs)
+                _readerLocks[reader] = lock
+                return reader
+        reader = await loop.run_in_executor(executor, openReader)
+        return cls(reader, source, executor)
+
+    async def run(self, func, *args):
+        """
+        Calls ``func(*args)`` in the executor, while no other operation on
+        this reader runs, and returns its result.  Use it for anything that
+        reads from the document, such as
+        :meth:`PageObject.extractText()<PyPDF2.pdf.PageObject.extractText>`.
+        """
+        def call():
+            with self._lock:
+                return func(*args)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, call)
+
+    async def get_num_pages(self):
+        """
+        :return: the number of pages.
+        :rtype: int
+        """
+        return await self.run(self.reader.getNumPages)
+
+    async def get_page(self, pageNumber):
+        """
+        :param int pageNumber: the number of the page (pages begin at zero).
+        :return: the page.
+        :rtype: :class:`PageObject<PyPDF2.pdf.PageObject>`
+        """
+        return await self.run(self.reader.getPage, pageNumber)
+
+    async def get_object(self, indirectReference):
+        """
+        Resolves an :class:`IndirectObject<PyPDF2.generic.IndirectObject>`
+        of this document.
+        """
+        return await self.run(self.reader.getObject, indirectReference)
+
+    async def close(self):
+        """Closes the source; the reader cannot read any more objects."""
+        await self.run(self.reader.stream.close)
+        await self.source.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def _serialize(writer):
+    # Runs PdfFileWriter.write in the executor, holding the locks of the
+    # asynchronous readers whose pages were added to the writer, since
+    # writing reads the rest of those pages' objects.
+    locks = []
+    for obj in writer._objects:
+        reader = getattr(obj, "pdf", None)
+        lock = _readerLocks.get(reader) if reader is not None else None
+        if lock is not None and lock not in locks:
+            locks.append(lock)
+    locks.sort(key=id) # a consistent order, against deadlocks
+    for lock in locks:
+        lock.acquire()
+    try:
+        out = BytesIO()
+        writer.write(out)
+        return out.getvalue()
+    finally:
+        for lock in locks:
+            lock.release()
+
+
+async def write(writer, sink, executor=None):
+    """
+    Writes the document built by a :class:`PdfFileWriter<PyPDF2.PdfFileWriter>`
+    without blocking the event loop.  The document is serialised in the
+    executor, then written to *sink*.
+
+    :param writer: the :class:`PdfFileWriter<PyPDF2.PdfFileWriter>`.
+    :param sink: a path, or an object with a ``write`` method, which may be
+        a coroutine function; if it also has a ``drain`` coroutine, like
+        ``asyncio.StreamWriter``, that is awaited afterwards.
+    :param executor: as for :meth:`AsyncPdfFileReader.open`.
+    :return: the number of bytes written.
+    :rtype: int
+    """
+    loop = asyncio.get_event_loop()
+    if executor is None:
+        executor = getExecutor()
+    data = await loop.run_in_executor(executor, _serialize, writer)
+    if utils.isString(sink):
+        def save():
+            with open(sink, "wb") as f:
+                f.write(data)
+        await loop.run_in_executor(executor, save)
+    else:
+        result = sink.write(data)
+        if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+            await result
+        if hasattr(sink, "drain"):
+            await sink.drain()
+    return len(data)
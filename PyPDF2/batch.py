@@ -0,0 +1,185 @@
+"""
+Processing many PDF files in parallel, in a pool of worker processes.
+
+Parsing a PDF is CPU-bound pure-Python work, so a single process handling
+a stream of documents is limited to one core by the GIL.  :func:`map`
+spreads the documents over worker processes instead::
+
+    from PyPDF2 import batch
+
+    def pageTexts(reader):
+        return [page.extractText() for page in reader.pages]
+
+    for result in batch.map(pageTexts, paths, workers=8, timeout=60):
+        if result.error is None:
+            index(result.path, result.value)
+        else:
+            log(result.path, result.error)
+
+The function is called in a worker process, so it has to be picklable (a
+module-level function) and so do its return values.
+"""
+
+import collections
+import os
+
+from .pdf import PdfFileReader
+from . import utils
+
+try:
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    from concurrent.futures.process import BrokenProcessPool
+except ImportError:
+    ProcessPoolExecutor = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import signal
+    setitimer = signal.setitimer
+except (ImportError, AttributeError):
+    setitimer = None
+
+
+class BatchResult(object):
+    """
+    The outcome of processing one document with :func:`map`.
+
+    :ivar path: the path (or other item) the document was given as.
+    :ivar value: what the function returned, or ``None`` if it failed.
+    :ivar error: the exception that the function, or opening the document,
+        raised, or ``None`` if it succeeded.
+    """
+    def __init__(self, path, value=None, error=None):
+        self.path = path
+        self.value = value
+        self.error = error
+
+    def __repr__(self):
+        if self.error is not None:
+            return "BatchResult(%r, error=%r)" % (self.path, self.error)
+        return "BatchResult(%r, %r)" % (self.path, self.value)
+
+
+def map(func, paths, workers=None, timeout=None, memoryLimit=None,
+        strict=False, openReader=True):
+    """
+    Calls *func* for each document in *paths* in a pool of worker
+    processes, and yields a :class:`BatchResult` for each document as soon
+    as it is done, in order of completion.
+
+    A document that cannot be read, makes *func* raise, runs out of time or
+    memory, or even crashes its worker process gives a result with
+    :attr:`error<BatchResult.error>` set; the other documents are not
+    affected.
+
+    :param func: a picklable function, called with a
+        :class:`PdfFileReader<PyPDF2.PdfFileReader>` for the document, or
+        with the item itself if *openReader* is ``False``.
+    :param paths: an iterable of paths of PDF files; it is consumed lazily,
+        as workers become free.
+    :param int workers: the number of worker processes (defaults to the
+        number of CPUs).
+    :param float timeout: seconds a single document may take; exceeding it
+        raises :class:`PdfTimeoutError<PyPDF2.utils.PdfTimeoutError>` in the
+        worker.  Needs ``signal.setitimer`` (not available on Windows).
+    :param int memoryLimit: maximum address space of each worker process,
+        in bytes, so that an oversized document raises ``MemoryError``
+        instead of exhausting the machine.  Note that a memory-mapped file
+        counts towards it.  Needs the ``resource`` module (Unix only).
+    :param bool strict: passed to :class:`PdfFileReader<PyPDF2.PdfFileReader>`.
+    :param bool openReader: if ``False``, *func* is called with each item of
+        *paths* as is, which suits jobs such as merging that open several
+        files themselves.
+    """
+    if ProcessPoolExecutor is None:
+        raise NotImplementedError("batch.map needs concurrent.futures")
+    if timeout is not None and setitimer is None:
+        raise NotImplementedError("timeouts need signal.setitimer")
+    if memoryLimit is not None and resource is None:
+        raise NotImplementedError("memory limits need the resource module")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    job = (func, openReader, strict, timeout)
+    items = iter(paths)
+    # Documents that were being processed when a worker process died.
+    # Any of them may be the culprit, so each is tried again on its own.
+    suspects = collections.deque()
+    running = {} # future -> (item, suspect)
+    executor = None
+    try:
+        while True:
+            if executor is None:
+                executor = ProcessPoolExecutor(workers, initializer=_initWorker,
+                                               initargs=(memoryLimit,))
+            if suspects:
+                if not running:
+                    item = suspects.popleft()
+                    running[executor.submit(_runJob, job, item)] = (item, True)
+            else:
+                while len(running) < 2 * workers:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        break
+                    running[executor.submit(_runJob, job, item)] = (item, False)
+            if not running:
+                break
+            done = wait(running, return_when=FIRST_COMPLETED)[0]
+            broken = False
+            for future in done:
+                item, suspect = running.pop(future)
+                try:
+                    value = future.result()
+                except BrokenProcessPool as e:
+                    broken = True
+                    if suspect:
+                        yield BatchResult(item, error=e)
+                    else:
+                        suspects.append(item)
+                except Exception as e:
+                    yield BatchResult(item, error=e)
+                else:
+                    yield BatchResult(item, value)
+            if broken:
+                # every other document in the pool fails too; retry them
+                for future, (item, suspect) in running.items():
+                    suspects.append(item)
+                running.clear()
+                executor.shutdown(wait=False)
+                executor = None
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _initWorker(memoryLimit):
+    if memoryLimit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memoryLimit, memoryLimit))
+
+
+def _timedOut(signum, frame):
+    raise utils.PdfTimeoutError("document took too long to process")
+
+
+def _runJob(job, item):
+    # Runs in the worker process.
+    func, openReader, strict, timeout = job
+    if timeout is not None:
+        previous = signal.signal(signal.SIGALRM, _timedOut)
+        setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if not openReader:
+            return func(item)
+        reader = PdfFileReader(item, strict=strict)
+        try:
+            return func(reader)
+        finally:
+            reader.stream.close()
+    finally:
+        if timeout is not None:
+            setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
@@ -30,25 +30,51 @@
 
 """
 Implementation of stream filters for PDF.
+
+Filters are looked up by name in a registry, which
+:func:`registerFilter` adds to or overrides, for instance to decode a
+filter with a faster codec.  Faster implementations that are installed are
+used without registering anything: inflating uses ``isal`` or ``zlib-ng``
+if either is available, predictors use NumPy, and
+:meth:`DCTDecode.decodeSamples` and :meth:`JPXDecode.decodeSamples` use
+Pillow.
 """
 __author__ = "Mathieu Fenniak"
 __author_email__ = "biziqe@mathieu.fenniak.net"
 
-import math
+import binascii
+import re
+import threading
 
-from .utils import PdfReadError, ord_, chr_, paethPredictor
+from .utils import PdfReadError, PdfSizeLimitError, ord_, chr_
 from sys import version_info
 if version_info < ( 3, 0 ):
     from cStringIO import StringIO
 else:
     from io import StringIO
-    import struct
+import struct
+
+try:
+    from base64 import a85encode
+except ImportError:
+    a85encode = None
+
+try:
+    import numpy
+    from numpy.lib.stride_tricks import as_strided
+except ImportError:
+    numpy = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 
 try:
     import zlib
 
     def decompress(data):
-        return zlib.decompress(data)
+        return inflateModule.decompress(data)
 
     def compress(data):
         return zlib.compress(data)
@@ -56,6 +82,7 @@ try:
 except ImportError:
     # Unable to import zlib.  Attempt to use the System.IO.Compression
     # library from the .NET framework. (IronPython only)
+    zlib = None
     import System
     from System import IO, Collections, Array
 
@@ -108,59 +135,303 @@ except ImportError:
         return retval
 
 
+def _findInflateModule():
+    # the fastest installed module with the zlib interface for
+    # decompressing, or None if there is not even zlib
+    candidates = []
+    try:
+        from isal import isal_zlib
+        candidates.append(isal_zlib)
+    except ImportError:
+        pass
+    try:
+        from zlib_ng import zlib_ng
+        candidates.append(zlib_ng)
+    except ImportError:
+        pass
+    for module in candidates:
+        # FlateDecoder needs decompressobj to stop at a maximum length
+        if hasattr(module.decompressobj(), "unconsumed_tail"):
+            return module
+    return zlib
+
+# the module /FlateDecode data is decompressed with; compressing always
+# uses zlib, so that the output does not depend on what is installed
+inflateModule = _findInflateModule()
+
+
+def _getParm(decodeParms, key, default):
+    # decodeParms may be missing, or an array holding a null object
+    try:
+        return decodeParms.get(key, default)
+    except AttributeError:
+        return default
+
+
+def _getPredictorParms(decodeParms):
+    # Returns the predictor, /Colors, /BitsPerComponent and /Columns with
+    # their defaults, and the number of bytes in a row of samples.
+    predictor = _getParm(decodeParms, "/Predictor", 1)
+    colors = _getParm(decodeParms, "/Colors", 1)
+    bitsPerComponent = _getParm(decodeParms, "/BitsPerComponent", 8)
+    columns = _getParm(decodeParms, "/Columns", 1)
+    rowLength = (columns * colors * bitsPerComponent + 7) // 8
+    return predictor, colors, bitsPerComponent, columns, rowLength
+
+
+def decodePredictor(data, decodeParms):
+    """
+    Undoes the predictor that /DecodeParms specify for the output of
+    /FlateDecode or /LZWDecode: PNG prediction (/Predictor 10 to 15, with a
+    filter type at the start of each row) or TIFF predictor 2, for any
+    /Colors and /BitsPerComponent.
+
+    :param data: the decompressed data.
+    :param decodeParms: the stream's /DecodeParms, or ``None``.
+    :return: the data without prediction.
+    :rtype: bytes
+    """
+    predictor, colors, bitsPerComponent, columns, rowLength = \
+        _getPredictorParms(decodeParms)
+    if predictor == 1:
+        return data
+    if predictor >= 10 and predictor <= 15:
+        bitsPerPixel = colors * bitsPerComponent
+        # the distance to the corresponding byte of the pixel to the left
+        bpp = max(1, (bitsPerPixel + 7) // 8)
+        if numpy is not None:
+            return _decodePngNumpy(data, rowLength, bpp)
+        return _decodePng(data, rowLength, bpp)
+    elif predictor == 2:
+        return _decodeTiff(data, rowLength, columns, colors, bitsPerComponent)
+    else:
+        # unsupported predictor
+        raise PdfReadError("Unsupported flatedecode predictor %r" % predictor)
+
+
+def _decodePng(data, rowLength, bpp):
+    # PNG prediction can vary from row to row; each row starts with its
+    # filter type.  See the PNG specification, section 9.
+    data = bytearray(data)
+    stride = rowLength + 1
+    if len(data) % stride:
+        raise PdfReadError("PNG predictor data is not a whole number of rows")
+    output = bytearray(len(data) // stride * rowLength)
+    prev = bytearray(rowLength)
+    pos = 0
+    for start in range(0, len(data), stride):
+        row = _undoPngRow(data[start], data[start + 1:start + stride], prev, bpp)
+        output[pos:pos + rowLength] = row
+        pos += rowLength
+        prev = row
+    return bytes(output)
+
+
+def _undoPngRow(filterType, row, prev, bpp):
+    # Undoes the PNG filter of *row*, a bytearray, given the decoded row
+    # above it, and returns the decoded row.
+    rowLength = len(row)
+    if filterType == 0:
+        pass
+    elif filterType == 1:
+        for i in range(bpp, rowLength):
+            row[i] = (row[i] + row[i - bpp]) & 255
+    elif filterType == 2:
+        row = bytearray([(a + b) & 255 for a, b in zip(row, prev)])
+    elif filterType == 3:
+        for i in range(min(bpp, rowLength)):
+            row[i] = (row[i] + (prev[i] >> 1)) & 255
+        for i in range(bpp, rowLength):
+            row[i] = (row[i] + ((row[i - bpp] + prev[i]) >> 1)) & 255
+    elif filterType == 4:
+        _undoPaeth(row, prev, bpp)
+    else:
+        # unsupported PNG filter
+        raise PdfReadError("Unsupported PNG filter %r" % filterType)
+    return row
+
+
+def _undoPaeth(row, prev, bpp):
+    # Undoes the Paeth filter on *row* in place.  The first pixel has no
+    # left neighbours, so its predictor is the byte above it.
+    rowLength = len(row)
+    for i in range(min(bpp, rowLength)):
+        row[i] = (row[i] + prev[i]) & 255
+    for i in range(bpp, rowLength):
+        a = row[i - bpp]
+        b = prev[i]
+        c = prev[i - bpp]
+        pa = abs(b - c)
+        pb = abs(a - c)
+        pc = abs(a + b - c - c)
+        if pa <= pb and pa <= pc:
+            row[i] = (row[i] + a) & 255
+        elif pb <= pc:
+            row[i] = (row[i] + b) & 255
+        else:
+            row[i] = (row[i] + c) & 255
+
+
+# runs of fewer None, Sub or Up rows than this are undone along with the
+# Average and Paeth rows around them, see _decodePngNumpy
+_PNG_MIN_RUN = 16
+
+
+def _decodePngNumpy(data, rowLength, bpp):
+    # Like _decodePng, but undoes many rows at once.  Runs of None, Sub and
+    # Up rows are vectorised: Sub is a running sum along each row, and Up
+    # one down the columns.  The other rows, Average and Paeth ones along
+    # with short runs between them (encoders often pick the filter of each
+    # row separately), go to _undoPngRowsNumpy.
+    stride = rowLength + 1
+    if len(data) % stride:
+        raise PdfReadError("PNG predictor data is not a whole number of rows")
+    rows = numpy.frombuffer(data, numpy.uint8).reshape(-1, stride)
+    filterTypes = rows[:, 0]
+    output = rows[:, 1:].copy()
+    if len(output) == 0:
+        return b""
+    if filterTypes.max() > 4:
+        # unsupported PNG filter
+        raise PdfReadError("Unsupported PNG filter %r" % filterTypes.max())
+    bounds = [0] + list(numpy.flatnonzero(numpy.diff(filterTypes)) + 1) + \
+             [len(output)]
+    runs = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        filterType = filterTypes[start]
+        if filterType > 2 or end - start < _PNG_MIN_RUN:
+            filterType = None
+        if runs and filterType is None and runs[-1][0] is None:
+            runs[-1][2] = end
+        else:
+            runs.append([filterType, start, end])
+    for filterType, start, end in runs:
+        run = output[start:end]
+        if filterType is None:
+            _undoPngRowsNumpy(output, start, end, filterTypes, bpp)
+        elif filterType == 1:
+            # the row is padded to whole pixels; the padding is at the end,
+            # where it cannot affect the bytes that are kept
+            pixels = -(-rowLength // bpp)
+            padded = numpy.zeros((end - start, pixels * bpp), numpy.uint8)
+            padded[:, :rowLength] = run
+            padded = numpy.cumsum(padded.reshape(end - start, pixels, bpp), axis=1,
+                                  dtype=numpy.uint8)
+            run[:] = padded.reshape(end - start, pixels * bpp)[:, :rowLength]
+        elif filterType == 2:
+            numpy.cumsum(run, axis=0, dtype=numpy.uint8, out=run)
+            if start > 0:
+                run += output[start - 1]
+    return output.tobytes()
+
+
+def _undoPngRowsNumpy(output, start, end, filterTypes, bpp):
+    # Undoes the rows output[start:end], of any filter types, in place.  A
+    # byte depends at most on the decoded bytes to its left, above and
+    # above left, so the pixels of an anti-diagonal (same row + column) are
+    # independent of each other.  The rows are laid out skewed, each one
+    # pixel further to the right than the one above, which makes every
+    # anti-diagonal a column; the columns are then undone one at a time.
+    # That is rows + pixels per row steps rather than one per byte, which
+    # only pays off for wide rows, so narrow ones go through _undoPngRow.
+    rowLength = output.shape[1]
+    pixels = -(-rowLength // bpp)
+    # rows per block, to bound the memory taken by the skewed layout
+    block = max(32, min(1024, (1 << 24) // ((pixels + 1024) * bpp)))
+    for blockStart in range(start, end, block):
+        blockEnd = min(end, blockStart + block)
+        count = blockEnd - blockStart
+        if blockStart > 0:
+            prev = output[blockStart - 1]
+        else:
+            prev = numpy.zeros(rowLength, numpy.uint8)
+        if (count + pixels) * 100 >= count * rowLength:
+            prev = bytearray(prev.tobytes())
+            for r in range(blockStart, blockEnd):
+                prev = _undoPngRow(filterTypes[r], bytearray(output[r].tobytes()), prev, bpp)
+                output[r] = numpy.frombuffer(bytes(prev), numpy.uint8)
+            continue
+        # row i (the row above the block is row 0) holds pixel k in column
+        # i + k + 1; column i is the zero left of the first pixel
+        skewed = numpy.zeros((count + 1, count + pixels + 1, bpp), numpy.uint8)
+        skewed[0, 1:pixels + 1].reshape(-1)[:rowLength] = prev
+        s0, s1, s2 = skewed.strides
+        view = as_strided(skewed[1:, 2:], (count, pixels, bpp), (s0 + s1, s1, s2))
+        padded = numpy.zeros((count, pixels * bpp), numpy.uint8)
+        padded[:, :rowLength] = output[blockStart:blockEnd]
+        view[:] = padded.reshape(count, pixels, bpp)
+        types = filterTypes[blockStart:blockEnd, None]
+        present = numpy.unique(types).tolist()
+        single = present[0] if len(present) == 1 else None
+        zero = numpy.zeros((count, bpp), numpy.int16)
+        for j in range(2, count + pixels + 1):
+            i0, i1 = max(1, j - pixels), min(count, j - 1) + 1
+            a = skewed[i0:i1, j - 1].astype(numpy.int16)
+            b = skewed[i0 - 1:i1 - 1, j - 1].astype(numpy.int16)
+            average = paeth = zero[:i1 - i0]
+            if 3 in present:
+                average = (a + b) >> 1
+            if 4 in present:
+                c = skewed[i0 - 1:i1 - 1, j - 2].astype(numpy.int16)
+                pa = numpy.abs(b - c)
+                pb = numpy.abs(a - c)
+                pc = numpy.abs(a + b - c - c)
+                paeth = numpy.where((pa <= pb) & (pa <= pc), a,
+                                    numpy.where(pb <= pc, b, c))
+            if single is None:
+                predicted = numpy.choose(types[i0 - 1:i1 - 1],
+                                         (zero[:i1 - i0], a, b, average, paeth))
+            else:
+                predicted = (zero[:i1 - i0], a, b, average, paeth)[single]
+            skewed[i0:i1, j] += predicted.astype(numpy.uint8)
+        output[blockStart:blockEnd] = view.reshape(count, pixels * bpp)[:, :rowLength]
+
+
+def _decodeTiff(data, rowLength, columns, colors, bitsPerComponent):
+    # TIFF predictor 2: each component is stored as the difference to the
+    # same component of the pixel to its left, modulo 2**bitsPerComponent.
+    rowCount = len(data) // rowLength
+    if numpy is not None and bitsPerComponent in (8, 16):
+        dtype = numpy.uint8 if bitsPerComponent == 8 else numpy.dtype(">u2")
+        samples = numpy.frombuffer(data, dtype, rowCount * rowLength //
+                                   (bitsPerComponent // 8))
+        samples = samples.reshape(rowCount, -1, colors)
+        samples = numpy.cumsum(samples, axis=1, dtype=samples.dtype)
+        return samples.astype(dtype).tobytes() + \
+            bytes(bytearray(data[rowCount * rowLength:]))
+    data = bytearray(data)
+    if bitsPerComponent == 8:
+        for start in range(0, rowCount * rowLength, rowLength):
+            for i in range(start + colors, start + rowLength):
+                data[i] = (data[i] + data[i - colors]) & 255
+        return bytes(data)
+    mask = (1 << bitsPerComponent) - 1
+    samplesPerRow = columns * colors
+    for start in range(0, rowCount * rowLength, rowLength):
+        # unpack the row into samples, add up, and pack it again
+        bits = int(binascii.hexlify(data[start:start + rowLength]) or b"0", 16)
+        shift = rowLength * 8
+        padding = shift - samplesPerRow * bitsPerComponent
+        padBits = bits & ((1 << padding) - 1)
+        samples = []
+        for k in range(samplesPerRow):
+            shift -= bitsPerComponent
+            samples.append((bits >> shift) & mask)
+        for k in range(colors, samplesPerRow):
+            samples[k] = (samples[k] + samples[k - colors]) & mask
+        bits = 0
+        for sample in samples:
+            bits = (bits << bitsPerComponent) | sample
+        bits = (bits << padding) | padBits
+        hexRow = "%0*x" % (rowLength * 2, bits)
+        data[start:start + rowLength] = bytearray(binascii.unhexlify(hexRow))
+    return bytes(data)
+
+
 class FlateDecode(object):
     def decode(data, decodeParms):
         data = decompress(data)
-        predictor = 1
-        if decodeParms:
-            try:
-                predictor = decodeParms.get("/Predictor", 1)
-            except AttributeError:
-                pass    # usually an array with a null object was read
-
-        # predictor 1 == no predictor
-        if predictor != 1:
-            columns = decodeParms["/Columns"]
-            # PNG prediction:
-            if predictor >= 10 and predictor <= 15:
-                output = StringIO()
-                # PNG prediction can vary from row to row
-                rowlength = columns + 1
-                assert len(data) % rowlength == 0
-                prev_rowdata = (0,) * rowlength
-                for row in range(len(data) // rowlength):
-                    rowdata = [ord_(x) for x in data[(row*rowlength):((row+1)*rowlength)]]
-                    filterByte = rowdata[0]
-                    if filterByte == 0:
-                        pass
-                    elif filterByte == 1:
-                        for i in range(2, rowlength):
-                            rowdata[i] = (rowdata[i] + rowdata[i-1]) % 256
-                    elif filterByte == 2:
-                        for i in range(1, rowlength):
-                            rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
-                    elif filterByte == 3:
-                        for i in range(1, rowlength):
-                            left = rowdata[i-1] if i > 1 else 0
-                            floor = math.floor(left + prev_rowdata[i])/2
-                            rowdata[i] = (rowdata[i] + int(floor)) % 256
-                    elif filterByte == 4:
-                        for i in range(1, rowlength):
-                            left = rowdata[i - 1] if i > 1 else 0
-                            up = prev_rowdata[i]
-                            up_left = prev_rowdata[i - 1] if i > 1 else 0
-                            paeth = paethPredictor(left, up, up_left)
-                            rowdata[i] = (rowdata[i] + paeth) % 256
-                    else:
-                        # unsupported PNG filter
-                        raise PdfReadError("Unsupported PNG filter %r" % filterByte)
-                    prev_rowdata = rowdata
-                    output.write(''.join([chr(x) for x in rowdata[1:]]))
-                data = output.getvalue()
-            else:
-                # unsupported predictor
-                raise PdfReadError("Unsupported flatedecode predictor %r" % predictor)
-        return data
+        return decodePredictor(data, decodeParms)
     decode = staticmethod(decode)
 
     def encode(data):
@@ -169,191 +440,352 @@ class FlateDecode(object):
 
 
 class ASCIIHexDecode(object):
+    """
+    The /ASCIIHexDecode filter: two hexadecimal digits per byte, ended by
+    ``>``.
+    """
     def decode(data, decodeParms=None):
-        retval = ""
-        char = ""
-        x = 0
-        while True:
-            c = data[x]
-            if c == ">":
-                break
-            elif c.isspace():
-                x += 1
-                continue
-            char += c
-            if len(char) == 2:
-                retval += chr(int(char, base=16))
-                char = ""
-            x += 1
-        assert char == ""
-        return retval
+        data = _stripWhitespace(data)
+        end = data.find(b">")
+        if end >= 0:
+            data = data[:end]
+        if len(data) % 2:
+            # a missing final digit is taken to be 0
+            data += b"0"
+        try:
+            return binascii.unhexlify(data)
+        except (TypeError, ValueError):
+            raise PdfReadError("Invalid character in ASCIIHexDecode data")
     decode = staticmethod(decode)
 
+    def encode(data):
+        """
+        :return: *data* in hexadecimal, in lines of 64 digits, ended by
+            ``>``.
+        :rtype: bytes
+        """
+        return _wrapLines(binascii.hexlify(data), 64) + b">"
+    encode = staticmethod(encode)
+
+
+def _stripWhitespace(data):
+    # removes the white-space characters of PDF (section 7.2.2) from the
+    # encoded data of the ASCII filters
+    if not isinstance(data, bytes):
+        data = data.encode("latin-1") if isinstance(data, str) else bytes(data)
+    return data.translate(None, b" \t\n\r\x0c\x00")
+
+
+def _wrapLines(data, width):
+    return b"\n".join([data[i:i + width] for i in range(0, len(data), width)])
+
 
 class LZWDecode(object):
-    """Taken from:
-    http://www.java2s.com/Open-Source/Java-Document/PDF/PDF-Renderer/com/sun/pdfview/decode/LZWDecode.java.htm
+    """
+    The /LZWDecode filter: Lempel-Ziv-Welch compression with codes of 9 to
+    12 bits, as described in section 7.4.4 of the PDF reference.
     """
     class decoder(object):
-        def __init__(self, data):
-            self.STOP=257
-            self.CLEARDICT=256
-            self.data=data
-            self.bytepos=0
-            self.bitpos=0
-            self.dict=[""]*4096
-            for i in range(256):
-                self.dict[i]=chr(i)
-            self.resetDict()
-
-        def resetDict(self):
-            self.dictlen=258
-            self.bitspercode=9
-
-        def nextCode(self):
-            fillbits=self.bitspercode
-            value=0
-            while fillbits>0 :
-                if self.bytepos >= len(self.data):
-                    return -1
-                nextbits=ord_(self.data[self.bytepos])
-                bitsfromhere=8-self.bitpos
-                if bitsfromhere>fillbits:
-                    bitsfromhere=fillbits
-                value |= (((nextbits >> (8-self.bitpos-bitsfromhere)) &
-                           (0xff >> (8-bitsfromhere))) <<
-                          (fillbits-bitsfromhere))
-                fillbits -= bitsfromhere
-                self.bitpos += bitsfromhere
-                if self.bitpos >=8:
-                    self.bitpos=0
-                    self.bytepos = self.bytepos+1
-            return value
+        # For compatibility; see LZWDecoder.
+        def __init__(self, data, earlyChange=1):
+            self.data = data
+            self.earlyChange = earlyChange
 
         def decode(self):
-            """ algorithm derived from:
-            http://www.rasip.fer.hr/research/compress/algorithms/fund/lz/lzw.html
-            and the PDFReference
-            """
-            cW = self.CLEARDICT;
-            baos=""
-            while True:
-                pW = cW;
-                cW = self.nextCode();
-                if cW == -1:
-                    raise PdfReadError("Missed the stop code in LZWDecode!")
-                if cW == self.STOP:
-                    break;
-                elif cW == self.CLEARDICT:
-                    self.resetDict();
-                elif pW == self.CLEARDICT:
-                    baos+=self.dict[cW]
-                else:
-                    if cW < self.dictlen:
-                        baos += self.dict[cW]
-                        p=self.dict[pW]+self.dict[cW][0]
-                        self.dict[self.dictlen]=p
-                        self.dictlen+=1
-                    else:
-                        p=self.dict[pW]+self.dict[pW][0]
-                        baos+=p
-                        self.dict[self.dictlen] = p;
-                        self.dictlen+=1
-                    if (self.dictlen >= (1 << self.bitspercode) - 1 and
-                        self.bitspercode < 12):
-                        self.bitspercode+=1
-            return baos
+            decoder = LZWDecoder({"/EarlyChange": self.earlyChange})
+            return decoder.feed(self.data) + decoder.flush()
+
+    @staticmethod
+    def decode(data, decodeParams=None):
+        """
+        :param data: the encoded data.
+        :param decodeParams: the /DecodeParms, for /EarlyChange and the
+            predictor.
+        :return: the decoded data.
+        :rtype: bytes
+        """
+        decoder = LZWDecoder(decodeParams)
+        return decoder.feed(data) + decoder.flush()
 
     @staticmethod
-    def decode(data,decodeParams=None):
-        return LZWDecode.decoder(data).decode()
+    def encode(data, earlyChange=1):
+        """
+        :param data: the data to compress.
+        :param int earlyChange: the /EarlyChange the result will be decoded
+            with: 1, the default, widens the codes one code early.
+        :return: the encoded data, starting with a clear-table code and
+            ending with an end-of-data code.
+        :rtype: bytes
+        """
+        out = bytearray()
+        # the bits not yet written, and how many there are
+        acc = nbits = 0
+        # the table, as (code << 8 | next byte) -> code of the extended
+        # string, and the code width; see LZWDecoder for the other side
+        table = {}
+        nextCode = 258
+        bits = 9
+        # the length of the decoder's table, which lags one entry behind
+        decodedCodes = 0
+        codes = [_LZW_CLEAR]
+        w = None
+        for c in bytearray(data):
+            if w is None:
+                w = c
+                continue
+            key = (w << 8) | c
+            code = table.get(key)
+            if code is not None:
+                w = code
+                continue
+            codes.append(w)
+            if nextCode < 4094:
+                table[key] = nextCode
+                nextCode += 1
+            else:
+                codes.append(_LZW_CLEAR)
+                table.clear()
+                nextCode = 258
+            w = c
+        if w is not None:
+            codes.append(w)
+        codes.append(_LZW_EOD)
+        for code in codes:
+            acc = (acc << bits) | code
+            nbits += bits
+            while nbits >= 8:
+                nbits -= 8
+                out.append((acc >> nbits) & 255)
+            acc &= (1 << nbits) - 1
+            # widen the codes when the decoder does
+            if code == _LZW_CLEAR:
+                decodedCodes = 0
+                bits = 9
+                continue
+            decodedCodes += 1
+            tableLength = 258 + max(0, decodedCodes - 1)
+            if tableLength + earlyChange >= (1 << bits) and bits < 12:
+                bits += 1
+        if nbits:
+            out.append((acc << (8 - nbits)) & 255)
+        return bytes(out)
 
 
 class ASCII85Decode(object):
+    """
+    The /ASCII85Decode filter: base-85 digits, five for four bytes, ended
+    by ``~>``.
+    """
     def decode(data, decodeParms=None):
-        if version_info < ( 3, 0 ):
-            retval = ""
+        data = _stripWhitespace(data)
+        if data.startswith(b"<~"):
+            data = data[2:]
+        end = data.find(b"~")
+        if end >= 0:
+            data = data[:end]
+        try:
+            if hasattr(int, "from_bytes"):
+                return _a85decodeBulk(data)
+            return _a85decode(data)
+        except ValueError:
+            raise PdfReadError("Invalid ASCII85Decode data")
+    decode = staticmethod(decode)
+
+    def encode(data):
+        """
+        :return: *data* in base-85 digits, in lines of 76 characters, ended
+            by ``~>``.
+        :rtype: bytes
+        """
+        if a85encode is not None:
+            return a85encode(data, wrapcol=76) + b"~>"
+        return _wrapLines(_a85encode(data), 76) + b"~>"
+    encode = staticmethod(encode)
+
+
+_A85_DIGITS = bytes(bytearray(range(0x21, 0x76)))
+# maps each digit to its value
+_A85_VALUES = bytes(bytearray((c - 0x21) & 255 for c in range(256)))
+
+
+def _a85decodeBulk(data):
+    # Decodes all groups of base-85 digits at once.  Each group's value is
+    # sum(digit[i] * 85**(4 - i)); placing the i-th digit of every group in
+    # the low byte of a 5-byte slot makes a big integer per digit position,
+    # and combining those five with Horner's rule gives all the groups'
+    # values side by side, none of them spilling out of its slot.
+    if data.translate(None, _A85_DIGITS + b"z"):
+        raise ValueError("invalid character")
+    if b"z" in data:
+        # z stands for a whole group, so only between groups
+        pieces = data.split(b"z")
+        for piece in pieces[:-1]:
+            if len(piece) % 5:
+                raise ValueError("invalid character %r" % 0x7a)
+        data = b"!!!!!".join(pieces)
+    padding = -len(data) % 5
+    values = (data + b"u" * padding).translate(_A85_VALUES)
+    groups = len(values) // 5
+    slots = bytearray(5 * groups)
+    total = 0
+    for i in range(5):
+        slots[4::5] = values[i::5]
+        total = total * 85 + int.from_bytes(bytes(slots), "big")
+    slots = total.to_bytes(5 * groups, "big")
+    if slots[0::5].strip(b"\0"):
+        raise ValueError("group out of range")
+    out = bytearray(4 * groups)
+    for i in range(4):
+        out[i::4] = slots[i + 1::5]
+    return bytes(out[:len(out) - padding])
+
+
+def _a85decode(data):
+    # Decodes base-85 digits without their delimiters, like
+    # base64.a85decode, which Python 2 lacks.
+    out = []
+    group = []
+    for c in bytearray(data):
+        if c == 0x7a and not group: # z
+            out.append(b"\0\0\0\0")
+            continue
+        if c < 0x21 or c > 0x75:
+            raise ValueError("invalid character %r" % c)
+        group.append(c - 33)
+        if len(group) == 5:
+            value = 0
+            for digit in group:
+                value = value * 85 + digit
+            if value > 0xffffffff:
+                raise ValueError("group out of range")
+            out.append(struct.pack(">L", value))
             group = []
-            x = 0
-            hitEod = False
-            # remove all whitespace from data
-            data = [y for y in data if not (y in ' \n\r\t')]
-            while not hitEod:
-                c = data[x]
-                if len(retval) == 0 and c == "<" and data[x+1] == "~":
-                    x += 2
-                    continue
-                #elif c.isspace():
-                #    x += 1
-                #    continue
-                elif c == 'z':
-                    assert len(group) == 0
-                    retval += '\x00\x00\x00\x00'
-                    x += 1
-                    continue
-                elif c == "~" and data[x+1] == ">":
-                    if len(group) != 0:
-                        # cannot have a final group of just 1 char
-                        assert len(group) > 1
-                        cnt = len(group) - 1
-                        group += [ 85, 85, 85 ]
-                        hitEod = cnt
-                    else:
-                        break
-                else:
-                    c = ord(c) - 33
-                    assert c >= 0 and c < 85
-                    group += [ c ]
-                if len(group) >= 5:
-                    b = group[0] * (85**4) + \
-                        group[1] * (85**3) + \
-                        group[2] * (85**2) + \
-                        group[3] * 85 + \
-                        group[4]
-                    assert b < (2**32 - 1)
-                    c4 = chr((b >> 0) % 256)
-                    c3 = chr((b >> 8) % 256)
-                    c2 = chr((b >> 16) % 256)
-                    c1 = chr(b >> 24)
-                    retval += (c1 + c2 + c3 + c4)
-                    if hitEod:
-                        retval = retval[:-4+hitEod]
-                    group = []
-                x += 1
-            return retval
-        else:
-            if isinstance(data, str):
-                data = data.encode('ascii')
-            n = b = 0
-            out = bytearray()
-            for c in data:
-                if ord('!') <= c and c <= ord('u'):
-                    n += 1
-                    b = b*85+(c-33)
-                    if n == 5:
-                        out += struct.pack(b'>L',b)
-                        n = b = 0
-                elif c == ord('z'):
-                    assert n == 0
-                    out += b'\0\0\0\0'
-                elif c == ord('~'):
-                    if n:
-                        for _ in range(5-n):
-                            b = b*85+84
-                        out += struct.pack(b'>L',b)[:n-1]
-                    break
-            return bytes(out)
+    if group:
+        # a final partial group stands for as many bytes as it has digits
+        # less one
+        count = len(group) - 1
+        value = 0
+        for digit in group + [84] * (5 - len(group)):
+            value = value * 85 + digit
+        out.append(struct.pack(">L", value & 0xffffffff)[:count])
+    return b"".join(out)
+
+
+def _a85encode(data):
+    # Encodes into base-85 digits, with z for groups of zeros, like
+    # base64.a85encode, which Python 2 lacks.
+    data = bytes(data)
+    padding = -len(data) % 4
+    words = struct.unpack(">%dL" % ((len(data) + padding) // 4),
+                          data + b"\0" * padding)
+    out = bytearray()
+    for word in words:
+        if word == 0:
+            out += b"z"
+            continue
+        digits = bytearray(5)
+        for i in range(4, -1, -1):
+            word, digit = divmod(word, 85)
+            digits[i] = digit + 33
+        out += digits
+    if padding:
+        if out.endswith(b"z"):
+            out[-1:] = b"!!!!!"
+        del out[len(out) - padding:]
+    return bytes(out)
+
+
+class RunLengthDecode(object):
+    """
+    The /RunLengthDecode filter: runs of up to 128 bytes, each either
+    copied literally or a single byte repeated, ended by a length byte of
+    128.
+    """
+    def decode(data, decodeParms=None):
+        decoder = RunLengthDecoder()
+        return decoder.feed(data) + decoder.flush()
     decode = staticmethod(decode)
 
+    def encode(data):
+        """
+        :return: *data* with repeats of three or more bytes encoded as runs.
+        :rtype: bytes
+        """
+        data = bytes(data)
+        out = bytearray()
+        literalStart = 0
+        for m in _repeatPattern.finditer(data):
+            _appendLiterals(out, data, literalStart, m.start())
+            pos, end = m.span()
+            while end - pos >= 2:
+                count = min(end - pos, 128)
+                out.append(257 - count)
+                out += data[pos:pos + 1]
+                pos += count
+            literalStart = pos
+        _appendLiterals(out, data, literalStart, len(data))
+        out.append(128)
+        return bytes(out)
+    encode = staticmethod(encode)
+
+
+_repeatPattern = re.compile(b"(.)\\1{2,}", re.DOTALL)
+
+
+def _appendLiterals(out, data, start, end):
+    # appends data[start:end] as literal runs of at most 128 bytes
+    for pos in range(start, end, 128):
+        chunk = data[pos:min(pos + 128, end)]
+        out.append(len(chunk) - 1)
+        out += chunk
+
+
 class DCTDecode(object):
+    """
+    The /DCTDecode filter (JPEG).  :meth:`decode` leaves the data as it is,
+    so that the image can be saved or handed to an image library;
+    :meth:`decodeSamples` decodes it.
+    """
     def decode(data, decodeParms=None):
         return data
     decode = staticmethod(decode)
-    
+
+    def decodeSamples(data, decodeParms=None):
+        """
+        Decodes the image to its samples, a row at a time, with Pillow.
+
+        :raises NotImplementedError: if Pillow is not installed.
+        """
+        return _imageSamples(data)
+    decodeSamples = staticmethod(decodeSamples)
+
 class JPXDecode(object):
+    """
+    The /JPXDecode filter (JPEG 2000); like :class:`DCTDecode`.
+    """
     def decode(data, decodeParms=None):
         return data
     decode = staticmethod(decode)
+
+    def decodeSamples(data, decodeParms=None):
+        """
+        Decodes the image to its samples, a row at a time, with Pillow.
+
+        :raises NotImplementedError: if Pillow is not installed.
+        """
+        return _imageSamples(data)
+    decodeSamples = staticmethod(decodeSamples)
+
+
+def _imageSamples(data):
+    if Image is None:
+        raise NotImplementedError("decoding image data needs Pillow")
+    from io import BytesIO
+    try:
+        return Image.open(BytesIO(data)).tobytes()
+    except (IOError, SyntaxError, ValueError) as e:
+        raise PdfReadError("Cannot decode image data: %s" % e)
+
     
 class CCITTFaxDecode(object):   
     def decode(data, decodeParms=None, height=0):
@@ -386,39 +818,550 @@ class CCITTFaxDecode(object):
     
     decode = staticmethod(decode)
     
-def decodeStreamData(stream):
+class DecodeLimits(object):
+    """
+    Caps on the size of decoded stream data, against streams that expand
+    to far more memory than their encoded size suggests ("decompression
+    bombs").  Decoding a stream that would exceed a cap stops as soon as it
+    does, with :class:`PdfSizeLimitError<PyPDF2.utils.PdfSizeLimitError>`.
+    See the ``max_stream_size`` and ``max_decoded_size`` arguments of
+    :class:`PdfFileReader<PyPDF2.PdfFileReader>`.
+
+    :param int maxStreamSize: the most bytes that one stream may decode
+        to, or ``None``.
+    :param int maxTotalSize: the most bytes that all streams together may
+        decode to, or ``None``.
+    :ivar total: the number of bytes decoded so far.
+    """
+    def __init__(self, maxStreamSize=None, maxTotalSize=None):
+        self.maxStreamSize = maxStreamSize
+        self.maxTotalSize = maxTotalSize
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def charge(self, size):
+        """
+        Counts *size* more decoded bytes, from any thread; a negative size
+        gives bytes back, for data that was thrown away.
+
+        :raises PdfSizeLimitError: if the total would exceed
+            ``maxTotalSize``; the bytes are not counted then.
+        """
+        with self._lock:
+            if (size > 0 and self.maxTotalSize is not None and
+                    self.total + size > self.maxTotalSize):
+                raise PdfSizeLimitError("Decoded streams exceed the limit of %d bytes"
+                                        % self.maxTotalSize)
+            self.total += size
+
+    def remaining(self):
+        """
+        :return: the most bytes that the next stream may decode to, or
+            ``None`` if there is no limit.
+        """
+        limit = self.maxStreamSize
+        if self.maxTotalSize is not None:
+            left = max(0, self.maxTotalSize - self.total)
+            if limit is None or left < limit:
+                limit = left
+        return limit
+
+
+class StreamDecoder(object):
+    """
+    An incremental decoder, in the style of ``zlib.decompressobj``: data
+    passed to :meth:`feed` in pieces of any size comes out decoded as soon
+    as possible, and :meth:`flush` returns the rest at the end.  Decoders
+    are combined with :class:`DecoderChain`.
+
+    :param int limit: the most bytes the decoder may output, or ``None``;
+        more raises :class:`PdfSizeLimitError<PyPDF2.utils.PdfSizeLimitError>`.
+    """
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.size = 0
+
+    def feed(self, data):
+        """
+        Decodes the next piece of the encoded data.
+
+        :return: the decoded data that is complete so far.
+        :rtype: bytes
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Ends the encoded data.
+
+        :return: the remaining decoded data.
+        :rtype: bytes
+        """
+        return b""
+
+    def decodeAll(self, data):
+        """
+        Decodes the whole of the encoded data, feeding it in pieces, and
+        ends it.
+
+        :return: the decoded data.
+        :rtype: bytes
+        """
+        pieces = []
+        for pos in range(0, len(data), FlateDecoder.chunkSize):
+            pieces.append(self.feed(data[pos:pos + FlateDecoder.chunkSize]))
+        pieces.append(self.flush())
+        return b"".join(pieces)
+
+    def _output(self, data):
+        # counts decoded data against the limit before handing it out
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            raise PdfSizeLimitError("Decoded stream exceeds the limit of %d bytes"
+                                    % self.limit)
+        return data
+
+
+class BufferedDecoder(StreamDecoder):
+    """
+    Adapts a filter that decodes all of its data at once, such as
+    :meth:`ASCII85Decode.decode`, to the :class:`StreamDecoder` interface:
+    the data is collected and decoded by :meth:`flush`.
+
+    :param decode: a function of the encoded data returning the decoded data.
+    """
+    def __init__(self, decode, limit=None):
+        StreamDecoder.__init__(self, limit)
+        self._decode = decode
+        self._pieces = []
+
+    def feed(self, data):
+        self._pieces.append(data)
+        return b""
+
+    def flush(self):
+        data = self._decode(b"".join(self._pieces))
+        self._pieces = []
+        return self._output(data)
+
+
+class PassThroughDecoder(StreamDecoder):
+    """
+    The decoder of filters whose output is left encoded, such as
+    /DCTDecode: consumers of the stream decode the data themselves.
+    """
+    def feed(self, data):
+        return self._output(data)
+
+
+class PredictorDecoder(StreamDecoder):
+    """
+    Undoes a predictor (see :func:`decodePredictor`) on data that arrives in
+    pieces, a row at a time.
+
+    :param decodeParms: the /DecodeParms of the filter.
+    """
+    def __init__(self, decodeParms, limit=None):
+        StreamDecoder.__init__(self, limit)
+        self._parms = decodeParms
+        predictor, colors, bitsPerComponent, columns, self._rowLength = \
+            _getPredictorParms(decodeParms)
+        self._png = predictor >= 10
+        self._stride = max(1, self._rowLength + 1 if self._png else self._rowLength)
+        self._buffer = bytearray()
+        self._prev = None
+
+    def feed(self, data):
+        self._buffer += data
+        end = len(self._buffer) - len(self._buffer) % self._stride
+        if end == 0:
+            return b""
+        rows = bytes(self._buffer[:end])
+        del self._buffer[:end]
+        if self._png and self._prev is not None:
+            # the previous row goes in front, unfiltered, for the filters
+            # that look at the row above
+            rows = b"\x00" + self._prev + rows
+            data = decodePredictor(rows, self._parms)[self._rowLength:]
+        else:
+            data = decodePredictor(rows, self._parms)
+        if self._png:
+            self._prev = data[len(data) - self._rowLength:]
+        return self._output(data)
+
+    def flush(self):
+        if self._buffer and self._png:
+            raise PdfReadError("PNG predictor data is not a whole number of rows")
+        data = bytes(self._buffer)
+        self._buffer = bytearray()
+        return self._output(data)
+
+
+class _PredictedDecoder(StreamDecoder):
+    # Base of the decoders of filters that can have a predictor.
+    def __init__(self, decodeParms, limit):
+        StreamDecoder.__init__(self, limit)
+        if _getParm(decodeParms, "/Predictor", 1) != 1:
+            self._predictor = PredictorDecoder(decodeParms)
+        else:
+            self._predictor = None
+
+    def _unpredict(self, data):
+        if self._predictor is not None and data:
+            return self._predictor.feed(data)
+        return data
+
+    def _flushPredictor(self, data):
+        data = self._unpredict(data)
+        if self._predictor is not None:
+            data += self._predictor.flush()
+        return data
+
+
+class FlateDecoder(_PredictedDecoder):
+    """
+    Decompresses /FlateDecode data incrementally, never producing more
+    than the limit allows before checking it, and undoes the predictor
+    that *decodeParms* specify.
+    """
+    # the most bytes decompressed in one step
+    chunkSize = 65536
+
+    def __init__(self, decodeParms=None, limit=None):
+        _PredictedDecoder.__init__(self, decodeParms, limit)
+        if inflateModule is not None:
+            self._zlib = inflateModule.decompressobj()
+        else:
+            self._zlib = None
+            self._pieces = []
+
+    def feed(self, data):
+        if self._zlib is None:
+            self._pieces.append(data)
+            return b""
+        pieces = []
+        while data:
+            piece = self._zlib.decompress(data, self.chunkSize)
+            data = self._zlib.unconsumed_tail
+            pieces.append(self._output(piece))
+        return self._unpredict(b"".join(pieces))
+
+    def flush(self):
+        if self._zlib is None:
+            data = self._output(decompress(b"".join(self._pieces)))
+        else:
+            data = self._output(self._zlib.flush())
+        return self._flushPredictor(data)
+
+
+_LZW_CLEAR = 256
+_LZW_EOD = 257
+
+
+class LZWDecoder(_PredictedDecoder):
+    """
+    Decodes /LZWDecode data incrementally, honouring /EarlyChange and the
+    predictor that *decodeParms* specify.  Data after the end-of-data code
+    is ignored; data missing it decodes to what is there.
+
+    Codes are read from an integer bit buffer.  The table holds the string
+    of each code, each made from an earlier one and one byte, so that a
+    code is written out in one step rather than by walking a chain of
+    prefixes.
+    """
+    def __init__(self, decodeParms=None, limit=None):
+        _PredictedDecoder.__init__(self, decodeParms, limit)
+        self._earlyChange = _getParm(decodeParms, "/EarlyChange", 1)
+        self._table = [bytes(bytearray((i,))) for i in range(256)] + [b"", b""]
+        self._bits = 9
+        self._prev = None
+        self._buffer = self._bufferBits = 0
+        self._done = False
+
+    def feed(self, data):
+        if self._done:
+            return b""
+        table = self._table
+        earlyChange = self._earlyChange
+        bits = self._bits
+        prev = self._prev
+        buf, bufBits = self._buffer, self._bufferBits
+        # checked as the output grows, since one piece of input can expand
+        # by a factor of thousands
+        room = None if self.limit is None else self.limit - self.size
+        produced = 0
+        out = []
+        for byte in bytearray(data):
+            buf = (buf << 8) | byte
+            bufBits += 8
+            if bufBits < bits:
+                continue
+            bufBits -= bits
+            code = buf >> bufBits
+            buf &= (1 << bufBits) - 1
+            if code == _LZW_CLEAR:
+                del table[258:]
+                bits = 9
+                prev = None
+                continue
+            if code == _LZW_EOD:
+                self._done = True
+                break
+            if code < len(table) and (prev is not None or code < 256):
+                entry = table[code]
+                if prev is not None and len(table) < 4096:
+                    table.append(prev + entry[:1])
+            elif code == len(table) and prev is not None:
+                entry = prev + prev[:1]
+                table.append(entry)
+            else:
+                raise PdfReadError("Invalid LZW code %d" % code)
+            out.append(entry)
+            prev = entry
+            if len(table) + earlyChange >= (1 << bits) and bits < 12:
+                bits += 1
+            if room is not None:
+                produced += len(entry)
+                if produced > room:
+                    break
+        self._bits, self._prev = bits, prev
+        self._buffer, self._bufferBits = buf, bufBits
+        return self._unpredict(self._output(b"".join(out)))
+
+    def flush(self):
+        return self._flushPredictor(b"")
+
+
+class RunLengthDecoder(StreamDecoder):
+    """
+    Decodes /RunLengthDecode data incrementally.  Each run is one slice,
+    multiplied for a repeat, appended to the output buffer.
+    """
+    def __init__(self, decodeParms=None, limit=None):
+        StreamDecoder.__init__(self, limit)
+        self._buffer = b""
+        self._done = False
+
+    def feed(self, data):
+        if self._done:
+            return b""
+        buf = self._buffer + bytes(data)
+        bufLength = len(buf)
+        ords = bytearray(buf) if version_info < (3, 0) else buf
+        # checked as the output grows, since runs expand up to 64 times
+        room = None if self.limit is None else self.limit - self.size
+        out = bytearray()
+        pos = 0
+        while pos < bufLength:
+            length = ords[pos]
+            if length == 128:
+                self._done = True
+                break
+            if length < 128:
+                end = pos + length + 2
+                if end > bufLength:
+                    break
+                out += buf[pos + 1:end]
+            else:
+                end = pos + 2
+                if end > bufLength:
+                    break
+                out += buf[pos + 1:end] * (257 - length)
+            pos = end
+            if room is not None and len(out) > room:
+                break
+        self._buffer = buf[pos:]
+        return self._output(bytes(out))
+
+
+class DecoderChain(StreamDecoder):
+    """
+    Passes data through a sequence of :class:`StreamDecoder` objects, as
+    the /Filter array of a stream does; it is a decoder itself.
+
+    :param list decoders: the decoders, in the order they are applied.
+    :param limits: optional :class:`DecodeLimits` to charge the decoded data
+        to as it comes out, so that chains decoding at the same time share
+        its ``maxTotalSize``.
+    """
+    def __init__(self, decoders, limit=None, limits=None):
+        StreamDecoder.__init__(self, limit)
+        self.decoders = decoders
+        self.limits = limits
+        self.charged = 0
+
+    def feed(self, data):
+        for decoder in self.decoders:
+            if not data:
+                return b""
+            data = decoder.feed(data)
+        return self._output(data)
+
+    def flush(self):
+        data = b""
+        for decoder in self.decoders:
+            if data:
+                data = decoder.feed(data) + decoder.flush()
+            else:
+                data = decoder.flush()
+        return self._output(data)
+
+    def _output(self, data):
+        data = StreamDecoder._output(self, data)
+        if self.limits is not None and data:
+            self.limits.charge(len(data))
+            self.charged += len(data)
+        return data
+
+
+# filter name -> function creating its decoder, see registerFilter
+_decoders = {}
+# filter name -> function encoding data with it
+_encoders = {}
+
+
+def registerFilter(name, decoder, encoder=None, aliases=()):
+    """
+    Registers the implementation of a filter, replacing the one it had, if
+    any.  For instance, to get the samples of JPEG images instead of the
+    JPEG data::
+
+        filters.registerFilter("/DCTDecode",
+            lambda parms, stream, limit:
+                filters.BufferedDecoder(filters.DCTDecode.decodeSamples, limit),
+            aliases=["/DCT"])
+
+    :param str name: the filter's name, such as ``/FlateDecode``.
+    :param decoder: a function called as ``decoder(decodeParms, stream,
+        limit)``, with the arguments of :func:`getDecoder`, returning a
+        :class:`StreamDecoder` for one stream.
+    :param encoder: a function of the data returning it encoded, or ``None``
+        if the filter can only decode.
+    :param aliases: other names of the filter, such as the abbreviations
+        used in inline images.
+    """
+    for n in [name] + list(aliases):
+        _decoders[n] = decoder
+        if encoder is not None:
+            _encoders[n] = encoder
+        else:
+            _encoders.pop(n, None)
+
+
+def getDecoder(filterType, decodeParms=None, stream=None, limit=None):
+    """
+    Creates an incremental decoder for a filter.
+
+    :param str filterType: the filter's name, such as ``/FlateDecode``; the
+        abbreviations of inline images are recognised too.
+    :param decodeParms: the filter's /DecodeParms, or ``None``.
+    :param stream: the stream being decoded, for filters that need more of
+        its dictionary than /DecodeParms.
+    :param int limit: the most bytes the decoder may output, or ``None``.
+    :return: the decoder.
+    :rtype: :class:`StreamDecoder`
+    :raises NotImplementedError: if the filter is not supported.
+    """
+    decoder = _decoders.get(filterType)
+    if decoder is None:
+        # unsupported filter
+        raise NotImplementedError("unsupported filter %s" % filterType)
+    return decoder(decodeParms, stream, limit)
+
+
+def getEncoder(filterType):
+    """
+    :param str filterType: the filter's name, such as ``/FlateDecode``.
+    :return: the function that encodes data with the filter.
+    :raises NotImplementedError: if the filter cannot encode.
+    """
+    encoder = _encoders.get(filterType)
+    if encoder is None:
+        raise NotImplementedError("cannot encode with filter %s" % filterType)
+    return encoder
+
+
+def _ccittDecoder(decodeParms, stream, limit):
+    height = stream.get("/Height", ()) if stream is not None else ()
+    return BufferedDecoder(lambda data: CCITTFaxDecode.decode(data, decodeParms, height), limit)
+
+
+def _cryptDecoder(decodeParms, stream, limit):
+    decodeParams = stream.get("/DecodeParams", {}) if stream is not None else {}
+    if "/Name" not in decodeParams and "/Type" not in decodeParams:
+        return PassThroughDecoder(limit)
+    else:
+        raise NotImplementedError("/Crypt filter with /Name or /Type not supported yet")
+
+
+registerFilter("/FlateDecode",
+               lambda parms, stream, limit: FlateDecoder(parms, limit),
+               FlateDecode.encode, ["/Fl"])
+registerFilter("/ASCIIHexDecode",
+               lambda parms, stream, limit: BufferedDecoder(ASCIIHexDecode.decode, limit),
+               ASCIIHexDecode.encode, ["/AHx"])
+registerFilter("/LZWDecode",
+               lambda parms, stream, limit: LZWDecoder(parms, limit),
+               LZWDecode.encode, ["/LZW"])
+registerFilter("/ASCII85Decode",
+               lambda parms, stream, limit: BufferedDecoder(ASCII85Decode.decode, limit),
+               ASCII85Decode.encode, ["/A85"])
+registerFilter("/RunLengthDecode",
+               lambda parms, stream, limit: RunLengthDecoder(parms, limit),
+               RunLengthDecode.encode, ["/RL"])
+registerFilter("/DCTDecode",
+               lambda parms, stream, limit: PassThroughDecoder(limit), aliases=["/DCT"])
+registerFilter("/JPXDecode",
+               lambda parms, stream, limit: PassThroughDecoder(limit))
+registerFilter("/CCITTFaxDecode", _ccittDecoder, aliases=["/CCF"])
+registerFilter("/Crypt", _cryptDecoder)
+
+
+def getStreamDecoder(stream, limit=None, limits=None):
+    """
+    Creates the decoder of a stream object's /Filter chain.
+
+    :param stream: the :class:`StreamObject<PyPDF2.generic.StreamObject>`.
+    :param int limit: the most bytes the stream may decode to, or ``None``.
+    :param limits: optional :class:`DecodeLimits` that the chain charges the
+        decoded data to, see :class:`DecoderChain`.
+    :rtype: :class:`DecoderChain`
+    :raises NotImplementedError: if a filter is not supported.
+    """
     from .generic import NameObject
     filters = stream.get("/Filter", ())
 
     if len(filters) and not isinstance(filters[0], NameObject):
         # we have a single filter instance
         filters = (filters,)
+    parms = stream.get("/DecodeParms")
+    decoders = []
+    for i, filterType in enumerate(filters):
+        if isinstance(parms, list):
+            # one entry per filter
+            filterParms = parms[i].getObject() if i < len(parms) else None
+        else:
+            filterParms = parms
+        decoders.append(getDecoder(filterType, filterParms, stream, limit))
+    return DecoderChain(decoders, limits=limits)
+
+
+def decodeStreamData(stream, limits=None):
+    """
+    Decodes the data of a stream object through its /Filter chain, feeding
+    it to the decoders in pieces.
+
+    :param stream: the :class:`StreamObject<PyPDF2.generic.StreamObject>`.
+    :param limits: optional :class:`DecodeLimits` to enforce and to count
+        the decoded data against.
+    :return: the decoded data.
+    :rtype: bytes
+    """
     data = stream._data
     # If there is not data to decode we should not try to decode the data.
     if data:
-        for filterType in filters:
-            if filterType == "/FlateDecode" or filterType == "/Fl":
-                data = FlateDecode.decode(data, stream.get("/DecodeParms"))
-            elif filterType == "/ASCIIHexDecode" or filterType == "/AHx":
-                data = ASCIIHexDecode.decode(data)
-            elif filterType == "/LZWDecode" or filterType == "/LZW":
-                data = LZWDecode.decode(data, stream.get("/DecodeParms"))
-            elif filterType == "/ASCII85Decode" or filterType == "/A85":
-                data = ASCII85Decode.decode(data)
-            elif filterType == "/DCTDecode":
-                data = DCTDecode.decode(data)
-            elif filterType == "/JPXDecode":
-                data = JPXDecode.decode(data)
-            elif filterType == "/CCITTFaxDecode":
-                height = stream.get("/Height", ())
-                data = CCITTFaxDecode.decode(data, stream.get("/DecodeParms"), height)
-            elif filterType == "/Crypt":
-                decodeParams = stream.get("/DecodeParams", {})
-                if "/Name" not in decodeParams and "/Type" not in decodeParams:
-                    pass
-                else:
-                    raise NotImplementedError("/Crypt filter with /Name or /Type not supported yet")
-            else:
-                # unsupported filter
-                raise NotImplementedError("unsupported filter %s" % filterType)
+        limit = limits.remaining() if limits is not None else None
+        data = getStreamDecoder(stream, limit).decodeAll(data)
+        if limits is not None:
+            limits.total += len(data)
     return data
@@ -35,23 +35,47 @@ __author__ = "Mathieu Fenniak"
 __author_email__ = "biziqe@mathieu.fenniak.net"
 
 import re
+import binascii
 from .utils import readNonWhitespace, RC4_encrypt, skipOverComment
 from .utils import b_, u_, chr_, ord_
 from .utils import PdfStreamError
 import warnings
 from . import filters
 from . import utils
+from .sources import BufferStream
 import decimal
 import codecs
 import sys
 #import debugging
 
+if sys.version_info[0] < 3:
+    BytesIO = None
+else:
+    from io import BytesIO
+
 ObjectPrefix = b_('/<[tf(n%')
 NumberSigns = b_('+-')
 IndirectPattern = re.compile(b_(r"[+-]?(\d+)\s+(\d+)\s+R[^a-zA-Z]"))
 
 
 def readObject(stream, pdf):
+    if BytesIO is not None:
+        # Streams backed by a buffer are parsed by index, without the
+        # byte-at-a-time reads and seeks below.
+        if isinstance(stream, BufferStream):
+            buf = stream.getbuffer()
+            if buf is not None:
+                obj, pos = BufferParser(buf, pdf).readObject(stream.tell())
+                stream.seek(pos, 0)
+                return obj
+        elif isinstance(stream, BytesIO):
+            buf = stream.getbuffer()
+            try:
+                obj, pos = BufferParser(buf, pdf).readObject(stream.tell())
+            finally:
+                buf.release()
+            stream.seek(pos, 0)
+            return obj
     tok = stream.read(1)
     stream.seek(-1, 1) # reset to start
     idx = ObjectPrefix.find(tok)
@@ -99,6 +123,171 @@ def readObject(stream, pdf):
             return NumberObject.readFromStream(stream)
 
 
+_WhitespaceRun = re.compile(b_("[ \n\r\t\x00]*")) # utils.WHITESPACES
+_SpaceRun = re.compile(b_(r"\s*")) # bytes.isspace()
+_LineEnd = re.compile(b_("[\r\n]"))
+_Keywords = dict((name, b_(name)) for name in
+                 ("<", " ", "\n", "\r", "true", "fals", "null", "stream", "endstream"))
+
+
+class BufferParser(object):
+    """
+    Parses PDF objects out of a bytes-like buffer (``bytes``, ``memoryview``
+    or ``mmap``) by index, using regular expressions to find the end of each
+    token instead of reading the buffer one byte at a time.  Gives the same
+    objects as the stream-based ``readFromStream`` methods, which it replaces
+    in :func:`readObject` for buffer-backed streams.
+
+    :param buf: the buffer to parse.
+    :param pdf: the :class:`PdfFileReader<PyPDF2.PdfFileReader>` that
+        indirect references are resolved with, or ``None``.
+    """
+    def __init__(self, buf, pdf):
+        self.buf = buf
+        self.size = len(buf)
+        self.pdf = pdf
+
+    def readObject(self, pos):
+        """
+        Reads the object starting at *pos*.
+
+        :return: the object and the position just after it.
+        :rtype: tuple
+        """
+        buf = self.buf
+        if pos >= self.size:
+            raise PdfStreamError("Stream has ended unexpectedly")
+        c = buf[pos]
+        if c == 0x2F: # /
+            return self.readName(pos)
+        elif c == 0x3C: # <
+            if buf[pos + 1:pos + 2] == _Keywords["<"]:
+                return self.readDictionary(pos)
+            return self.readString(pos, decodeHexString)
+        elif c == 0x5B: # [
+            return self.readArray(pos)
+        elif c == 0x74 or c == 0x66: # t, f
+            word = bytes(buf[pos:pos + 4])
+            if word == _Keywords["true"]:
+                return BooleanObject(True), pos + 4
+            elif word == _Keywords["fals"]:
+                return BooleanObject(False), min(pos + 5, self.size)
+            raise utils.PdfReadError('Could not read Boolean object')
+        elif c == 0x28: # (
+            return self.readString(pos, decodeLiteralString)
+        elif c == 0x6E: # n
+            if bytes(buf[pos:pos + 4]) != _Keywords["null"]:
+                raise utils.PdfReadError("Could not read Null object")
+            return NullObject(), pos + 4
+        elif c == 0x25: # %
+            m = _LineEnd.search(buf, pos)
+            if m is None:
+                raise PdfStreamError("File ended unexpectedly.")
+            return self.readObject(_WhitespaceRun.match(buf, m.end()).end())
+        # number object OR indirect reference; the reference has to fit in
+        # 20 bytes, as in the stream-based parser.
+        m = IndirectPattern.match(buf, pos, pos + 20)
+        if m is not None:
+            return IndirectObject(int(bytes(buf[pos:m.end(1)])),
+                                  int(m.group(2)), self.pdf), m.end() - 1
+        m = NumberObject.NumberPattern.search(buf, pos)
+        if m is None:
+            raise PdfStreamError("Stream has ended unexpectedly")
+        num = bytes(buf[pos:m.start()])
+        if num.find(NumberObject.ByteDot) != -1:
+            return FloatObject(num), m.start()
+        return NumberObject(num), m.start()
+
+    def readName(self, pos):
+        m = NameObject.delimiterPattern.search(self.buf, pos + 1)
+        end = m.start() if m is not None else self.size
+        return NameObject.fromBytes(bytes(self.buf[pos:end]), self.pdf), end
+
+    def readString(self, pos, decode):
+        string, end = decode(self.buf, pos)
+        return createStringObject(string), end
+
+    def readArray(self, pos):
+        buf = self.buf
+        arr = ArrayObject()
+        pos += 1
+        while True:
+            pos = _SpaceRun.match(buf, pos).end()
+            if pos >= self.size:
+                raise PdfStreamError("Stream has ended unexpectedly")
+            if buf[pos] == 0x5D: # ]
+                return arr, pos + 1
+            obj, pos = self.readObject(pos)
+            arr.append(obj)
+
+    def readDictionary(self, pos):
+        buf = self.buf
+        pdf = self.pdf
+        data = {}
+        pos += 2
+        while True:
+            pos = _WhitespaceRun.match(buf, pos).end()
+            if pos >= self.size:
+                raise PdfStreamError("Stream has ended unexpectedly")
+            c = buf[pos]
+            if c == 0x25: # %
+                m = _LineEnd.search(buf, pos)
+                if m is None:
+                    raise PdfStreamError("Stream has ended unexpectedly")
+                pos = m.end()
+                continue
+            if c == 0x3E: # >
+                pos = min(pos + 2, self.size)
+                break
+            key, pos = self.readObject(pos)
+            pos = _WhitespaceRun.match(buf, pos).end()
+            value, pos = self.readObject(pos)
+            if not data.get(key):
+                data[key] = value
+            elif pdf.strict:
+                # multiple definitions of key not permitted
+                raise utils.PdfReadError("Multiple definitions in dictionary at byte %s for key %s" \
+                                           % (utils.hexStr(pos), key))
+            else:
+                warnings.warn("Multiple definitions in dictionary at byte %s for key %s" \
+                                           % (utils.hexStr(pos), key), utils.PdfReadWarning)
+
+        start = _WhitespaceRun.match(buf, pos).end()
+        if bytes(buf[start:start + 6]) != _Keywords["stream"]:
+            retval = DictionaryObject()
+            retval.update(data)
+            return retval, pos
+
+        pos = start + 6
+        # odd PDF file output has spaces after 'stream' keyword but before EOL.
+        while buf[pos:pos + 1] == _Keywords[" "]:
+            pos += 1
+        eol = bytes(buf[pos:pos + 1])
+        assert eol in (_Keywords["\n"], _Keywords["\r"])
+        pos += 1
+        if eol == _Keywords["\r"] and buf[pos:pos + 1] == _Keywords["\n"]:
+            pos += 1
+        # this is a stream object, not a dictionary
+        assert "/Length" in data
+        length = data["/Length"]
+        if isinstance(length, IndirectObject):
+            length = pdf.getObject(length)
+        end = pos + length if length >= 0 else self.size
+        data["__streamdata__"] = bytes(buf[pos:end])
+        pos = _WhitespaceRun.match(buf, min(end, self.size)).end()
+        end = min(pos + 9, self.size)
+        if bytes(buf[pos:end]) != _Keywords["endstream"]:
+            # (sigh) - the odd PDF file has a length that is too long, so
+            # we need to look backwards for the "endstream" ending, and chop
+            # off an extra character.
+            back = max(end - 10, 0)
+            if bytes(buf[back:back + 9]) != _Keywords["endstream"]:
+                raise utils.PdfReadError("Unable to find 'endstream' marker after stream at byte %s." % utils.hexStr(end))
+            data["__streamdata__"] = data["__streamdata__"][:-1]
+            end = min(back + 9, self.size)
+        return StreamObject.initializeFromDictionary(data), end
+
+
 class PdfObject(object):
     def getObject(self):
         """Resolves indirect references."""
@@ -302,96 +491,136 @@ def createStringObject(string):
 
 
 def readHexStringFromStream(stream):
-    stream.read(1)
-    txt = ""
-    x = b_("")
-    while True:
-        tok = readNonWhitespace(stream)
-        if not tok:
-            # stream has truncated prematurely
-            raise PdfStreamError("Stream has ended unexpectedly")
-        if tok == b_(">"):
-            break
-        x += tok
-        if len(x) == 2:
-            txt += chr(int(x, base=16))
-            x = b_("")
-    if len(x) == 1:
-        x += b_("0")
-    if len(x) == 2:
-        txt += chr(int(x, base=16))
-    return createStringObject(b_(txt))
+    return createStringObject(_readFromStream(stream, decodeHexString))
 
 
 def readStringFromStream(stream):
-    tok = stream.read(1)
+    return createStringObject(_readFromStream(stream, decodeLiteralString))
+
+
+def _readFromStream(stream, decode):
+    # Reads ever larger chunks of *stream* until *decode* finds the end of
+    # the string in them, and leaves the stream just after it.
+    start = stream.tell()
+    data = b_("")
+    size = 256
+    while True:
+        chunk = stream.read(size)
+        data += chunk
+        try:
+            string, end = decode(data, 0)
+        except PdfStreamError:
+            if not chunk:
+                raise
+            size *= 2
+            continue
+        stream.seek(start + end, 0)
+        return string
+
+
+_HexStringEnd = re.compile(b_(">"))
+_StringSpecials = re.compile(b_(r"[()\\]"))
+_OctalEscape = re.compile(b_("[0-7]{1,3}"))
+_StringEscapes = {b_("n") : b_("\n"),
+                  b_("r") : b_("\r"),
+                  b_("t") : b_("\t"),
+                  b_("b") : b_("\b"),
+                  b_("f") : b_("\f"),
+                  b_("c") : b_("\\c"),
+                  b_("(") : b_("("),
+                  b_(")") : b_(")"),
+                  b_("/") : b_("/"),
+                  b_("\\") : b_("\\"),
+                  b_(" ") : b_(" "),
+                  b_("%") : b_("%"),
+                  b_("<") : b_("<"),
+                  b_(">") : b_(">"),
+                  b_("[") : b_("["),
+                  b_("]") : b_("]"),
+                  b_("#") : b_("#"),
+                  b_("_") : b_("_"),
+                  b_("&") : b_("&"),
+                  b_('$') : b_('$'),
+                  }
+
+
+def decodeHexString(buf, pos):
+    """
+    Decodes the hexadecimal string starting with the ``<`` at *pos* in the
+    bytes-like *buf*.
+
+    :return: the decoded bytes and the position just after the closing
+        ``>``.
+    :rtype: tuple
+    """
+    m = _HexStringEnd.search(buf, pos + 1)
+    if m is None:
+        # stream has truncated prematurely
+        raise PdfStreamError("Stream has ended unexpectedly")
+    digits = bytes(buf[pos + 1:m.start()]).translate(None, b_(" \n\r\t\x00"))
+    if len(digits) % 2:
+        digits += b_("0")
+    try:
+        return binascii.unhexlify(digits), m.end()
+    except (TypeError, binascii.Error):
+        raise ValueError("Invalid hexadecimal string %r" % digits)
+
+
+def decodeLiteralString(buf, pos):
+    """
+    Decodes the literal string starting with the ``(`` at *pos* in the
+    bytes-like *buf*: finds the matching closing parenthesis and replaces
+    escape sequences, copying the text between them in slices.
+
+    :return: the decoded bytes and the position just after the closing
+        ``)``.
+    :rtype: tuple
+    """
+    parts = []
     parens = 1
-    txt = b_("")
+    pos += 1
+    search = _StringSpecials.search
     while True:
-        tok = stream.read(1)
-        if not tok:
+        m = search(buf, pos)
+        if m is None:
             # stream has truncated prematurely
             raise PdfStreamError("Stream has ended unexpectedly")
-        if tok == b_("("):
+        i = m.start()
+        c = m.group()
+        if c == b_("\\"):
+            parts.append(buf[pos:i])
+            tok = bytes(buf[i + 1:i + 2])
+            pos = i + 2
+            if tok in _StringEscapes:
+                parts.append(_StringEscapes[tok])
+            elif not tok:
+                raise PdfStreamError("Stream has ended unexpectedly")
+            elif tok in b_("\n\r"):
+                # An escaped line break (of one or two characters) is not
+                # part of the string.
+                if buf[pos:pos + 1] in (b_("\n"), b_("\r")):
+                    pos += 1
+            else:
+                # "The number ddd may consist of one, two, or three
+                # octal digits; high-order overflow shall be ignored.
+                # Three octal digits shall be used, with leading zeros
+                # as needed, if the next character of the string is also
+                # a digit." (PDF reference 7.3.4.2, p 16)
+                octal = _OctalEscape.match(buf, i + 1)
+                if octal is None:
+                    raise utils.PdfReadError(r"Unexpected escaped string: %s" % tok)
+                parts.append(b_(chr(int(octal.group(), 8) & 0xFF)))
+                pos = octal.end()
+            continue
+        if c == b_("("):
             parens += 1
-        elif tok == b_(")"):
+        else:
             parens -= 1
             if parens == 0:
-                break
-        elif tok == b_("\\"):
-            tok = stream.read(1)
-            ESCAPE_DICT = {b_("n") : b_("\n"),
-                           b_("r") : b_("\r"),
-                           b_("t") : b_("\t"),
-                           b_("b") : b_("\b"),
-                           b_("f") : b_("\f"),
-                           b_("c") : b_("\c"),
-                           b_("(") : b_("("),
-                           b_(")") : b_(")"),
-                           b_("/") : b_("/"),
-                           b_("\\") : b_("\\"),
-                           b_(" ") : b_(" "),
-                           b_("/") : b_("/"),
-                           b_("%") : b_("%"),
-                           b_("<") : b_("<"),
-                           b_(">") : b_(">"),
-                           b_("[") : b_("["), 
-                           b_("]") : b_("]"),
-                           b_("#") : b_("#"),
-                           b_("_") : b_("_"),
-                           b_("&") : b_("&"),
-                           b_('$') : b_('$'),
-                           }
-            try:
-                tok = ESCAPE_DICT[tok]
-            except KeyError:
-                if tok.isdigit():
-                    # "The number ddd may consist of one, two, or three
-                    # octal digits; high-order overflow shall be ignored.
-                    # Three octal digits shall be used, with leading zeros
-                    # as needed, if the next character of the string is also
-                    # a digit." (PDF reference 7.3.4.2, p 16)
-                    for i in range(2):
-                        ntok = stream.read(1)
-                        if ntok.isdigit():
-                            tok += ntok
-                        else:
-                            break
-                    tok = b_(chr(int(tok, base=8)))
-                elif tok in b_("\n\r"):
-                    # This case is  hit when a backslash followed by a line
-                    # break occurs.  If it's a multi-char EOL, consume the
-                    # second character:
-                    tok = stream.read(1)
-                    if not tok in b_("\n\r"):
-                        stream.seek(-1, 1)
-                    # Then don't add anything to the actual string, since this
-                    # line break was escaped:
-                    tok = b_('')
-                else:
-                    raise utils.PdfReadError(r"Unexpected escaped string: %s" % tok)
-        txt += tok
-    return createStringObject(txt)
+                parts.append(buf[pos:i])
+                return b_("").join(parts), i + 1
+        parts.append(buf[pos:i + 1])
+        pos = i + 1
 
 
 ##
@@ -459,7 +688,7 @@ class TextStringObject(utils.string_type, PdfObject):
         else:
             stream.write(b_("("))
             for c in bytearr:
-                if not chr_(c).isalnum() and c != b_(' '):
+                if not chr_(c).isalnum() and c != b_(' ') or ord_(c) > 127:
                     stream.write(b_("\\%03o" % ord_(c)))
                 else:
                     stream.write(b_(chr_(c)))
@@ -469,9 +698,17 @@ class TextStringObject(utils.string_type, PdfObject):
 class NameObject(str, PdfObject):
     delimiterPattern = re.compile(b_(r"\s+|[\(\)<>\[\]{}/%]"))
     surfix = b_("/")
+    # bytes that are written as #xx: all but printable ASCII, the
+    # delimiters and the number sign itself
+    escapePattern = re.compile(b_(r"[^!-~]|[#\(\)<>\[\]{}/%]"))
+    escapedPattern = re.compile(b_(r"#([0-9A-Fa-f]{2})"))
 
     def writeToStream(self, stream, encryption_key):
-        stream.write(b_(self))
+        name = self if isinstance(self, bytes) else self.encode("utf-8")
+        if NameObject.escapePattern.search(name, 1):
+            name = name[:1] + NameObject.escapePattern.sub(
+                lambda m: b_("#%02X" % ord(m.group())), name[1:])
+        stream.write(name)
 
     def readFromStream(stream, pdf):
         debug = False
@@ -482,6 +719,14 @@ class NameObject(str, PdfObject):
         name += utils.readUntilRegex(stream, NameObject.delimiterPattern, 
             ignore_eof=True)
         if debug: print(name)
+        return NameObject.fromBytes(name, pdf)
+
+    readFromStream = staticmethod(readFromStream)
+
+    def fromBytes(name, pdf):
+        if b_("#") in name:
+            name = NameObject.escapedPattern.sub(
+                lambda m: binascii.unhexlify(m.group(1)), name)
         try:
             return NameObject(name.decode('utf-8'))
         except (UnicodeEncodeError, UnicodeDecodeError) as e:
@@ -493,7 +738,7 @@ class NameObject(str, PdfObject):
             else:
                 raise utils.PdfReadError("Illegal character in Name Object")
 
-    readFromStream = staticmethod(readFromStream)
+    fromBytes = staticmethod(fromBytes)
 
 
 class DictionaryObject(dict, PdfObject):
@@ -775,10 +1020,36 @@ class TreeObject(DictionaryObject):
 
 
 class StreamObject(DictionaryObject):
+    # the data as read, and the RC4 key to decrypt it with when it is first
+    # used; see setEncryptionKey
+    _rawData = None
+    _encryptionKey = None
+
     def __init__(self):
         self._data = None
         self.decodedSelf = None
 
+    def _getRawData(self):
+        if self._encryptionKey is not None:
+            self._rawData = RC4_encrypt(self._encryptionKey, self._rawData)
+            self._encryptionKey = None
+        return self._rawData
+
+    def _setRawData(self, data):
+        self._rawData = data
+        self._encryptionKey = None
+
+    _data = property(_getRawData, _setRawData)
+
+    def setEncryptionKey(self, key):
+        """
+        Marks the data as encrypted with the RC4 *key*.  It is decrypted the
+        first time it is used, so that streams that are never read are never
+        decrypted.
+        """
+        if self._rawData:
+            self._encryptionKey = key
+
     def writeToStream(self, stream, encryption_key):
         self[NameObject("/Length")] = NumberObject(len(self._data))
         DictionaryObject.writeToStream(self, stream, encryption_key)
@@ -803,20 +1074,44 @@ class StreamObject(DictionaryObject):
     initializeFromDictionary = staticmethod(initializeFromDictionary)
 
     def flateEncode(self):
-        if "/Filter" in self:
-            f = self["/Filter"]
-            if isinstance(f, ArrayObject):
-                f.insert(0, NameObject("/FlateDecode"))
-            else:
-                newf = ArrayObject()
-                newf.append(NameObject("/FlateDecode"))
-                newf.append(f)
-                f = newf
+        return self._encodeWith("/FlateDecode")
+
+    def asciiEncode(self, ascii85=True):
+        """
+        Returns a copy of this stream with its data encoded in printable
+        ASCII characters, for 7-bit channels.
+
+        :param bool ascii85: use /ASCII85Decode, which expands the data by
+            a quarter; if ``False``, use /ASCIIHexDecode, which doubles it.
+        :rtype: :class:`EncodedStreamObject`
+        """
+        if ascii85:
+            return self._encodeWith("/ASCII85Decode")
+        return self._encodeWith("/ASCIIHexDecode")
+
+    def _encodeWith(self, filterName):
+        # Returns a copy of this stream with the filter *filterName* put in
+        # front of its filters and the data encoded with it.
+        f = self.get("/Filter")
+        parms = self.get("/DecodeParms")
+        if f is None:
+            f = NameObject(filterName)
         else:
-            f = NameObject("/FlateDecode")
+            if not isinstance(f, ArrayObject):
+                f = ArrayObject([f])
+            f = ArrayObject([NameObject(filterName)] + f)
+            if parms is not None:
+                if not isinstance(parms, ArrayObject):
+                    parms = ArrayObject([parms])
+                parms = ArrayObject([NullObject()] + parms)
         retval = EncodedStreamObject()
+        for key, value in list(self.items()):
+            if key not in ("/Filter", "/DecodeParms", "/Length"):
+                retval[key] = value
         retval[NameObject("/Filter")] = f
-        retval._data = filters.FlateDecode.encode(self._data)
+        if parms is not None:
+            retval[NameObject("/DecodeParms")] = parms
+        retval._data = filters.getEncoder(filterName)(self._data)
         return retval
 
 
@@ -829,6 +1124,12 @@ class DecodedStreamObject(StreamObject):
 
 
 class EncodedStreamObject(StreamObject):
+    # (cache, key) of the reader cache entry holding this stream, so that
+    # the cache can account for the decoded data; see PdfFileReader.
+    cacheEntry = None
+    # the reader's filters.DecodeLimits, if it has any
+    decodeLimits = None
+
     def __init__(self):
         self.decodedSelf = None
 
@@ -838,14 +1139,26 @@ class EncodedStreamObject(StreamObject):
             return self.decodedSelf.getData()
         else:
             # create decoded object
-            decoded = DecodedStreamObject()
-
-            decoded._data = filters.decodeStreamData(self)
-            for key, value in list(self.items()):
-                if not key in ("/Length", "/Filter", "/DecodeParms"):
-                    decoded[key] = value
-            self.decodedSelf = decoded
-            return decoded._data
+            return self.setDecodedData(filters.decodeStreamData(self, self.decodeLimits))
+
+    def setDecodedData(self, data):
+        """
+        Caches *data* as the decoded data of this stream, for when it was
+        decoded by other means than :meth:`getData`, such as
+        :meth:`PdfFileReader.prefetch_streams()<PyPDF2.PdfFileReader.prefetch_streams>`.
+
+        :return: *data*.
+        """
+        decoded = DecodedStreamObject()
+        decoded._data = data
+        for key, value in list(self.items()):
+            if not key in ("/Length", "/Filter", "/DecodeParms"):
+                decoded[key] = value
+        self.decodedSelf = decoded
+        if self.cacheEntry is not None:
+            cache, key = self.cacheEntry
+            cache.resize(key)
+        return data
 
     def setData(self, data):
         raise utils.PdfReadError("Creating EncodedStreamObject is not currently supported")
@@ -1162,25 +1475,11 @@ class Bookmark(Destination):
 
 
 def encode_pdfdocencoding(unicode_string):
-    retval = b_('')
-    for c in unicode_string:
-        try:
-            retval += b_(chr(_pdfDocEncoding_rev[c]))
-        except KeyError:
-            raise UnicodeEncodeError("pdfdocencoding", c, -1, -1,
-                    "does not exist in translation table")
-    return retval
+    return codecs.charmap_encode(unicode_string, "strict", _pdfDocEncodingMap)[0]
 
 
 def decode_pdfdocencoding(byte_array):
-    retval = u_('')
-    for b in byte_array:
-        c = _pdfDocEncoding[ord_(b)]
-        if c == u_('\u0000'):
-            raise UnicodeDecodeError("pdfdocencoding", utils.barray(b), -1, -1,
-                    "does not exist in translation table")
-        retval += c
-    return retval
+    return codecs.charmap_decode(byte_array, "strict", _pdfDocDecodingTable)[0]
 
 _pdfDocEncoding = (
   u_('\u0000'), u_('\u0000'), u_('\u0000'), u_('\u0000'), u_('\u0000'), u_('\u0000'), u_('\u0000'), u_('\u0000'),
@@ -1226,3 +1525,9 @@ for i in range(256):
         continue
     assert char not in _pdfDocEncoding_rev
     _pdfDocEncoding_rev[char] = i
+
+# The same tables in the form used by the charmap codec, which encodes and
+# decodes a whole string at a time; U+FFFE marks undefined bytes.
+_pdfDocDecodingTable = u_('').join(
+    char if char != u_("\u0000") else u_("\ufffe") for char in _pdfDocEncoding)
+_pdfDocEncodingMap = dict((ord(char), i) for char, i in _pdfDocEncoding_rev.items())
@@ -0,0 +1,203 @@
+"""
+A persistent cache of what :class:`PdfFileReader<PyPDF2.PdfFileReader>`
+learns about a file when it opens it: the merged cross-reference table, the
+trailer, the offset tables of the object streams and the object of every
+page.  A reader opened with ``index_cache`` loads it from a small sidecar
+file instead of parsing the cross-reference sections and the page tree
+again, as long as the file has not changed.
+
+The cache file is binary: a header with the key (file size, modification
+time and a hash of the file), followed by sections of little-endian
+integers.
+"""
+
+import hashlib
+import os
+import struct
+
+from . import utils
+
+MAGIC = utils.b_("PyPDF2ix")
+VERSION = 1
+# bytes of the head and tail of a file that go into the hash; the tail
+# holds the trailer, which any update of the file changes
+HEAD_SIZE = 4096
+TAIL_SIZE = 65536
+# bytes read at a time when hashing the whole of a file
+CHUNK_SIZE = 1 << 20
+
+
+def fileKey(stream, path=None):
+    """
+    Computes the key that a cache file must match to be used for the file
+    that *stream* reads.
+
+    :param stream: the seekable binary stream the file is read from.
+    :param str path: the path of the file, if any, whose modification time
+        is part of the key.  Without one, nothing tells a rewrite of the
+        middle of the file apart, so the whole of it is hashed instead of
+        its head and tail.
+    :return: the size, the modification time in nanoseconds (0 if there is
+        no path) and the SHA-1 digest of the file.
+    :rtype: tuple
+    """
+    stream.seek(0, 2)
+    size = stream.tell()
+    mtime = 0
+    if path is not None:
+        st = os.stat(path)
+        mtime = getattr(st, "st_mtime_ns", None)
+        if mtime is None:
+            mtime = int(st.st_mtime * 1000000000)
+    digest = hashlib.sha1()
+    stream.seek(0, 0)
+    if path is None:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    else:
+        digest.update(stream.read(min(size, HEAD_SIZE)))
+        stream.seek(max(0, size - TAIL_SIZE), 0)
+        digest.update(stream.read(TAIL_SIZE))
+    return size, mtime, digest.digest()
+
+
+class _Writer(object):
+    def __init__(self):
+        self.chunks = []
+
+    def ints(self, values):
+        values = list(values)
+        self.chunks.append(struct.pack("<I%dq" % len(values), len(values), *values))
+
+    def data(self, data):
+        self.chunks.append(struct.pack("<I", len(data)))
+        self.chunks.append(data)
+
+
+class _Reader(object):
+    def __init__(self, buf, pos):
+        self.buf = buf
+        self.pos = pos
+
+    def _count(self):
+        count, = struct.unpack_from("<I", self.buf, self.pos)
+        self.pos += 4
+        return count
+
+    def ints(self):
+        count = self._count()
+        values = struct.unpack_from("<%dq" % count, self.buf, self.pos)
+        self.pos += 8 * count
+        return values
+
+    def data(self):
+        count = self._count()
+        data = self.buf[self.pos:self.pos + count]
+        if len(data) != count:
+            raise ValueError("truncated index")
+        self.pos += count
+        return data
+
+
+def save(path, key, index):
+    """
+    Writes *index* to the cache file at *path*.  The file is replaced in
+    one step, so that a reader never sees it half written.
+
+    :param str path: path of the cache file.
+    :param tuple key: the :func:`fileKey` of the PDF file.
+    :param dict index: the reader's index, with the keys ``trailer`` (the
+        trailer in PDF syntax), ``startxref``, ``xrefIndex``, ``sections``
+        (offset to /Prev, or None, for each cross-reference section),
+        ``xref``, ``xref_objStm``, ``objStmIndex`` and ``pages`` (a list of
+        (object number, generation) pairs, or None), in the form the reader
+        keeps them.
+    """
+    size, mtime, digest = key
+    out = _Writer()
+    out.chunks.append(MAGIC + struct.pack("<IQQ", VERSION, size, mtime) + digest)
+    out.data(index["trailer"])
+    out.ints([index["startxref"], index["xrefIndex"]])
+    sections = sorted(index["sections"].items())
+    out.ints(offset for offset, prev in sections)
+    out.ints(-1 if prev is None else prev for offset, prev in sections)
+    xref = sorted(index["xref"].items())
+    out.ints(gen for gen, table in xref)
+    for gen, table in xref:
+        out.ints(table.keys())
+        out.ints(table.values())
+    objStm = index["xref_objStm"]
+    out.ints(objStm.keys())
+    out.ints(stmnum for stmnum, idx in objStm.values())
+    out.ints(idx for stmnum, idx in objStm.values())
+    objStmIndex = sorted(index["objStmIndex"].items())
+    out.ints(stmnum for stmnum, tables in objStmIndex)
+    for stmnum, (objnums, offsets) in objStmIndex:
+        out.ints(objnums)
+        out.ints(offsets)
+    pages = index["pages"]
+    out.ints([0 if pages is None else 1])
+    out.ints(num for num, gen in pages or ())
+    out.ints(gen for num, gen in pages or ())
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        with open(tmp, "wb") as f:
+            f.write(utils.b_("").join(out.chunks))
+        if hasattr(os, "replace"):
+            os.replace(tmp, path)
+        else:
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp, path)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load(path, key):
+    """
+    Reads the cache file at *path*.
+
+    :param str path: path of the cache file.
+    :param tuple key: the :func:`fileKey` of the PDF file.
+    :return: the index, as passed to :func:`save`, or ``None`` if there is
+        no cache file, it is damaged, or it was written for another version
+        of the file.
+    :rtype: dict
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except EnvironmentError:
+        return None
+    header = len(MAGIC) + struct.calcsize("<IQQ")
+    if data[:len(MAGIC)] != MAGIC or len(data) < header + 20:
+        return None
+    version, size, mtime = struct.unpack_from("<IQQ", data, len(MAGIC))
+    if version != VERSION or (size, mtime, data[header:header + 20]) != key:
+        return None
+    try:
+        src = _Reader(data, header + 20)
+        index = {"trailer": src.data()}
+        index["startxref"], index["xrefIndex"] = src.ints()
+        offsets, prevs = src.ints(), src.ints()
+        index["sections"] = dict((offset, None if prev < 0 else prev)
+                                 for offset, prev in zip(offsets, prevs))
+        index["xref"] = {}
+        for gen in src.ints():
+            index["xref"][gen] = dict(zip(src.ints(), src.ints()))
+        nums, stmnums, idxs = src.ints(), src.ints(), src.ints()
+        index["xref_objStm"] = dict(zip(nums, zip(stmnums, idxs)))
+        index["objStmIndex"] = {}
+        for stmnum in src.ints():
+            index["objStmIndex"][stmnum] = (src.ints(), src.ints())
+        hasPages, = src.ints()
+        nums, gens = src.ints(), src.ints()
+        index["pages"] = list(zip(nums, gens)) if hasPages else None
+    except (struct.error, ValueError):
+        return None
+    return index
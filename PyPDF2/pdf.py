@@ -44,6 +44,10 @@ __maintainer_email = "PyPDF2@phaseit.net"
 
 import string
 import math
+import os
+import array
+import re
+import bisect
 import struct
 import sys
 import uuid
@@ -59,6 +63,8 @@ else:
     from io import BytesIO
 
 from . import filters
+from . import indexcache
+from . import sources
 from . import utils
 import warnings
 import codecs
@@ -76,6 +82,16 @@ else:
     from hashlib import md5
 import uuid
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
 
 class PdfFileWriter(object):
     """
@@ -443,13 +459,19 @@ class PdfFileWriter(object):
         self._encrypt = self._addObject(encrypt)
         self._encrypt_key = key
 
-    def write(self, stream):
+    def write(self, stream, ascii_filter=None):
         """
         Writes the collection of pages added to this object out as a PDF file.
 
         :param stream: An object to write the file to.  The object must support
             the write method and the tell method, similar to a file object.
+        :param str ascii_filter: ``"/ASCII85Decode"`` or
+            ``"/ASCIIHexDecode"`` to encode the data of every stream with
+            that filter, so that the file is 7-bit clean (unless it is
+            encrypted).  Defaults to ``None``, which writes stream data as is.
         """
+        if ascii_filter not in (None, "/ASCII85Decode", "/ASCIIHexDecode"):
+            raise ValueError("unsupported ASCII filter %s" % ascii_filter)
         if hasattr(stream, 'mode') and 'b' not in stream.mode:
             warnings.warn("File <%s> to write to is not in binary mode. It may not be written to correctly." % stream.name)
         debug = False
@@ -486,10 +508,14 @@ class PdfFileWriter(object):
         # Begin writing:
         object_positions = []
         stream.write(self._header + b_("\n"))
-        stream.write(b_("%\xE2\xE3\xCF\xD3\n"))
+        if ascii_filter is None:
+            # marks the file as binary
+            stream.write(b_("%\xE2\xE3\xCF\xD3\n"))
         for i in range(len(self._objects)):
             idnum = (i + 1)
             obj = self._objects[i]
+            if ascii_filter is not None and isinstance(obj, StreamObject):
+                obj = obj.asciiEncode(ascii_filter == "/ASCII85Decode")
             object_positions.append(stream.tell())
             stream.write(b_(str(idnum) + " 0 obj\n"))
             key = None
@@ -1113,7 +1139,12 @@ class PdfFileReader(object):
 
     :param stream: A File object or an object that supports the standard read
         and seek methods similar to a File object. Could also be a
-        string representing a path to a PDF file.
+        string representing a path to a PDF file, which is memory-mapped
+        rather than read into memory, or a ``bytes``, ``bytearray``,
+        ``memoryview`` or ``mmap`` object holding the PDF file's contents,
+        which is read in place without being copied, or a
+        :class:`ByteSource<PyPDF2.sources.ByteSource>`, of which only the
+        parts that are used are read.
     :param bool strict: Determines whether user should be warned of all
         problems and also causes some correctable problems to be fatal.
         Defaults to ``True``.
@@ -1122,8 +1153,36 @@ class PdfFileReader(object):
     :param bool overwriteWarnings: Determines whether to override Python's
         ``warnings.py`` module with a custom implementation (defaults to
         ``True``).
+    :param int cache_bytes: Approximate number of bytes of parsed objects and
+        decoded stream data to keep cached.  When exceeded, the least recently
+        used objects are dropped and read again from the file when next
+        needed.  The document catalog and page tree nodes are always kept (see
+        :meth:`pinObject()<PdfFileReader.pinObject>`).  Defaults to ``None``,
+        which caches every object read.
+    :param index_cache: Path of a file to keep an index of the PDF file in
+        (see :mod:`indexcache<PyPDF2.indexcache>`), or ``True`` for a file
+        named after the PDF file with ``.index`` appended.  If the index
+        matches the PDF file, the cross-reference sections and the page
+        tree are not read; otherwise they are, in full, and the index is
+        written.  Defaults to ``None``, which uses no index.
+    :param bool fast_first_page: If the file is linearized ("fast web
+        view"), read only the cross-reference section of its first page
+        when opening it, so that the first page, the page count and the
+        document information are available without reading the rest of the
+        file.  The remaining cross-reference sections are read when an
+        object outside the first page is needed.  Defaults to ``False``.
+    :param int max_stream_size: The most bytes that the data of a single
+        stream may decode to.  Decoding a stream that expands further raises
+        :class:`PdfSizeLimitError<PyPDF2.utils.PdfSizeLimitError>` as soon as
+        the limit is crossed, which protects against "decompression bombs".
+        Defaults to ``None``, which means no limit.
+    :param int max_decoded_size: The most bytes that all streams of the
+        document may decode to in total, counting each time a stream is
+        decoded.  Defaults to ``None``, which means no limit.
     """
-    def __init__(self, stream, strict=True, warndest = None, overwriteWarnings = True):
+    def __init__(self, stream, strict=True, warndest = None, overwriteWarnings = True,
+                 cache_bytes=None, fast_first_page=False, index_cache=None,
+                 max_stream_size=None, max_decoded_size=None):
         if overwriteWarnings:
             # have to dynamically override the default showwarning since there are no
             # public methods that specify the 'file' parameter
@@ -1137,19 +1196,39 @@ class PdfFileReader(object):
             warnings.showwarning = _showwarning
         self.strict = strict
         self.flattenedPages = None
-        self.resolvedObjects = {}
+        self._pageCache = {} # map page number to PageObject, see _getPageLazily
+        self._pageTreeIndex = {} # map /Pages node (generation, idnum) to kid page counts
+        if cache_bytes is None:
+            self.resolvedObjects = {}
+        else:
+            self.resolvedObjects = utils.ObjectCache(cache_bytes,
+                    _estimateObjectSize, _releaseObject)
+        self._objStmIndex = {} # map object stream number to its header, see _getObjectStreamIndex
         self.xrefIndex = 0
         self._pageId2Num = None # map page IndirectRef number to Page Number
+        self._fastFirstPage = fast_first_page
+        self._pageRefs = None # page objects listed by the index cache
+        self._override_encryption = False
+        self._objectKeys = {} # (idnum, generation) -> key, see _getObjectKey
+        self._passwordResults = {} # password -> (decrypt() result, key)
+        if max_stream_size is not None or max_decoded_size is not None:
+            self._decodeLimits = filters.DecodeLimits(max_stream_size,
+                                                      max_decoded_size)
+        else:
+            self._decodeLimits = None
         if hasattr(stream, 'mode') and 'b' not in stream.mode:
             warnings.warn("PdfFileReader stream/file object is not in binary mode. It may not be read correctly.", utils.PdfReadWarning)
-        if isString(stream):
-            fileobj = open(stream, 'rb')
-            stream = BytesIO(b_(fileobj.read()))
-            fileobj.close()
-        self.read(stream)
+        path = stream if isString(stream) else getattr(stream, "name", None)
+        stream = sources.openSource(stream)
+        if index_cache:
+            if not (isString(path) and os.path.isfile(path)):
+                path = None
+            self._readWithIndex(stream, path, index_cache)
+        else:
+            self.read(stream)
         self.stream = stream
-
-        self._override_encryption = False
+        if "/Root" in self.trailer:
+            self.pinObject(self.trailer.raw_get("/Root"))
 
     def getDocumentInfo(self):
         """
@@ -1209,14 +1288,23 @@ class PdfFileReader(object):
         if self.isEncrypted:
             try:
                 self._override_encryption = True
-                self.decrypt('')
+                if not hasattr(self, '_decryption_key'):
+                    self.decrypt('')
                 return self.trailer["/Root"]["/Pages"]["/Count"]
             except:
                 raise utils.PdfReadError("File has not been decrypted")
             finally:
                 self._override_encryption = False
         else:
+            if self.flattenedPages == None and self._pageRefs != None:
+                return len(self._pageRefs)
             if self.flattenedPages == None:
+                if self.linearization != None and self._pendingXref != None:
+                    # the page tree is likely not in the first-page section
+                    return self.linearization["/N"]
+                count = self._getPageTreeCount()
+                if count != None:
+                    return count
                 self._flatten()
             return len(self.flattenedPages)
 
@@ -1237,10 +1325,182 @@ class PdfFileReader(object):
         """
         ## ensure that we're not trying to access an encrypted PDF
         #assert not self.trailer.has_key("/Encrypt")
+        if pageNumber == 0 and self.linearization != None and \
+                self._pendingXref != None:
+            return self._getLinearizedFirstPage()
+        if self.flattenedPages == None and self._pageRefs != None:
+            ref = self._pageRefs[pageNumber]
+            if pageNumber < 0:
+                pageNumber += len(self._pageRefs)
+            return self._getPageByReference(pageNumber, ref)
         if self.flattenedPages == None:
+            page = self._getPageLazily(pageNumber)
+            if page != None:
+                return page
             self._flatten()
         return self.flattenedPages[pageNumber]
 
+    def prefetch_streams(self, pages=None, kinds=("content", "image", "font"), workers=None):
+        """
+        Decodes the streams that pages use, several at a time in a pool of
+        threads, and caches the decoded data in the stream objects, so that
+        reading the pages afterwards finds it ready.  ``zlib`` releases the
+        GIL while it inflates, so the decoding of a large document is spread
+        over several cores.
+
+        Streams that cannot be decoded are left alone; using them raises the
+        error as usual.  With ``max_decoded_size``, the threads charge the
+        data to the reader's total as they decode it, so together they stop
+        as soon as the limit is exceeded.
+
+        :param pages: the numbers of the pages (beginning at zero), or
+            ``None`` for all pages.
+        :param kinds: the kinds of streams to decode: ``"content"`` for the
+            content streams of the pages and their form XObjects,
+            ``"image"`` for image XObjects and their masks, and ``"font"``
+            for embedded font programs, /ToUnicode maps and the glyph
+            procedures of Type 3 fonts.
+        :param int workers: the number of threads; defaults to the number of
+            CPUs.  Without ``concurrent.futures``, the streams are decoded
+            one after another.
+        :return: the number of streams decoded.
+        :rtype: int
+        :raises PdfSizeLimitError: if the streams decode to more than the
+            ``max_decoded_size`` of the reader.
+        """
+        kinds = frozenset(kinds)
+        for kind in kinds:
+            if kind not in ("content", "image", "font"):
+                raise ValueError("unknown kind of stream %r" % (kind,))
+        if pages is None:
+            pages = range(self.getNumPages())
+        streams = []
+        seen = {} # id -> object, of the objects visited
+        for pageNumber in pages:
+            page = self.getPage(pageNumber)
+            if "content" in kinds:
+                self._collectStream(page.get("/Contents"), streams, seen)
+            self._collectResourceStreams(page.get("/Resources"), kinds, streams, seen)
+
+        # the decoders are created here, since that can read objects, which
+        # only the worker threads' own streams are safe from
+        limits = self._decodeLimits
+        limit = limits.maxStreamSize if limits is not None else None
+        jobs = []
+        for stream in streams:
+            if not vars(stream).get("_rawData"):
+                continue
+            try:
+                jobs.append((stream, filters.getStreamDecoder(stream, limit, limits)))
+            except NotImplementedError:
+                continue
+        if workers is None:
+            workers = getattr(os, "cpu_count", lambda: None)() or 1
+        if ThreadPoolExecutor is None or workers <= 1 or len(jobs) <= 1:
+            results = [(stream, _decodeJob(stream, decoder)) for stream, decoder in jobs]
+            return self._cachePrefetched(results)
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [executor.submit(_decodeJob, stream, decoder)
+                       for stream, decoder in jobs]
+            results = ((stream, future.result())
+                       for (stream, decoder), future in zip(jobs, futures))
+            try:
+                return self._cachePrefetched(results)
+            except utils.PdfSizeLimitError:
+                # the budget is spent; the jobs not started yet would only
+                # fail in turn
+                for future in futures:
+                    future.cancel()
+                raise
+
+    prefetchStreams = prefetch_streams
+    """
+    Alias of :meth:`prefetch_streams()<PdfFileReader.prefetch_streams>`.
+    """
+
+    def _cachePrefetched(self, results):
+        # Stores the decoded data of prefetch_streams in the streams; the
+        # decoders have already charged it to the reader's limits.
+        count = 0
+        for stream, data in results:
+            if data is None:
+                continue
+            stream.setDecodedData(data)
+            count += 1
+        return count
+
+    def _collectStream(self, obj, streams, seen):
+        # Adds obj, or the streams of an array of them, to streams if they
+        # are not decoded yet.
+        if obj is None:
+            return
+        obj = obj.getObject()
+        if id(obj) in seen:
+            return
+        seen[id(obj)] = obj
+        if isinstance(obj, ArrayObject):
+            for item in obj:
+                self._collectStream(item, streams, seen)
+        elif isinstance(obj, EncodedStreamObject) and obj.decodedSelf is None:
+            streams.append(obj)
+
+    def _collectResourceStreams(self, resources, kinds, streams, seen):
+        # Adds the streams of the given kinds that a /Resources dictionary
+        # uses to streams, following form XObjects and Type 3 fonts into
+        # their own resources.
+        if resources is None:
+            return
+        resources = resources.getObject()
+        if not isinstance(resources, DictionaryObject) or id(resources) in seen:
+            return
+        seen[id(resources)] = resources
+        xObjects = resources.get("/XObject")
+        xObjects = xObjects.getObject() if xObjects is not None else {}
+        for xObject in list(xObjects.values()):
+            xObject = xObject.getObject()
+            if not isinstance(xObject, StreamObject):
+                continue
+            subtype = xObject.get("/Subtype")
+            if subtype == "/Image":
+                if "image" in kinds:
+                    self._collectStream(xObject, streams, seen)
+                    for key in ("/SMask", "/Mask"):
+                        mask = xObject.get(key)
+                        if mask is not None and isinstance(mask.getObject(), StreamObject):
+                            self._collectStream(mask, streams, seen)
+            elif subtype == "/Form":
+                if "content" in kinds:
+                    self._collectStream(xObject, streams, seen)
+                self._collectResourceStreams(xObject.get("/Resources"), kinds, streams, seen)
+        fonts = resources.get("/Font")
+        fonts = fonts.getObject() if fonts is not None else {}
+        for font in list(fonts.values()):
+            self._collectFontStreams(font, kinds, streams, seen)
+
+    def _collectFontStreams(self, font, kinds, streams, seen):
+        # Adds the streams of a font dictionary to streams, as
+        # _collectResourceStreams does.
+        font = font.getObject()
+        if not isinstance(font, DictionaryObject) or id(font) in seen:
+            return
+        seen[id(font)] = font
+        if "font" in kinds:
+            self._collectStream(font.get("/ToUnicode"), streams, seen)
+            descriptor = font.get("/FontDescriptor")
+            descriptor = descriptor.getObject() if descriptor is not None else None
+            if isinstance(descriptor, DictionaryObject):
+                for key in ("/FontFile", "/FontFile2", "/FontFile3"):
+                    self._collectStream(descriptor.get(key), streams, seen)
+            charProcs = font.get("/CharProcs")
+            charProcs = charProcs.getObject() if charProcs is not None else {}
+            for charProc in list(charProcs.values()):
+                self._collectStream(charProc, streams, seen)
+        descendants = font.get("/DescendantFonts")
+        descendants = descendants.getObject() if descendants is not None else ()
+        for descendant in descendants:
+            self._collectFontStreams(descendant, kinds, streams, seen)
+        self._collectResourceStreams(font.get("/Resources"), kinds, streams, seen)
+
     ########################################--tables--########################################
 
     def is_table_without_structure(self):
@@ -1602,6 +1862,7 @@ class PdfFileReader(object):
         if pages == None:
             self.flattenedPages = []
             catalog = self.trailer["/Root"].getObject()
+            self.pinObject(catalog.raw_get("/Pages"))
             pages = catalog["/Pages"].getObject()
 
         t = "/Pages"
@@ -1609,6 +1870,7 @@ class PdfFileReader(object):
             t = pages["/Type"]
 
         if t == "/Pages":
+            self.pinObject(indirectRef)
             for attr in inheritablePageAttributes:
                 if attr in pages:
                     inherit[attr] = pages[attr]
@@ -1623,62 +1885,202 @@ class PdfFileReader(object):
                 # parent's value:
                 if attr not in pages:
                     pages[attr] = value
-            pageObj = PageObject(self, indirectRef)
-            pageObj.update(pages)
+            pageObj = self._pageCache.get(len(self.flattenedPages))
+            # a page found lazily is reused, unless a wrong /Count made the
+            # lookup land on another page
+            if pageObj == None or pageObj.indirectRef != indirectRef:
+                pageObj = PageObject(self, indirectRef)
+                pageObj.update(pages)
             self.flattenedPages.append(pageObj)
 
-    def _getObjectFromStream(self, indirectReference):
-        # indirect reference to object in object stream
-        # read the entire object stream into memory
-        debug = False
-        stmnum, idx = self.xref_objStm[indirectReference.idnum]
-        if debug: print(("Here1: %s %s"%(stmnum, idx)))
+    def _getPageTreeCount(self):
+        # The number of pages according to the /Count of the root of the
+        # page tree, or None if it is missing, unusable or does not match
+        # the /Count entries of the root's kids.
+        try:
+            ref = self.trailer["/Root"].getObject().raw_get("/Pages")
+            kids, ends = self._getPageTreeKids(ref, ref.getObject())
+        except (KeyError, TypeError, AttributeError):
+            return None
+        except ValueError as e:
+            warnings.warn("Inconsistent page tree (%s); flattening it instead" % e,
+                          utils.PdfReadWarning)
+            return None
+        return ends[-1] if ends else 0
+
+    def _getPageTreeKids(self, ref, node):
+        # Returns the kids of the /Pages node *node* along with the running
+        # total of pages below them, taken from the /Count of intermediate
+        # nodes, so that a page number maps to a kid by bisection.  Kids
+        # that are neither pages nor page tree nodes are skipped, as in
+        # _flatten.  Raises KeyError or ValueError if a /Count is unusable or
+        # the kids' pages do not add up to the node's own /Count.  Only the
+        # nodes that are looked at are checked, so a wrong /Count elsewhere
+        # in the tree is only noticed when a lookup passes through it.
+        key = None
+        if isinstance(ref, IndirectObject):
+            key = (ref.generation, ref.idnum)
+            if key in self._pageTreeIndex:
+                return self._pageTreeIndex[key]
+        kids, ends = [], []
+        total = 0
+        for kid in node["/Kids"]:
+            kidObj = kid.getObject()
+            t = kidObj["/Type"] if "/Type" in kidObj else "/Pages"
+            if t == "/Page":
+                total += 1
+            elif t == "/Pages":
+                count = kidObj["/Count"]
+                if not utils.isInt(count) or count < 0:
+                    raise ValueError("invalid /Count %r" % count)
+                total += count
+            else:
+                continue
+            kids.append(kid)
+            ends.append(total)
+        count = node["/Count"]
+        if count != total:
+            raise ValueError("/Count %r, but %d pages below the node" % (count, total))
+        if key != None:
+            self._pageTreeIndex[key] = (kids, ends)
+        return kids, ends
+
+    def _getPageLazily(self, pageNumber):
+        # Descends the page tree to page *pageNumber* without flattening it,
+        # using the /Count entries of the intermediate nodes.  Inheritable
+        # attributes are copied to the page unresolved, so that they are only
+        # read when used.  Returns None if the page tree's /Count entries are
+        # missing or inconsistent, in which case the caller has to flatten.
+        if pageNumber in self._pageCache:
+            return self._pageCache[pageNumber]
+        numPages = self._getPageTreeCount()
+        if numPages == None:
+            return None
+        index = pageNumber
+        if index < 0:
+            index += numPages
+        if index < 0 or index >= numPages:
+            raise IndexError("list index out of range")
+        if index in self._pageCache:
+            return self._pageCache[index]
+        inheritablePageAttributes = (
+            NameObject("/Resources"), NameObject("/MediaBox"),
+            NameObject("/CropBox"), NameObject("/Rotate")
+            )
+        inherit = {}
+        visited = set()
+        ref = self.trailer["/Root"].getObject().raw_get("/Pages")
+        node = ref.getObject()
+        remaining = index
+        try:
+            while True:
+                t = node["/Type"] if "/Type" in node else "/Pages"
+                if t == "/Page" and remaining == 0:
+                    break
+                if t != "/Pages" or id(node) in visited:
+                    raise ValueError("page tree node of type %s" % t)
+                visited.add(id(node))
+                self.pinObject(ref)
+                for attr in inheritablePageAttributes:
+                    if attr in node:
+                        inherit[attr] = node.raw_get(attr)
+                kids, ends = self._getPageTreeKids(ref, node)
+                i = bisect.bisect_right(ends, remaining)
+                if i >= len(kids):
+                    raise ValueError("page tree has fewer pages than /Count")
+                if i > 0:
+                    remaining -= ends[i - 1]
+                ref = kids[i]
+                node = ref.getObject()
+        except (KeyError, ValueError) as e:
+            warnings.warn("Inconsistent page tree (%s); flattening it instead" % e,
+                          utils.PdfReadWarning)
+            return None
+        pageObj = PageObject(self, ref if isinstance(ref, IndirectObject) else None)
+        pageObj.update(node)
+        for attr, value in list(inherit.items()):
+            # if the page has it's own value, it does not inherit the
+            # parent's value:
+            if attr not in pageObj:
+                pageObj[attr] = value
+        self._pageCache[index] = pageObj
+        return pageObj
+
+    def _getObjectStreamIndex(self, stmnum):
+        # Returns the object stream *stmnum* with the object numbers and
+        # offsets (relative to /First) listed in its header.  The header is
+        # parsed once; later lookups go straight to the object's offset.
         objStm = IndirectObject(stmnum, 0, self).getObject()
-        if debug: print(("Here2: objStm=%s.. stmnum=%s data=%s"%(objStm, stmnum, objStm.getData())))
         # This is an xref to a stream, so its type better be a stream
         assert objStm['/Type'] == '/ObjStm'
-        # /N is the number of indirect objects in the stream
-        assert idx < objStm['/N']
-        streamData = BytesIO(b_(objStm.getData()))
-        for i in range(objStm['/N']):
-            readNonWhitespace(streamData)
-            streamData.seek(-1, 1)
-            objnum = NumberObject.readFromStream(streamData)
-            readNonWhitespace(streamData)
-            streamData.seek(-1, 1)
-            offset = NumberObject.readFromStream(streamData)
-            readNonWhitespace(streamData)
-            streamData.seek(-1, 1)
-            if objnum != indirectReference.idnum:
-                # We're only interested in one object
-                continue
-            if self.strict and idx != i:
-                raise utils.PdfReadError("Object is in wrong index.")
-            streamData.seek(objStm['/First']+offset, 0)
-            if debug:
-                pos = streamData.tell()
-                streamData.seek(0, 0)
-                lines = streamData.readlines()
-                for i in range(0, len(lines)):
-                    print((lines[i]))
-                streamData.seek(pos, 0)
+        index = self._objStmIndex.get(stmnum)
+        if index == None:
+            # /N is the number of indirect objects in the stream
+            n = objStm['/N']
+            header = objStm.getData()[:objStm['/First']].split()
             try:
-                obj = readObject(streamData, self)
-            except utils.PdfStreamError as e:
-                # Stream object cannot be read. Normally, a critical error, but
-                # Adobe Reader doesn't complain, so continue (in strict mode?)
-                e = sys.exc_info()[1]
-                warnings.warn("Invalid stream (index %d) within object %d %d: %s" % \
-                      (i, indirectReference.idnum, indirectReference.generation, e), utils.PdfReadWarning)
+                header = [int(x) for x in header[:2 * n]]
+            except ValueError:
+                raise utils.PdfReadError("Invalid header in object stream %d" % stmnum)
+            index = (array.array("l", header[0::2]), array.array("l", header[1::2]))
+            self._objStmIndex[stmnum] = index
+        return objStm, index[0], index[1]
+
+    def _readObjectFromStream(self, objStm, streamData, offset, i, idnum):
+        streamData.seek(objStm['/First'] + offset, 0)
+        try:
+            return readObject(streamData, self)
+        except utils.PdfStreamError as e:
+            # Stream object cannot be read. Normally, a critical error, but
+            # Adobe Reader doesn't complain, so continue (in strict mode?)
+            e = sys.exc_info()[1]
+            warnings.warn("Invalid stream (index %d) within object %d %d: %s" % \
+                  (i, idnum, 0, e), utils.PdfReadWarning)
+
+            if self.strict:
+                raise utils.PdfReadError("Can't read object stream: %s"%e)
+            # Replace with null. Hopefully it's nothing important.
+            return NullObject()
 
-                if self.strict:
-                    raise utils.PdfReadError("Can't read object stream: %s"%e)
-                # Replace with null. Hopefully it's nothing important.
-                obj = NullObject()
-            return obj
+    def _getObjectFromStream(self, indirectReference):
+        # indirect reference to object in object stream
+        stmnum, idx = self.xref_objStm[indirectReference.idnum]
+        objStm, objnums, offsets = self._getObjectStreamIndex(stmnum)
+        i = idx
+        if idx >= len(objnums) or objnums[idx] != indirectReference.idnum:
+            if indirectReference.idnum not in objnums:
+                if self.strict: raise utils.PdfReadError("This is a fatal error in strict mode.")
+                return NullObject()
+            i = objnums.index(indirectReference.idnum)
+            if self.strict:
+                raise utils.PdfReadError("Object is in wrong index.")
+        streamData = sources.BufferStream(b_(objStm.getData()))
+        return self._readObjectFromStream(objStm, streamData, offsets[i], i,
+                                          indirectReference.idnum)
 
-        if self.strict: raise utils.PdfReadError("This is a fatal error in strict mode.")
-        return NullObject()
+    def loadObjectStream(self, stmnum):
+        """
+        Reads every object stored in the object stream with object number
+        *stmnum* in one pass and adds them to the reader's object cache, so
+        that resolving them later does not touch the stream again.  Objects
+        that a later update of the file has replaced are skipped.
+
+        :param int stmnum: object number of the ``/ObjStm`` stream.
+        :return: references to the objects that were loaded.
+        :rtype: list of :class:`IndirectObject<PyPDF2.generic.IndirectObject>`
+        """
+        objStm, objnums, offsets = self._getObjectStreamIndex(stmnum)
+        streamData = sources.BufferStream(b_(objStm.getData()))
+        refs = []
+        for i, idnum in enumerate(objnums):
+            if self.xref_objStm.get(idnum, (None,))[0] != stmnum:
+                continue
+            ref = IndirectObject(idnum, 0, self)
+            if self.cacheGetIndirectObject(0, idnum) == None:
+                obj = self._readObjectFromStream(objStm, streamData, offsets[i], i, idnum)
+                self.cacheIndirectObject(0, idnum, obj)
+            refs.append(ref)
+        return refs
 
     def getObject(self, indirectReference):
         debug = False
@@ -1715,14 +2117,15 @@ class PdfFileReader(object):
                 if not hasattr(self, '_decryption_key'):
                     raise utils.PdfReadError("file has not been decrypted")
                 # otherwise, decrypt here...
-                import struct
-                pack1 = struct.pack("<i", indirectReference.idnum)[:3]
-                pack2 = struct.pack("<i", indirectReference.generation)[:2]
-                key = self._decryption_key + pack1 + pack2
-                assert len(key) == (len(self._decryption_key) + 5)
-                md5_hash = md5(key).digest()
-                key = md5_hash[:min(16, len(self._decryption_key) + 5)]
+                key = self._getObjectKey(indirectReference.idnum,
+                                         indirectReference.generation)
                 retval = self._decryptObject(retval, key)
+        elif self._pendingXref != None:
+            # not in the cross-reference sections read so far; look in the
+            # next older one
+            if not self._findXrefEntry(indirectReference):
+                self._readNextXrefSection()
+            return self.getObject(indirectReference)
         else:
             warnings.warn("Object %d %d not defined."%(indirectReference.idnum,
                         indirectReference.generation), utils.PdfReadWarning)
@@ -1732,11 +2135,28 @@ class PdfFileReader(object):
                     indirectReference.idnum, retval)
         return retval
 
+    def _getObjectKey(self, idnum, generation):
+        # The RC4 key of an object is derived from the document key and the
+        # object's number and generation (algorithm 3.1 of the PDF
+        # reference); it is kept, since objects may be parsed again after
+        # they were evicted from a bounded cache.
+        key = self._objectKeys.get((idnum, generation))
+        if key is None:
+            pack1 = struct.pack("<i", idnum)[:3]
+            pack2 = struct.pack("<i", generation)[:2]
+            key = self._decryption_key + pack1 + pack2
+            md5_hash = md5(key).digest()
+            key = md5_hash[:min(16, len(self._decryption_key) + 5)]
+            self._objectKeys[(idnum, generation)] = key
+        return key
+
     def _decryptObject(self, obj, key):
+        # Strings are decrypted right away, being immutable and short;
+        # stream data only when it is first used, see StreamObject._data.
         if isinstance(obj, ByteStringObject) or isinstance(obj, TextStringObject):
             obj = createStringObject(utils.RC4_encrypt(key, obj.original_bytes))
         elif isinstance(obj, StreamObject):
-            obj._data = utils.RC4_encrypt(key, obj._data)
+            obj.setEncryptionKey(key)
         elif isinstance(obj, DictionaryObject):
             for dictkey, value in list(obj.items()):
                 obj[dictkey] = self._decryptObject(value, key)
@@ -1750,6 +2170,13 @@ class PdfFileReader(object):
         # cross-reference table should put us in the right spot to read the
         # object header.  In reality... some files have stupid cross reference
         # tables that are off by whitespace bytes.
+        if isinstance(stream, sources.BufferStream) and \
+                stream.getbuffer() is not None:
+            # the common case, "<num> <gen> obj", in one step
+            m = _objectHeaderPattern.match(stream.getbuffer(), stream.tell())
+            if m is not None:
+                stream.seek(m.end(), 0)
+                return int(m.group(1)), int(m.group(2))
         extra = False
         utils.skipOverComment(stream)
         extra |= utils.skipOverWhitespace(stream); stream.seek(-1, 1)
@@ -1779,8 +2206,237 @@ class PdfFileReader(object):
             if self.strict: raise utils.PdfReadError(msg)
             else:           warnings.warn(msg)
         self.resolvedObjects[(generation, idnum)] = obj
+        if isinstance(obj, EncodedStreamObject):
+            if isinstance(self.resolvedObjects, utils.ObjectCache):
+                obj.cacheEntry = (self.resolvedObjects, (generation, idnum))
+            if self._decodeLimits is not None:
+                obj.decodeLimits = self._decodeLimits
         return obj
 
+    def pinObject(self, indirectReference):
+        """
+        Keeps an object in the reader's cache regardless of the
+        ``cache_bytes`` limit, for objects that are used over and over.  The
+        document catalog and the page tree are pinned automatically.  Does
+        nothing if the cache is not limited.
+
+        :param indirectReference: an
+            :class:`IndirectObject<PyPDF2.generic.IndirectObject>` referring
+            to the object; other values are ignored.
+        """
+        if isinstance(indirectReference, IndirectObject) and \
+                isinstance(self.resolvedObjects, utils.ObjectCache):
+            self.resolvedObjects.pin((indirectReference.generation,
+                                      indirectReference.idnum))
+
+    def unpinObject(self, indirectReference):
+        """
+        Makes an object pinned with :meth:`pinObject()<PdfFileReader.pinObject>`
+        subject to eviction from the reader's cache again.
+
+        :param indirectReference: an
+            :class:`IndirectObject<PyPDF2.generic.IndirectObject>` referring
+            to the object; other values are ignored.
+        """
+        if isinstance(indirectReference, IndirectObject) and \
+                isinstance(self.resolvedObjects, utils.ObjectCache):
+            self.resolvedObjects.unpin((indirectReference.generation,
+                                        indirectReference.idnum))
+
+    def getRevisions(self):
+        """
+        Lists the revisions of the document: the version originally saved,
+        then one for each incremental update appended to it.  The
+        cross-reference sections are followed through their /Prev entries;
+        of the sections that have not been read yet, only the trailers are.
+
+        :return: the length of the file as saved in each revision, oldest
+            first.
+        :rtype: list of int
+        """
+        if self._startxref == None:
+            # the cross-reference table was rebuilt; there is no chain
+            self.stream.seek(0, 2)
+            return [self.stream.tell()]
+        revisions = [] # the offsets of the sections of each, newest first
+        offset, previous = self._startxref, None
+        while offset != None and not any(offset in r for r in revisions):
+            # /Prev points back to the previous revision, except in the
+            # first-page section of a linearized file, which points forward
+            # to the main section of the same revision
+            if previous == None or offset < previous:
+                revisions.append([])
+            revisions[-1].append(offset)
+            previous = offset
+            if offset in self._xrefSections:
+                offset = self._xrefSections[offset]
+            else:
+                offset = self._readXrefPrev(offset)
+        self.stream.seek(0, 2)
+        size = self.stream.tell()
+        ends = []
+        for offsets in reversed(revisions):
+            # a revision ends at the %%EOF marker after its last section
+            end = 0
+            for offset in offsets:
+                match = _searchStream(self.stream, _eofPattern, offset)
+                end = max(end, match[1] if match != None else size)
+            ends.append(end)
+        return ends
+
+    def getRevision(self, revision):
+        """
+        Opens a revision of the document, as listed by
+        :meth:`getRevisions()<PdfFileReader.getRevisions>`, without copying
+        the file: the new reader reads through the same buffer or source, up
+        to the end of that revision, and cannot read any more once this
+        reader's stream is closed.
+
+        :param int revision: index of the revision: 0 for the version
+            originally saved, -1 for the current one.
+        :return: a reader for the document as it was in that revision.
+        :rtype: :class:`PdfFileReader`
+        """
+        end = self.getRevisions()[revision]
+        stream = self.stream
+        if isinstance(stream, sources.BufferStream):
+            # a view of the buffer would keep a memory-mapped file from
+            # being closed
+            source = sources.CallbackSource(stream.read_at, end, stream.name)
+        elif isinstance(stream, sources.SourceStream):
+            source = sources.CallbackSource(stream.source.read_at, end, stream.name)
+        else:
+            stream.seek(0, 0)
+            source = stream.read(end)
+        return PdfFileReader(source, strict=self.strict, overwriteWarnings=False)
+
+    def _readXrefPrev(self, offset):
+        # Returns the /Prev entry of the cross-reference section at
+        # *offset*, or None, reading only its trailer.
+        trailer, isStream = self._readSectionTrailer(offset)
+        if trailer != None and utils.isInt(trailer.get("/Prev")):
+            return trailer["/Prev"]
+        return None
+
+    def _readSectionTrailer(self, offset):
+        # Reads only the trailer of the cross-reference section at *offset*:
+        # the trailer dictionary of a table, or the dictionary of a
+        # cross-reference stream.  Returns it and whether the section is a
+        # stream, or (None, False) if it cannot be read.
+        stream = self.stream
+        try:
+            stream.seek(offset, 0)
+            isStream = stream.read(4) != b_("xref")
+            if not isStream:
+                match = _searchStream(stream, _trailerPattern, offset)
+                if match == None:
+                    return None, False
+                stream.seek(match[1], 0)
+            else:
+                stream.seek(offset, 0)
+                self.readObjectHeader(stream)
+            trailer = readObject(stream, self)
+        except (utils.PdfReadError, ValueError) as e:
+            warnings.warn("Cannot read the trailer at offset %d: %s" % (offset, e),
+                          utils.PdfReadWarning)
+            return None, False
+        if not isinstance(trailer, DictionaryObject):
+            return None, False
+        return trailer, isStream
+
+    def _mergeOlderTrailers(self):
+        # Adds the trailer entries that only the sections not read yet have,
+        # such as an /Info or /ID that an incremental update did not repeat,
+        # reading only their trailers.  The entries are the ones
+        # _readXrefSection takes from each kind of section, so reading the
+        # sections later does not change the trailer.
+        offset = self._pendingXref
+        seen = set(self._xrefSections)
+        while offset != None and offset not in seen:
+            seen.add(offset)
+            trailer, isStream = self._readSectionTrailer(offset)
+            if trailer == None:
+                return
+            if isStream:
+                keys = [key for key in ("/Root", "/Encrypt", "/Info", "/ID") if key in trailer]
+            else:
+                keys = list(trailer.keys())
+            for key in keys:
+                if key not in self.trailer:
+                    self.trailer[NameObject(key)] = trailer.raw_get(key)
+            prev = trailer.get("/Prev")
+            offset = prev if utils.isInt(prev) else None
+
+    def _readWithIndex(self, stream, path, indexPath):
+        # Sets the reader up from the index at *indexPath* if it matches the
+        # file, or reads the file and writes the index; see read().
+        if indexPath is True:
+            if path == None:
+                raise ValueError("index_cache=True needs the path of the file")
+            indexPath = path + ".index"
+        key = indexcache.fileKey(stream, path)
+        index = indexcache.load(indexPath, key)
+        if index != None:
+            self._loadIndex(stream, index)
+            return
+        self.read(stream)
+        try:
+            indexcache.save(indexPath, key, self._buildIndex())
+        except EnvironmentError as e:
+            warnings.warn("Cannot write index %s: %s" % (indexPath, e),
+                          utils.PdfReadWarning)
+
+    def _buildIndex(self):
+        # Reads everything that goes into the index cache: all
+        # cross-reference sections, the headers of all object streams and
+        # the page tree.
+        while self._pendingXref != None:
+            self._readNextXrefSection()
+        for stmnum in set(stmnum for stmnum, idx in self.xref_objStm.values()):
+            try:
+                self._getObjectStreamIndex(stmnum)
+            except (utils.PdfReadError, ValueError, AssertionError, KeyError):
+                pass # it is parsed (and fails) again when needed
+        pages = None
+        try:
+            if self.flattenedPages == None:
+                self._flatten()
+            refs = [page.indirectRef for page in self.flattenedPages]
+            if None not in refs:
+                pages = [(ref.idnum, ref.generation) for ref in refs]
+        except (utils.PdfReadError, ValueError, KeyError):
+            pass # encrypted, or a damaged page tree
+        trailer = BytesIO()
+        self.trailer.writeToStream(trailer, None)
+        return {
+            "trailer": trailer.getvalue(),
+            "startxref": -1 if self._startxref == None else self._startxref,
+            "xrefIndex": self.xrefIndex,
+            "sections": self._xrefSections,
+            "xref": self.xref,
+            "xref_objStm": self.xref_objStm,
+            "objStmIndex": self._objStmIndex,
+            "pages": pages,
+            }
+
+    def _loadIndex(self, stream, index):
+        # Sets up what read() would from an index cache; see _buildIndex.
+        self.stream = stream
+        self.xref = index["xref"]
+        self.xref_objStm = index["xref_objStm"]
+        for stmnum, (objnums, offsets) in index["objStmIndex"].items():
+            self._objStmIndex[stmnum] = (array.array("l", objnums),
+                                         array.array("l", offsets))
+        self.trailer = readObject(sources.BufferStream(index["trailer"]), self)
+        self.xrefIndex = index["xrefIndex"]
+        self.linearization = None
+        self._startxref = index["startxref"] if index["startxref"] >= 0 else None
+        self._xrefSections = index["sections"]
+        self._pendingXref = self._pendingTable = None
+        if index["pages"] != None:
+            self._pageRefs = [IndirectObject(num, gen, self)
+                              for num, gen in index["pages"]]
+
     def read(self, stream):
         debug = False
         if debug: print(">>read", stream)
@@ -1788,33 +2444,318 @@ class PdfFileReader(object):
         stream.seek(-1, 2)
         if not stream.tell():
             raise utils.PdfReadError('Cannot read an empty file')
-        last1K = stream.tell() - 1024 + 1 # offset of last 1024 bytes of stream
-        line = b_('')
-        while line[:5] != b_("%%EOF"):
-            if stream.tell() < last1K:
-                raise utils.PdfReadError("EOF marker not found")
-            line = self.readNextEndLine(stream)
-            if debug: print("  line:",line)
-
-        # find startxref entry - the location of the xref table
-        line = self.readNextEndLine(stream)
-        try:
-            startxref = int(line)
-        except ValueError:
-            # 'startxref' may be on the same line as the location
-            if not line.startswith(b_("startxref")):
-                raise utils.PdfReadError("startxref not found")
-            startxref = int(line[9:].strip())
-            warnings.warn("startxref on same line as offset")
-        else:
-            line = self.readNextEndLine(stream)
-            if line[:9] != b_("startxref"):
-                raise utils.PdfReadError("startxref not found")
-
-        # read all cross reference tables and their trailers
+        self.stream = stream
         self.xref = {}
         self.xref_objStm = {}
         self.trailer = DictionaryObject()
+        self.linearization = None
+        self._startxref = None # offset of the newest cross-reference section
+        self._xrefSections = {} # map offsets of the sections read to their /Prev
+        self._pendingXref = None # offset of the next older section to read
+        self._pendingTable = None # see _findXrefEntry
+        if self._fastFirstPage and self._readFirstPageXref(stream):
+            return
+        try:
+            self._readXref(stream)
+        except (utils.PdfReadError, ValueError, AssertionError, KeyError) as e:
+            if self.strict:
+                raise
+            warnings.warn("Cannot read the cross-reference table (%s); "
+                          "rebuilding it from the objects in the file" % e,
+                          utils.PdfReadWarning)
+            self._rebuildXref(stream)
+            return
+        if "/Root" not in self.trailer and not self.strict:
+            warnings.warn("Trailer has no /Root; rebuilding the cross-reference "
+                          "table from the objects in the file", utils.PdfReadWarning)
+            self._rebuildXref(stream)
+
+    def _readXref(self, stream):
+        stream.seek(-1, 2)
+        # read the tail of the file in one block, and more of it if the
+        # startxref entry turns out to be further back
+        end = stream.tell() + 1
+        blockSize = 4096
+        while True:
+            start = max(0, end - blockSize)
+            stream.seek(start, 0)
+            startxref = self._findStartxref(stream.read(end - start), start)
+            if startxref != None:
+                break
+            blockSize *= 4
+
+        # Read the newest cross-reference section only.  Older sections,
+        # which newer ones mostly shadow, are read when an object is not
+        # found in the newer ones (see getObject), or for a trailer that
+        # lacks /Root; of the rest, only the trailers are read.
+        self._startxref = startxref
+        self._pendingXref = startxref
+        self._readNextXrefSection(recover=False)
+        while "/Root" not in self.trailer and self._pendingXref != None:
+            self._readNextXrefSection(recover=False)
+        self._mergeOlderTrailers()
+
+    def _rebuildXref(self, stream):
+        # Rebuilds the cross-reference table of a damaged file in one scan
+        # over its bytes.  "N G obj" markers give the offsets of the objects
+        # (a later definition replaces an earlier one, as in an incremental
+        # update); trailer dictionaries and cross-reference streams give the
+        # trailer; object streams give the objects stored in them.  Stream
+        # data is skipped, so that it is not mistaken for objects.
+        if isinstance(stream, sources.BufferStream) and \
+                stream.getbuffer() is not None:
+            buf = stream.getbuffer()
+        else:
+            stream.seek(0, 0)
+            buf = stream.read()
+        self.stream = stream
+        self.xref, self.xref_objStm = {}, {}
+        self.trailer = DictionaryObject()
+        self.resolvedObjects.clear()
+        self._objStmIndex.clear()
+        self.xrefIndex = 0
+        self._startxref = None
+        self._pendingXref = None
+
+        found = {} # object number -> (offset, generation) of its last definition
+        trailers = [] # (offset, object number or None for a trailer dictionary)
+        objStms, catalogs = [], [] # (offset, object number)
+        current = None # (offset, object number) of the last object marker
+        m = _recoveryPattern.search(buf)
+        while m is not None:
+            pos = m.end()
+            if m.group(1) != None:
+                current = (m.start(), int(m.group(1)))
+                found[current[1]] = (m.start(), int(m.group(2)))
+            elif m.group(3) != None:
+                if current != None:
+                    kind = m.group(3)
+                    if kind == b_("XRef"):
+                        trailers.append(current)
+                    elif kind == b_("ObjStm"):
+                        objStms.append(current)
+                    else:
+                        catalogs.append(current)
+            elif m.group(4) != None:
+                trailers.append((m.end(), None))
+            else:
+                end = _endstreamPattern.search(buf, pos)
+                if end != None:
+                    pos = end.end()
+            m = _recoveryPattern.search(buf, pos)
+        for num, (offset, generation) in list(found.items()):
+            self.xref.setdefault(generation, {})[num] = offset
+        if not found:
+            raise utils.PdfReadError("Could not find any objects in the file")
+
+        def isCurrent(offset, num):
+            # whether the object at *offset* is the last definition of *num*
+            return found[num][0] == offset
+
+        # the last trailer takes precedence
+        for offset, num in reversed(trailers):
+            try:
+                if num == None:
+                    stream.seek(offset, 0)
+                    readNonWhitespace(stream)
+                    stream.seek(-1, 1)
+                    trailer = readObject(stream, self)
+                elif isCurrent(offset, num):
+                    trailer = IndirectObject(num, found[num][1], self).getObject()
+                else:
+                    continue
+            except (utils.PdfReadError, ValueError, AssertionError) as e:
+                warnings.warn("Skipping damaged trailer at offset %d: %s" % (offset, e),
+                              utils.PdfReadWarning)
+                continue
+            if not isinstance(trailer, DictionaryObject):
+                continue
+            for key in ("/Root", "/Encrypt", "/Info", "/ID", "/Size"):
+                if key in trailer and key not in self.trailer:
+                    self.trailer[NameObject(key)] = trailer.raw_get(key)
+
+        for offset, stmnum in objStms:
+            if not isCurrent(offset, stmnum) or found[stmnum][1] != 0:
+                continue
+            try:
+                objStm, objnums, offsets = self._getObjectStreamIndex(stmnum)
+            except (utils.PdfReadError, ValueError, AssertionError) as e:
+                warnings.warn("Skipping damaged object stream %d: %s" % (stmnum, e),
+                              utils.PdfReadWarning)
+                continue
+            for idx, num in enumerate(objnums):
+                # objects defined after the object stream replace it
+                if num not in found or found[num][0] < offset:
+                    self.xref_objStm[num] = (stmnum, idx)
+
+        if "/Root" not in self.trailer:
+            catalogs = [(o, n) for o, n in catalogs if isCurrent(o, n)]
+            if not catalogs:
+                raise utils.PdfReadError("Could not find the document catalog")
+            num = catalogs[-1][1]
+            self.trailer[NameObject("/Root")] = IndirectObject(num, found[num][1], self)
+
+    def _checkXrefIndex(self, stream):
+        #if not zero-indexed, verify that the table is correct; change it if necessary
+        if self.xrefIndex and not self.strict:
+            loc = stream.tell()
+            for gen in self.xref:
+                if gen == 65535: continue
+                for id in self.xref[gen]:
+                    stream.seek(self.xref[gen][id], 0)
+                    try:
+                        pid, pgen = self.readObjectHeader(stream)
+                    except ValueError:
+                        break
+                    if pid == id:
+                        # the table is right; no need to look at every object
+                        break
+                    if pid == id - self.xrefIndex:
+                        self._zeroXref(gen)
+                        break
+                    #if not, then either it's just plain wrong, or the non-zero-index is actually correct
+            stream.seek(loc, 0) #return to where it was
+
+    def _readFirstPageXref(self, stream):
+        # If the file is linearized, and has not been updated since (its
+        # length is still the /L of the linearization dictionary), reads
+        # only the first-page cross-reference section, which follows the
+        # linearization dictionary, and returns True.  The main section is
+        # left to be read when needed.
+        stream.seek(0, 0)
+        m = _firstObjectPattern.search(stream.read(1024))
+        if m is None:
+            return False
+        stream.seek(m.start(1), 0)
+        try:
+            self.readObjectHeader(stream)
+            linearization = readObject(stream, self)
+        except (utils.PdfReadError, ValueError):
+            return False
+        if not isinstance(linearization, DictionaryObject) or \
+                "/Linearized" not in linearization:
+            return False
+        for key in ("/L", "/O", "/N", "/E"):
+            if not utils.isInt(linearization.get(key)):
+                return False
+        start = stream.tell()
+        stream.seek(0, 2)
+        if linearization["/L"] != stream.tell():
+            return False
+        stream.seek(start, 0)
+        m = _endobjPattern.match(stream.read(64))
+        if m is None:
+            return False
+        if isinstance(stream, sources.SourceStream):
+            # the first page ends at /E; fetch all of it at once
+            stream.prefetch(0, linearization["/E"])
+        self._startxref = self._pendingXref = start + m.end()
+        try:
+            self._readNextXrefSection(recover=False)
+        except utils.PdfReadError:
+            self.xref, self.xref_objStm = {}, {}
+            self.trailer = DictionaryObject()
+            self.resolvedObjects.clear()
+            self.xrefIndex = 0
+            self._startxref = self._pendingXref = None
+            self._xrefSections = {}
+            return False
+        self.linearization = linearization
+        return True
+
+    def _readNextXrefSection(self, recover=True):
+        # Reads the cross-reference section at self._pendingXref and moves
+        # on to the one before it.  If it cannot be read, the table is
+        # rebuilt in non-strict mode when *recover* is true; otherwise the
+        # error is raised.
+        startxref = self._pendingXref
+        self._pendingXref = self._pendingTable = None
+        try:
+            prev = self._readXrefSection(self.stream, startxref)
+        except (utils.PdfReadError, ValueError, AssertionError, KeyError) as e:
+            if self.strict or not recover:
+                raise
+            warnings.warn("Cannot read the cross-reference section at offset "
+                          "%d (%s); rebuilding the table from the objects in "
+                          "the file" % (startxref, e), utils.PdfReadWarning)
+            self._rebuildXref(self.stream)
+            return
+        self._xrefSections[startxref] = prev
+        if prev != None and prev not in self._xrefSections:
+            self._pendingXref = prev
+        self._checkXrefIndex(self.stream)
+
+    def _findXrefEntry(self, indirectReference):
+        # Looks up an object in the next cross-reference section to read
+        # without reading all of it, which works if the section is a table
+        # with one subsection starting at object 0, of 20-byte entries (PDF
+        # 1.7 reference, 3.4.3), like the original table of an updated file
+        # or the main table of a linearized one.  Adds the offset to
+        # self.xref and returns True, or returns False if the object is not
+        # in use in that section or the section has to be read in full.
+        if self._pendingTable == None:
+            self.stream.seek(self._pendingXref, 0)
+            m = _xrefTableHeaderPattern.match(self.stream.read(32))
+            if m is None:
+                self._pendingTable = False
+            else:
+                self._pendingTable = (self._pendingXref + m.end(), int(m.group(1)))
+        if not self._pendingTable or indirectReference.idnum >= self._pendingTable[1]:
+            return False
+        start, size = self._pendingTable
+        self.stream.seek(start + 20 * indirectReference.idnum, 0)
+        m = _xrefEntryPattern.match(self.stream.read(20))
+        if m is None or int(m.group(2)) != indirectReference.generation:
+            return False
+        offset = int(m.group(1))
+        # make sure the entry really is the object's
+        self.stream.seek(offset, 0)
+        m = _objectHeaderPattern.match(self.stream.read(32))
+        if m is None or int(m.group(1)) != indirectReference.idnum:
+            return False
+        self.xref.setdefault(indirectReference.generation, {})[
+            indirectReference.idnum] = offset
+        return True
+
+    def _getLinearizedFirstPage(self):
+        # The first page of a linearized file is object /O of the
+        # linearization dictionary, in the first-page section.  Attributes
+        # it inherits are looked up in the page tree, which usually is not,
+        # but whose nodes _findXrefEntry can find one by one.
+        return self._getPageByReference(0,
+                IndirectObject(self.linearization["/O"], 0, self))
+
+    def _getPageByReference(self, pageNumber, ref):
+        # Returns page *pageNumber*, whose page object *ref* is already
+        # known, without descending the page tree; inherited attributes are
+        # looked up along the /Parent entries instead.
+        if pageNumber in self._pageCache:
+            return self._pageCache[pageNumber]
+        pageObj = PageObject(self, ref)
+        pageObj.update(ref.getObject())
+        inheritablePageAttributes = (
+            NameObject("/Resources"), NameObject("/MediaBox"),
+            NameObject("/CropBox"), NameObject("/Rotate")
+            )
+        node = pageObj
+        visited = set()
+        while "/Parent" in node and id(node) not in visited:
+            visited.add(id(node))
+            node = node["/Parent"]
+            for attr in inheritablePageAttributes:
+                # if the page has it's own value, it does not inherit the
+                # parent's value:
+                if attr in node and attr not in pageObj:
+                    pageObj[attr] = node.raw_get(attr)
+        self._pageCache[pageNumber] = pageObj
+        return pageObj
+
+    def _readXrefSection(self, stream, startxref):
+        # Reads the cross-reference table or stream at offset *startxref*
+        # and its trailer, adding the entries and trailer keys not already
+        # known to self.xref, self.xref_objStm and self.trailer.  Returns the
+        # offset of the previous section (/Prev), or None.
+        debug = False
         while True:
             # load the xref table
             stream.seek(startxref, 0)
@@ -1841,43 +2782,7 @@ class PdfFileReader(object):
                     size = readObject(stream, self)
                     readNonWhitespace(stream)
                     stream.seek(-1, 1)
-                    cnt = 0
-                    while cnt < size:
-                        line = stream.read(20)
-
-                        # It's very clear in section 3.4.3 of the PDF spec
-                        # that all cross-reference table lines are a fixed
-                        # 20 bytes (as of PDF 1.7). However, some files have
-                        # 21-byte entries (or more) due to the use of \r\n
-                        # (CRLF) EOL's. Detect that case, and adjust the line
-                        # until it does not begin with a \r (CR) or \n (LF).
-                        while line[0] in b_("\x0D\x0A"):
-                            stream.seek(-20 + 1, 1)
-                            line = stream.read(20)
-
-                        # On the other hand, some malformed PDF files
-                        # use a single character EOL without a preceeding
-                        # space.  Detect that case, and seek the stream
-                        # back one character.  (0-9 means we've bled into
-                        # the next xref entry, t means we've bled into the
-                        # text "trailer"):
-                        if line[-1] in b_("0123456789t"):
-                            stream.seek(-1, 1)
-
-                        offset, generation = line[:16].split(b_(" "))
-                        offset, generation = int(offset), int(generation)
-                        if generation not in self.xref:
-                            self.xref[generation] = {}
-                        if num in self.xref[generation]:
-                            # It really seems like we should allow the last
-                            # xref table in the file to override previous
-                            # ones. Since we read the file backwards, assume
-                            # any existing key is already set correctly.
-                            pass
-                        else:
-                            self.xref[generation][num] = offset
-                        cnt += 1
-                        num += 1
+                    self._readXrefSubsection(stream, num, size)
                     readNonWhitespace(stream)
                     stream.seek(-1, 1)
                     trailertag = stream.read(7)
@@ -1893,9 +2798,8 @@ class PdfFileReader(object):
                     if key not in self.trailer:
                         self.trailer[key] = value
                 if "/Prev" in newTrailer:
-                    startxref = newTrailer["/Prev"]
-                else:
-                    break
+                    return newTrailer["/Prev"]
+                return None
             elif x.isdigit():
                 # PDF 1.5+ Cross-Reference Stream
                 stream.seek(-1, 1)
@@ -1903,7 +2807,7 @@ class PdfFileReader(object):
                 xrefstream = readObject(stream, self)
                 assert xrefstream["/Type"] == "/XRef"
                 self.cacheIndirectObject(generation, idnum, xrefstream)
-                streamData = BytesIO(b_(xrefstream.getData()))
+                streamData = b_(xrefstream.getData())
                 # Index pairs specify the subsections in the dictionary. If
                 # none create one subsection that spans everything.
                 idx_pairs = xrefstream.get("/Index", [0, xrefstream.get("/Size")])
@@ -1913,68 +2817,46 @@ class PdfFileReader(object):
                 if self.strict and len(entrySizes) > 3:
                     raise utils.PdfReadError("Too many entry sizes: %s" %entrySizes)
 
-                def getEntry(i):
-                    # Reads the correct number of bytes for each entry. See the
-                    # discussion of the W parameter in PDF spec table 17.
-                    if entrySizes[i] > 0:
-                        d = streamData.read(entrySizes[i])
-                        return convertToInt(d, entrySizes[i])
-
-                    # PDF Spec Table 17: A value of zero for an element in the
-                    # W array indicates...the default value shall be used
-                    if i == 0:  return 1 # First value defaults to 1
-                    else:       return 0
-
-                def used_before(num, generation):
-                    # We move backwards through the xrefs, don't replace any.
-                    return num in self.xref.get(generation, []) or \
-                            num in self.xref_objStm
-
                 # Iterate through each subsection
                 last_end = 0
+                pos = 0
                 for start, size in self._pairs(idx_pairs):
                     # The subsections must increase
                     assert start >= last_end
                     last_end = start + size
-                    for num in range(start, start+size):
-                        # The first entry is the type
-                        xref_type = getEntry(0)
-                        # The rest of the elements depend on the xref_type
-                        if xref_type == 0:
-                            # linked list of free objects
-                            next_free_object = getEntry(1)
-                            next_generation = getEntry(2)
-                        elif xref_type == 1:
-                            # objects that are in use but are not compressed
-                            byte_offset = getEntry(1)
-                            generation = getEntry(2)
-                            if generation not in self.xref:
-                                self.xref[generation] = {}
-                            if not used_before(num, generation):
-                                self.xref[generation][num] = byte_offset
-                                if debug: print(("XREF Uncompressed: %s %s"%(
-                                                num, generation)))
-                        elif xref_type == 2:
-                            # compressed objects
-                            objstr_num = getEntry(1)
-                            obstr_idx = getEntry(2)
-                            generation = 0 # PDF spec table 18, generation is 0
-                            if not used_before(num, generation):
-                                if debug: print(("XREF Compressed: %s %s %s"%(
-                                        num, objstr_num, obstr_idx)))
-                                self.xref_objStm[num] = (objstr_num, obstr_idx)
-                        elif self.strict:
+                    types, fields1, fields2 = _decodeXrefStreamRecords(
+                        streamData, pos, entrySizes, size)
+                    pos += size * sum(entrySizes)
+                    if self.strict:
+                        unknown = set(types).difference((0, 1, 2))
+                        if unknown:
                             raise utils.PdfReadError("Unknown xref type: %s"%
-                                                        xref_type)
+                                                        min(unknown))
+                    # Type 0 entries are the linked list of free objects and
+                    # are skipped.  Type 1 entries are objects that are in
+                    # use but are not compressed: offset and generation.
+                    rows = [i for i, t in enumerate(types) if t == 1]
+                    self._addXrefEntries([start + i for i in rows],
+                                         [fields1[i] for i in rows],
+                                         [fields2[i] for i in rows])
+                    # Type 2 entries are compressed objects: object stream
+                    # number and index. Their generation is 0 (PDF spec table
+                    # 18). We move backwards through the xrefs, don't replace
+                    # any.
+                    compressed = self.xref.get(0, {})
+                    self.xref_objStm.update(
+                        (start + i, (fields1[i], fields2[i]))
+                        for i, t in enumerate(types) if t == 2 and
+                        start + i not in compressed and
+                        start + i not in self.xref_objStm)
 
                 trailerKeys = "/Root", "/Encrypt", "/Info", "/ID"
                 for key in trailerKeys:
                     if key in xrefstream and key not in self.trailer:
                         self.trailer[NameObject(key)] = xrefstream.raw_get(key)
                 if "/Prev" in xrefstream:
-                    startxref = xrefstream["/Prev"]
-                else:
-                    break
+                    return xrefstream["/Prev"]
+                return None
             else:
                 # bad xref character at startxref.  Let's see if we can find
                 # the xref table nearby, as we've observed this error with an
@@ -1998,22 +2880,76 @@ class PdfFileReader(object):
                     continue
                 # no xref table found at specified location
                 raise utils.PdfReadError("Could not find xref table at specified location")
-        #if not zero-indexed, verify that the table is correct; change it if necessary
-        if self.xrefIndex and not self.strict:
-            loc = stream.tell()
-            for gen in self.xref:
-                if gen == 65535: continue
-                for id in self.xref[gen]:
-                    stream.seek(self.xref[gen][id], 0)
-                    try:
-                        pid, pgen = self.readObjectHeader(stream)
-                    except ValueError:
-                        break
-                    if pid == id - self.xrefIndex:
-                        self._zeroXref(gen)
-                        break
-                    #if not, then either it's just plain wrong, or the non-zero-index is actually correct
-            stream.seek(loc, 0) #return to where it was
+
+    def _readXrefSubsection(self, stream, num, size):
+        # Reads the *size* entries of a cross-reference table subsection
+        # starting at object *num* with a single read, and adds the ones not
+        # already known (we read the file backwards, so entries from later
+        # updates take precedence) to self.xref.
+        start = stream.tell()
+        data = stream.read(size * 20)
+        if len(data) == size * 20 and _xrefTablePattern.match(data):
+            # Fast path: every entry is the 20 bytes required by section
+            # 3.4.3 of the PDF spec, three whitespace-separated fields each.
+            fields = data.split()
+            offsets = list(map(int, fields[0::3]))
+            generations = list(map(int, fields[1::3]))
+            end = len(data)
+        else:
+            offsets, generations, end = self._readIrregularXrefEntries(stream, data, size)
+        stream.seek(start + end, 0)
+
+        self._addXrefEntries(range(num, num + size), offsets, generations)
+
+    def _addXrefEntries(self, nums, offsets, generations):
+        # Adds the uncompressed objects *nums* to self.xref in bulk, keeping
+        # the entries that are already known (we read the file backwards, so
+        # entries from later updates take precedence).
+        # All entries of a subsection but the head of the free list usually
+        # share one generation, so add them in one go and move the exceptions.
+        common = generations[-1] if generations else 0
+        tables = {common: dict(zip(nums, offsets))}
+        for i in [i for i, gen in enumerate(generations) if gen != common]:
+            del tables[common][nums[i]]
+            tables.setdefault(generations[i], {})[nums[i]] = offsets[i]
+        for generation, table in list(tables.items()):
+            xref = self.xref.setdefault(generation, {})
+            if xref or self.xref_objStm:
+                table = dict((n, o) for n, o in list(table.items())
+                             if n not in xref and n not in self.xref_objStm)
+            xref.update(table)
+
+    def _readIrregularXrefEntries(self, stream, data, size):
+        # Splits *data* into *size* cross-reference entries that are not all
+        # 20 bytes long, reading more from *stream* if needed.  Returns the
+        # offsets, the generations and the length of data they took up.
+        offsets, generations = [], []
+        pos = 0
+        while len(offsets) < size:
+            if len(data) < pos + 21:
+                data += stream.read((size - len(offsets)) * 21)
+            # Some files have 21-byte entries (or more) due to the use of
+            # \r\n (CRLF) EOL's. Skip over any EOL characters left over from
+            # the previous entry.
+            while data[pos:pos+1] in (b_("\r"), b_("\n")):
+                pos += 1
+            line = data[pos:pos+20]
+            # On the other hand, some malformed PDF files use a single
+            # character EOL without a preceeding space.  (0-9 means we've
+            # bled into the next xref entry, t means we've bled into the
+            # text "trailer"):
+            if line[-1:] and line[-1:] in b_("0123456789t"):
+                pos += 19
+            else:
+                pos += 20
+            try:
+                offset, generation = line[:16].split(b_(" "))
+                offset, generation = int(offset), int(generation)
+            except ValueError:
+                raise utils.PdfReadError("Invalid xref table entry %r" % line)
+            offsets.append(offset)
+            generations.append(generation)
+        return offsets, generations, pos
 
     def _zeroXref(self, generation):
         self.xref[generation] = dict( (k-self.xrefIndex, v) for (k, v) in list(self.xref[generation].items()) )
@@ -2026,6 +2962,44 @@ class PdfFileReader(object):
             if (i+1) >= len(array):
                 break
 
+    def _findStartxref(self, data, start):
+        # Finds the %%EOF marker in the last 1024 bytes of the file and the
+        # startxref entry before it, in the block *data* read from offset
+        # *start* up to the end of the file, and returns the offset of the
+        # cross-reference section.  Returns None if the block does not reach
+        # back far enough.
+        pos = len(data) - 1
+        last1K = start + pos - 1024 + 1 # offset of last 1024 bytes of stream
+        line = b_('')
+        while line[:5] != b_("%%EOF"):
+            if start + pos < last1K:
+                raise utils.PdfReadError("EOF marker not found")
+            result = _readPreviousLine(data, pos, start)
+            if result == None:
+                return None
+            line, pos = result
+
+        # find startxref entry - the location of the xref table
+        result = _readPreviousLine(data, pos, start)
+        if result == None:
+            return None
+        line, pos = result
+        try:
+            startxref = int(line)
+        except ValueError:
+            # 'startxref' may be on the same line as the location
+            if not line.startswith(b_("startxref")):
+                raise utils.PdfReadError("startxref not found")
+            startxref = int(line[9:].strip())
+            warnings.warn("startxref on same line as offset")
+            return startxref
+        result = _readPreviousLine(data, pos, start)
+        if result == None:
+            return None
+        if result[0][:9] != b_("startxref"):
+            raise utils.PdfReadError("startxref not found")
+        return startxref
+
     def readNextEndLine(self, stream):
         debug = False
         if debug: print(">>readNextEndLine")
@@ -2081,11 +3055,22 @@ class PdfFileReader(object):
             method.
         """
 
+        # checking a password takes dozens of MD5 and RC4 rounds, so the
+        # outcome is kept for each password tried
+        if password in self._passwordResults:
+            result, key = self._passwordResults[password]
+            if key != None:
+                self._decryption_key = key
+                self._objectKeys.clear()
+            return result
         self._override_encryption = True
         try:
-            return self._decrypt(password)
+            result = self._decrypt(password)
         finally:
             self._override_encryption = False
+        self._passwordResults[password] = (result,
+                getattr(self, '_decryption_key', None) if result else None)
+        return result
 
     def _decrypt(self, password):
         encrypt = self.trailer['/Encrypt'].getObject()
@@ -2096,6 +3081,7 @@ class PdfFileReader(object):
         user_password, key = self._authenticateUserPassword(password)
         if user_password:
             self._decryption_key = key
+            self._objectKeys.clear()
             return 1
         else:
             rev = encrypt['/R'].getObject()
@@ -2104,7 +3090,7 @@ class PdfFileReader(object):
             else:
                 keylen = encrypt['/Length'].getObject() // 8
             key = _alg33_1(password, rev, keylen)
-            real_O = encrypt["/O"].getObject()
+            real_O = encrypt["/O"].getObject().original_bytes
             if rev == 2:
                 userpass = utils.RC4_encrypt(key, real_O)
             else:
@@ -2118,6 +3104,7 @@ class PdfFileReader(object):
             owner_password, key = self._authenticateUserPassword(userpass)
             if owner_password:
                 self._decryption_key = key
+                self._objectKeys.clear()
                 return 2
         return 0
 
@@ -2150,6 +3137,20 @@ class PdfFileReader(object):
     """
 
 
+def _decodeJob(stream, decoder):
+    # Decodes a stream for PdfFileReader.prefetch_streams, in a worker
+    # thread; returns None if the data cannot be decoded.  Either way, the
+    # partial data is given back to the limits; exceeding them is raised.
+    try:
+        return decoder.decodeAll(stream._data)
+    except Exception as e:
+        if decoder.limits is not None:
+            decoder.limits.charge(-decoder.charged)
+        if isinstance(e, utils.PdfSizeLimitError):
+            raise
+        return None
+
+
 def getRectangle(self, name, defaults):
     retval = self.get(name)
     if isinstance(retval, RectangleObject):
@@ -2769,9 +3770,9 @@ class ContentStream(DecodedStreamObject):
             data = b_("")
             for s in stream:
                 data += b_(s.getObject().getData())
-            stream = BytesIO(b_(data))
+            stream = sources.BufferStream(b_(data))
         else:
-            stream = BytesIO(b_(stream.getData()))
+            stream = sources.BufferStream(b_(stream.getData()))
         self.__parseContentStream(stream)
 
     def __parseContentStream(self, stream):
@@ -2943,6 +3944,156 @@ class DocumentInformation(DictionaryObject):
     """The "raw" version of producer; can return a ``ByteStringObject``."""
 
 
+# "<num> <gen> obj" with no superfluous whitespace, followed by whitespace
+# up to the object itself; see PdfFileReader.readObjectHeader
+_objectHeaderPattern = re.compile(b_(r"(\d+)\s(\d+)\sobj[ \n\r\t\x00]*"))
+
+# The first object of a file, after the header; see _readFirstPageXref
+_firstObjectPattern = re.compile(b_(r"[\r\n](\d+)\s+\d+\s+obj"))
+_endobjPattern = re.compile(b_(r"\s*endobj\s*"))
+
+# The header of a cross-reference table with one subsection starting at
+# object 0, and an entry of such a table; see _findXrefEntry
+_xrefTableHeaderPattern = re.compile(b_(r"xref\s*0 (\d+)(?: \r| \n|\r\n|\r|\n)"))
+_xrefEntryPattern = re.compile(b_(r"(\d{10}) (\d{5}) n(?: \r| \n|\r\n)"))
+
+# What _rebuildXref looks for: object markers, /Type entries of special
+# objects, trailer dictionaries, and the start of stream data
+_recoveryPattern = re.compile(b_(
+    r"(?<![0-9])(\d{1,10})[ \t\r\n\f\x00]+(\d{1,5})[ \t\r\n\f\x00]+obj\b"
+    r"|/Type[ \t\r\n\f\x00]*/(XRef|ObjStm|Catalog)\b"
+    r"|\b(trailer)\b"
+    r"|\bstream(?:\r\n|\r|\n)"))
+_endstreamPattern = re.compile(b_("endstream"))
+
+# A run of cross-reference table entries of 20 bytes each, including their
+# EOL markers (section 3.4.3 of the PDF 1.7 reference).
+_xrefTablePattern = re.compile(b_(r"(?:\d{10} \d{5} [fn](?: \r| \n|\r\n))*\Z"))
+
+
+_trailerPattern = re.compile(b_(r"trailer\s*"))
+_eofPattern = re.compile(b_(r"%%EOF(?:\r\n|\r|\n)?"))
+
+
+def _searchStream(stream, regex, start, blockSize=65536):
+    # Returns the offsets at which *regex* first matches the contents of
+    # *stream* from offset *start* on, as a (start, end) pair, or None.  The
+    # stream is read in blocks, which overlap so that a match that
+    # straddles two of them is found.
+    overlap = 64
+    pos = start
+    while True:
+        stream.seek(pos, 0)
+        data = stream.read(blockSize)
+        m = regex.search(data)
+        if m is not None and (m.end() < len(data) or len(data) < blockSize):
+            return pos + m.start(), pos + m.end()
+        if len(data) < blockSize:
+            return None
+        pos += len(data) - overlap
+
+
+def _decodeXrefStreamRecords(data, pos, entrySizes, count):
+    # Decodes *count* records of a cross-reference stream, laid out as
+    # described by its /W array, starting at offset *pos* of the decoded
+    # stream data.  Returns the type, second and third fields as three lists.
+    widths = [int(w) for w in entrySizes]
+    if max(widths[:3]) > 8:
+        raise utils.PdfReadError("invalid size in convertToInt")
+    stride = sum(widths)
+    if stride:
+        # records past the end of truncated stream data are dropped
+        count = max(0, min(count, (len(data) - pos) // stride))
+    end = pos + count * stride
+    if numpy != None:
+        records = numpy.frombuffer(data, numpy.uint8, count * stride, pos)
+        records = records.reshape(count, stride)
+    columns = []
+    start = 0
+    for i, width in enumerate(widths[:3]):
+        if width == 0:
+            # PDF Spec Table 17: A value of zero for an element in the W
+            # array indicates...the default value shall be used
+            columns.append([1 if i == 0 else 0] * count)
+        elif numpy != None:
+            column = numpy.zeros(count, numpy.uint64)
+            for j in range(start, start + width):
+                column <<= numpy.uint64(8)
+                column |= records[:, j]
+            columns.append(column.tolist())
+        elif version_info < (3, 0):
+            columns.append([convertToInt(data[k:k + width], width)
+                            for k in range(pos + start, end, stride)])
+        elif width == 1:
+            columns.append(list(data[pos + start:end:stride]))
+        else:
+            fromBytes = int.from_bytes
+            columns.append([fromBytes(data[k:k + width], "big")
+                            for k in range(pos + start, end, stride)])
+        start += width
+    return columns
+
+def _estimateObjectSize(obj):
+    # A rough estimate of the memory held by a parsed object, good enough to
+    # weigh cache entries against each other and against the cache budget.
+    # Indirect references count as small, since they are cached separately.
+    size = 64
+    if isinstance(obj, StreamObject):
+        # look at the instance only: ContentStream computes _data on demand
+        data = vars(obj).get("_rawData")
+        if data:
+            size += len(data)
+        if obj.decodedSelf is not None:
+            size += _estimateObjectSize(obj.decodedSelf)
+    if isinstance(obj, dict):
+        for key, value in dict.items(obj):
+            size += 16 + len(key) + _estimateObjectSize(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            size += 8 + _estimateObjectSize(value)
+    elif isinstance(obj, (utils.bytes_type, utils.string_type)):
+        size += len(obj)
+    return size
+
+def _releaseObject(obj):
+    # Called for objects evicted from a bounded reader cache.  A caller may
+    # still hold on to a stream, so drop its decoded data explicitly; it is
+    # decoded again if needed.
+    if isinstance(obj, EncodedStreamObject):
+        obj.decodedSelf = None
+        obj.cacheEntry = None
+
+def _readPreviousLine(data, pos, start):
+    # Does what PdfFileReader.readNextEndLine does from position *pos* of
+    # the block *data*, read from offset *start* of the file, but without a
+    # seek per byte: returns the line ending at *pos* and the position of the
+    # end of the line before it, or None if the block has to be extended
+    # further back first.
+    eol = (b_("\n"), b_("\r"))
+    q = max(data.rfind(eol[0], 0, pos + 1), data.rfind(eol[1], 0, pos + 1))
+    if q < 3 and start > 0:
+        return None
+    if q < 1:
+        raise utils.PdfReadError("Could not read malformed PDF file")
+    line = data[q + 1:pos + 1]
+    # skip back over the line break, exactly as readNextEndLine does
+    pos = q - 1
+    x = eol[0]
+    crlf = False
+    while x in eol:
+        if pos < 1 and start > 0:
+            return None
+        x = data[pos:pos + 1]
+        pos += 1
+        if x in eol:
+            pos -= 1
+            crlf = True
+        if start + pos < 2:
+            raise utils.PdfReadError("EOL marker not found")
+        pos -= 2
+    pos += 2 if crlf else 1
+    return line, pos
+
 def convertToInt(d, size):
     if size > 8:
         raise utils.PdfReadError("invalid size in convertToInt")
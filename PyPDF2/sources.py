@@ -0,0 +1,355 @@
+"""
+Byte sources that PdfFileReader can read a PDF file from.
+
+A PDF is read by random access: the trailer first, then the xref sections,
+then whichever objects the caller touches.  The classes in this module give
+the reader a seekable, file-like view of the document's bytes without
+copying the whole file into memory first.
+"""
+
+import mmap
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from .utils import isString, PdfReadError
+
+if sys.version_info[0] < 3:
+    BUFFER_TYPES = (bytearray, memoryview, mmap.mmap)
+    BytesIO = None
+else:
+    BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+    from io import BytesIO
+
+
+class BufferStream(object):
+    """
+    A read-only, seekable file-like object over a bytes-like buffer: a
+    ``bytes``, ``bytearray``, ``memoryview`` or ``mmap`` object.  The buffer
+    is never copied; every :meth:`read` is a slice of it, so the cost of a
+    read is proportional to the number of bytes requested, not to the size
+    of the buffer.
+
+    :param buf: the buffer to read from.
+    :param str name: optional name (usually the path of the file the buffer
+        was mapped from).
+    """
+    mode = "rb"
+
+    def __init__(self, buf, name=None):
+        if isinstance(buf, (bytearray, memoryview)):
+            buf = memoryview(buf)
+            if hasattr(buf, "cast") and (buf.ndim != 1 or buf.format != "B"):
+                buf = buf.cast("B")
+            self._tobytes = True
+        else:
+            self._tobytes = False
+        self._mapped = isinstance(buf, mmap.mmap)
+        self._buf = buf
+        self._size = len(buf)
+        self._pos = 0
+        self.name = name if name is not None else "<buffer>"
+        if self._mapped:
+            # mmap objects already implement read() and tell() in C, which
+            # matters for the parser's many one-byte reads; only seek() needs
+            # wrapping, to get BytesIO's lenient handling of out-of-range
+            # positions.
+            buf.seek(0)
+            self.read = buf.read
+            self.tell = buf.tell
+        elif BytesIO is not None and type(buf) is bytes:
+            # A BytesIO shares an immutable bytes object rather than copying
+            # it, and does all three in C.
+            fileobj = BytesIO(buf)
+            self.read = fileobj.read
+            self.seek = fileobj.seek
+            self.tell = fileobj.tell
+
+    def read(self, size=-1):
+        start = self._pos
+        if size is None or size < 0:
+            end = self._size
+        else:
+            end = min(start + size, self._size)
+        if end <= start:
+            return b""
+        self._pos = end
+        if self._tobytes:
+            return self._buf[start:end].tobytes()
+        return self._buf[start:end]
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            if offset < 0:
+                raise ValueError("negative seek value %d" % offset)
+            pos = offset
+        elif whence == 1:
+            pos = max(0, self.tell() + offset)
+        elif whence == 2:
+            pos = max(0, self._size + offset)
+        else:
+            raise ValueError("invalid whence (%r, should be 0, 1 or 2)" % whence)
+        self._pos = pos
+        if self._mapped:
+            self._buf.seek(min(pos, self._size))
+        return pos
+
+    def tell(self):
+        return self._pos
+
+    def getbuffer(self):
+        """
+        Returns the underlying buffer, for callers that want to slice or
+        search it directly instead of going through :meth:`read`.
+        """
+        return self._buf
+
+    def read_at(self, offset, length):
+        """
+        Returns a copy of *length* bytes starting at *offset*, as
+        :meth:`ByteSource.read_at` does, without moving the position.  No
+        view of the buffer is kept, so it can still be closed.
+        """
+        if self._buf is None:
+            raise ValueError("I/O operation on closed buffer")
+        return bytes(self._buf[offset:offset + length])
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._buf = None
+
+    closed = property(lambda self: self._buf is None or
+                      getattr(self._buf, "closed", False))
+
+
+class ByteSource(object):
+    """
+    Random access to the bytes of a document that is not necessarily a local
+    file, such as an object in remote storage.  Subclasses implement
+    :meth:`read_at` and set :attr:`size`; :class:`SourceStream` turns a
+    source into a stream that :class:`PdfFileReader<PyPDF2.PdfFileReader>`
+    can read from, fetching only the parts of the document that are used.
+
+    :ivar int size: the total number of bytes.
+    :ivar str name: a name for messages, such as a path or URL.
+    """
+    size = 0
+    name = "<source>"
+
+    def read_at(self, offset, length):
+        """
+        Returns *length* bytes starting at *offset*, or fewer only if the
+        end of the source is reached.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileSource(ByteSource):
+    """
+    Reads a local file with positioned reads (``os.pread``), which leave no
+    file position to share, so one source can serve several streams.
+
+    :param str path: path of the file.
+    """
+    def __init__(self, path):
+        self.name = path
+        self._file = open(path, "rb")
+        self._lock = threading.Lock() # only needed without os.pread
+        self.size = os.fstat(self._file.fileno()).st_size
+
+    def read_at(self, offset, length):
+        if hasattr(os, "pread"):
+            return os.pread(self._file.fileno(), length, offset)
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def close(self):
+        self._file.close()
+
+
+class MemorySource(ByteSource):
+    """
+    Serves a document held in a bytes-like object.
+
+    :param buf: the document.
+    """
+    name = "<buffer>"
+
+    def __init__(self, buf):
+        self._buf = buf
+        self.size = len(buf)
+
+    def read_at(self, offset, length):
+        return bytes(self._buf[offset:offset + length])
+
+
+class CallbackSource(ByteSource):
+    """
+    Reads through a function supplied by the caller, for example one that
+    makes HTTP range requests.
+
+    :param fetch: function called as ``fetch(offset, length)``, returning the
+        bytes as :meth:`ByteSource.read_at` does.
+    :param int size: the total number of bytes.
+    :param str name: optional name of the document.
+    """
+    def __init__(self, fetch, size, name=None):
+        self.fetch = fetch
+        self.size = size
+        if name is not None:
+            self.name = name
+
+    def read_at(self, offset, length):
+        return self.fetch(offset, length)
+
+
+class SourceStream(object):
+    """
+    A read-only, seekable file-like object over a :class:`ByteSource`.
+    Reads go through a cache of fixed-size blocks: a read fetches the blocks
+    it covers that are not cached, with a single :meth:`ByteSource.read_at`
+    call spanning all of them, and the least recently used blocks are
+    dropped when the cache is full.
+
+    :param source: the :class:`ByteSource`.
+    :param int blockSize: size of a block in bytes.
+    :param int maxBlocks: number of blocks to keep; the cache holds up to
+        ``blockSize * maxBlocks`` bytes.
+    """
+    mode = "rb"
+
+    def __init__(self, source, blockSize=65536, maxBlocks=256):
+        self.source = source
+        self.name = source.name
+        self.blockSize = blockSize
+        self.maxBlocks = maxBlocks
+        self.fetches = 0 # number of read_at calls, for diagnostics
+        self.closed = False
+        self._size = source.size
+        self._blocks = OrderedDict() # block number -> bytes, LRU first
+        self._pos = 0
+        self._block = b""   # the block read last, which serves the many
+        self._blockStart = 0 # small reads of the parser
+
+    def read(self, size=-1):
+        pos = self._pos
+        if size is None or size < 0:
+            end = self._size
+        else:
+            end = min(pos + size, self._size)
+        if end <= pos:
+            return b""
+        self._pos = end
+        start = self._blockStart
+        if start <= pos and end <= start + len(self._block):
+            return self._block[pos - start:end - start]
+        return self._readBlocks(pos, end)
+
+    def _readBlocks(self, pos, end):
+        bs = self.blockSize
+        blocks = self._blocks
+        first, last = pos // bs, (end - 1) // bs
+        missing = [n for n in range(first, last + 1) if n not in blocks]
+        if missing:
+            # one request for the whole run, including any cached blocks in
+            # between, rather than one per block
+            offset = missing[0] * bs
+            length = min((missing[-1] + 1) * bs, self._size) - offset
+            data = self.source.read_at(offset, length)
+            self.fetches += 1
+            if len(data) < length:
+                raise PdfReadError("%s: got %d bytes at offset %d, expected %d" %
+                                   (self.name, len(data), offset, length))
+            for n in range(missing[0], missing[-1] + 1):
+                i = n * bs - offset
+                blocks[n] = data[i:i + bs]
+        chunks = []
+        for n in range(first, last + 1):
+            block = blocks.pop(n)
+            blocks[n] = block
+            chunks.append(block)
+        while len(blocks) > max(self.maxBlocks, last - first + 1):
+            blocks.popitem(last=False)
+        self._block = chunks[-1]
+        self._blockStart = last * bs
+        if len(chunks) == 1:
+            return chunks[0][pos - first * bs:end - first * bs]
+        return b"".join(chunks)[pos - first * bs:end - first * bs]
+
+    def prefetch(self, offset, length):
+        """
+        Fetches the bytes from *offset* to ``offset + length`` into the cache
+        with a single request, if they fit, without moving the position.
+        """
+        end = min(offset + length, self._size)
+        if offset < end and end - offset <= self.blockSize * self.maxBlocks:
+            self._readBlocks(offset, end)
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            if offset < 0:
+                raise ValueError("negative seek value %d" % offset)
+            self._pos = offset
+        elif whence == 1:
+            self._pos = max(0, self._pos + offset)
+        elif whence == 2:
+            self._pos = max(0, self._size + offset)
+        else:
+            raise ValueError("invalid whence (%r, should be 0, 1 or 2)" % whence)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        self._blocks.clear()
+        self._block = b""
+        self.closed = True
+        self.source.close()
+
+
+def mapFile(path):
+    """
+    Opens the file at *path* as a :class:`BufferStream` backed by a read-only
+    memory map, so that only the pages of the file that are actually read
+    are loaded.  Files that cannot be mapped (empty files, pipes, some
+    network file systems) are read into memory instead.
+    """
+    fileobj = open(path, "rb")
+    try:
+        try:
+            buf = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            buf = fileobj.read()
+    finally:
+        fileobj.close()
+    return BufferStream(buf, name=path)
+
+
+def openSource(source):
+    """
+    Turns the *source* argument of :class:`PdfFileReader<PyPDF2.PdfFileReader>`
+    into a seekable binary stream.  Paths are memory-mapped, bytes-like
+    objects are wrapped without copying, a :class:`ByteSource` is read
+    through a :class:`SourceStream`, and anything else is assumed to already
+    be a file-like object and is returned unchanged.
+    """
+    if isString(source):
+        return mapFile(source)
+    if isinstance(source, BUFFER_TYPES):
+        return BufferStream(source)
+    if isinstance(source, ByteSource):
+        return SourceStream(source)
+    return source
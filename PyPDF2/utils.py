@@ -33,12 +33,19 @@ __author_email__ = "biziqe@mathieu.fenniak.net"
 
 
 import sys
+import threading
+from collections import OrderedDict
 
 try:
     import __builtin__ as builtins
 except ImportError:  # Py3
     import builtins
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 xrange_fn = getattr(builtins, "xrange", range)
 _basestring = getattr(builtins, "basestring", str)
@@ -165,21 +172,182 @@ class ConvertFunctionsToVirtualList(object):
         return self.getFunction(index)
 
 
+class ObjectCache(dict):
+    """
+    A dictionary that keeps the total size of its values under a budget by
+    evicting the least recently used ones.  Used by
+    :class:`PdfFileReader<PyPDF2.PdfFileReader>` for its cache of resolved
+    objects when a ``cache_bytes`` limit is given.
+
+    :param int maxBytes: the budget, in (estimated) bytes.
+    :param sizeof: function returning the estimated size of a value.
+    :param onEvict: optional function called with each evicted value.
+
+    Lookups through :meth:`get` and ``[]`` mark an entry as recently used.
+    Pinned keys are never evicted, and neither is the most recently used
+    entry, so that a value larger than the budget is still cached until the
+    next insertion.
+    """
+    def __init__(self, maxBytes, sizeof, onEvict=None):
+        dict.__init__(self)
+        self.maxBytes = maxBytes
+        self.sizeof = sizeof
+        self.onEvict = onEvict
+        self.size = 0
+        self._sizes = OrderedDict() # key -> size, least recently used first
+        self._pinned = set()
+        self._lock = threading.RLock()
+
+    def _touch(self, key):
+        size = self._sizes.pop(key, None)
+        if size is not None:
+            self._sizes[key] = size
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._touch(key)
+            return dict.get(self, key, default)
+
+    def __getitem__(self, key):
+        with self._lock:
+            self._touch(key)
+            return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self.size -= self._sizes.pop(key, 0)
+            dict.__setitem__(self, key, value)
+            size = self.sizeof(value)
+            self._sizes[key] = size
+            self.size += size
+            self._evict()
+
+    def __delitem__(self, key):
+        with self._lock:
+            dict.__delitem__(self, key)
+            self.size -= self._sizes.pop(key)
+
+    def pop(self, key, *default):
+        with self._lock:
+            self.size -= self._sizes.pop(key, 0)
+            return dict.pop(self, key, *default)
+
+    def clear(self):
+        with self._lock:
+            dict.clear(self)
+            self._sizes.clear()
+            self.size = 0
+
+    def resize(self, key):
+        """
+        Measures the value of *key* again, after it has grown or shrunk in
+        place, and evicts other entries if the budget is now exceeded.
+        """
+        with self._lock:
+            if key in self._sizes:
+                size = self.sizeof(dict.__getitem__(self, key))
+                self.size += size - self._sizes.pop(key)
+                self._sizes[key] = size
+                self._evict()
+
+    def pin(self, key):
+        """Exempts *key* from eviction; it need not be cached yet."""
+        with self._lock:
+            self._pinned.add(key)
+
+    def unpin(self, key):
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def _evict(self):
+        sizes = self._sizes
+        if self.size <= self.maxBytes or not sizes:
+            return
+        newest = next(reversed(sizes))
+        skipped = 0
+        while self.size > self.maxBytes and skipped < len(sizes):
+            key = next(iter(sizes))
+            if key == newest:
+                break
+            if key in self._pinned:
+                # move it out of the way, behind the newest entry, so that it
+                # is not looked at again in this pass
+                sizes[key] = sizes.pop(key)
+                skipped += 1
+                continue
+            self.size -= sizes.pop(key)
+            value = dict.pop(self, key)
+            if self.onEvict is not None:
+                self.onEvict(value)
+
+
 def RC4_encrypt(key, plaintext):
-    S = [i for i in range(256)]
+    """
+    Encrypts *plaintext* with the RC4 cipher under *key*; as RC4 is
+    symmetric, this also decrypts.  The keystream is generated into a
+    buffer first and XORed with the data in one operation.
+    """
+    if isString(key):
+        key = b_(key)
+    if isString(plaintext):
+        plaintext = b_(plaintext)
+    S = _rc4Schedule(bytes(key))
+    length = len(plaintext)
+    keystream = bytearray(length)
+    i = j = 0
+    for k in xrange_fn(length):
+        i = (i + 1) & 255
+        si = S[i]
+        j = (j + si) & 255
+        sj = S[j]
+        S[i] = sj
+        S[j] = si
+        keystream[k] = S[(si + sj) & 255]
+    return xorBytes(plaintext, keystream)
+
+
+# the initial permutations of the most recently used RC4 keys: the strings
+# and stream of one object share a key
+_rc4Schedules = OrderedDict()
+_rc4SchedulesLock = threading.Lock()
+
+
+def _rc4Schedule(key):
+    # Runs the RC4 key-scheduling algorithm, returning a fresh copy of the
+    # permutation for *key*.
+    with _rc4SchedulesLock:
+        S = _rc4Schedules.pop(key, None)
+        if S is not None:
+            _rc4Schedules[key] = S
+            return bytearray(S)
+    S = bytearray(xrange_fn(256))
+    keyBytes = bytearray(key)
+    keyLength = len(keyBytes)
     j = 0
-    for i in range(256):
-        j = (j + S[i] + ord_(key[i % len(key)])) % 256
+    for i in xrange_fn(256):
+        j = (j + S[i] + keyBytes[i % keyLength]) & 255
         S[i], S[j] = S[j], S[i]
-    i, j = 0, 0
-    retval = []
-    for x in range(len(plaintext)):
-        i = (i + 1) % 256
-        j = (j + S[i]) % 256
-        S[i], S[j] = S[j], S[i]
-        t = S[(S[i] + S[j]) % 256]
-        retval.append(b_(chr(ord_(plaintext[x]) ^ t)))
-    return b_("").join(retval)
+    with _rc4SchedulesLock:
+        _rc4Schedules[key] = bytes(S)
+        if len(_rc4Schedules) > 64:
+            _rc4Schedules.popitem(last=False)
+    return S
+
+
+def xorBytes(a, b):
+    """
+    Returns the bytes of *a* XORed with those of *b*, which has the same
+    length.
+    """
+    length = len(a)
+    if numpy is not None and length >= 1024:
+        return numpy.bitwise_xor(numpy.frombuffer(a, numpy.uint8),
+                                 numpy.frombuffer(b, numpy.uint8)).tobytes()
+    if hasattr(int, "from_bytes"):
+        return (int.from_bytes(a, "big") ^
+                int.from_bytes(b, "big")).to_bytes(length, "big")
+    return bytes(bytearray(x ^ y for x, y in zip(bytearray(a), b)))
 
 
 def matrixMultiply(a, b):
@@ -214,6 +382,10 @@ class PageSizeNotDefinedError(PyPdfError):
     pass
 
 
+class PdfTimeoutError(PyPdfError):
+    pass
+
+
 class PdfReadWarning(UserWarning):
     pass
 
@@ -222,6 +394,10 @@ class PdfStreamError(PdfReadError):
     pass
 
 
+class PdfSizeLimitError(PdfStreamError):
+    pass
+
+
 if sys.version_info[0] < 3:
     def b_(s):
         return s
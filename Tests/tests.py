@@ -1,9 +1,27 @@
 import binascii
 import os
+import shutil
+import struct
 import sys
+import tempfile
 import unittest
+import zlib
+from io import BytesIO
 
-from PyPDF2 import PdfFileReader, PdfFileWriter
+from PyPDF2 import PdfFileReader, PdfFileWriter, batch, pdf
+from PyPDF2 import filters
+from PyPDF2.filters import (ASCII85Decode, ASCIIHexDecode, FlateDecode, LZWDecode,
+                            RunLengthDecode, decodePredictor, getDecoder)
+from PyPDF2.generic import EncodedStreamObject, IndirectObject, NameObject, readObject, \
+    readStringFromStream
+from PyPDF2.sources import BufferStream, CallbackSource, FileSource, SourceStream
+from PyPDF2.utils import PdfReadError, PdfSizeLimitError, RC4_encrypt
+
+try:
+    import asyncio
+    from PyPDF2 import aio
+except (ImportError, SyntaxError):
+    aio = None
 
 # Configure path environment
 TESTS_ROOT = os.path.abspath(os.path.dirname(__file__))
@@ -14,6 +32,31 @@ TABLES_ROOT = os.path.join(PROJECT_ROOT, 'PDF_Samples', 'tables')
 sys.path.append(PROJECT_ROOT)
 
 
+def makePdf(objects, eol=b' \n', trailer=b''):
+    '''
+    Builds a PDF file from the bodies of objects 1, 2, ..., of which the
+    first is the catalog. Each xref table entry ends with *eol*, or with
+    the items of *eol* in turn if it is a list. *trailer* holds more
+    entries of the trailer dictionary.
+    '''
+    out = BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(('%d 0 obj\n' % num).encode('ascii') + body + b'\nendobj\n')
+    startxref = out.tell()
+    eols = eol if isinstance(eol, list) else [eol]
+    entries = [b'0000000000 65535 f'] + [('%010d 00000 n' % offset).encode('ascii')
+                                         for offset in offsets]
+    out.write(('xref\n0 %d\n' % len(entries)).encode('ascii'))
+    for i, entry in enumerate(entries):
+        out.write(entry + eols[i % len(eols)])
+    out.write(('trailer\n<< /Size %d /Root 1 0 R ' % len(entries)).encode('ascii') + trailer +
+              ('>>\nstartxref\n%d\n%%%%EOF\n' % startxref).encode('ascii'))
+    return out.getvalue()
+
+
 class PdfReaderTestCases(unittest.TestCase):
     def test_PdfReaderFileLoad(self):
         '''
@@ -60,6 +103,428 @@ class PdfReaderTestCases(unittest.TestCase):
                              msg='PDF extracted image differs from expected value.\n\nExpected:\n\n%r\n\nExtracted:\n\n%r\n\n'
                                  % (imagetext, binascii.hexlify(data).decode()))
 
+    def test_PdfReaderBufferSources(self):
+        '''
+        Test loading a file from a path (memory-mapped), from bytes and from
+        a memoryview. Expected outcome: all sources give the same text.
+        '''
+        path = os.path.join(RESOURCE_ROOT, 'crazyones.pdf')
+        with open(path, 'rb') as inputfile:
+            data = inputfile.read()
+
+        texts = []
+        for source in (path, data, memoryview(data), bytearray(data)):
+            ipdf = PdfFileReader(source)
+            self.assertEqual(ipdf.getNumPages(), 1)
+            texts.append(ipdf.getPage(0).extractText())
+        self.assertEqual(len(set(texts)), 1)
+
+    def test_PdfReaderTrailerVariants(self):
+        '''
+        Test locating startxref in files with CR+LF line breaks, trailing
+        blank lines and the offset on the same line as the keyword. Expected
+        outcome: all variants load.
+        '''
+        with open(os.path.join(RESOURCE_ROOT, 'crazyones.pdf'), 'rb') as inputfile:
+            data = inputfile.read()
+        tail = b'startxref\n11160\n%%EOF\n'
+        self.assertTrue(data.endswith(tail))
+        body = data[:-len(tail)]
+        for tail in (b'startxref\r\n11160\r\n%%EOF\r\n',
+                     b'startxref\n11160\n%%EOF\n\n\n\n',
+                     b'startxref 11160\n%%EOF'):
+            ipdf = PdfFileReader(body + tail)
+            self.assertEqual(ipdf.getNumPages(), 1)
+
+    def test_PdfReaderXrefTableLayouts(self):
+        '''
+        Test reading xref tables whose entries end in a space and CR or LF,
+        CR+LF, a space and CR+LF, a bare LF, or a mix of these. Expected
+        outcome: the same xref map and objects as with the standard layout.
+        '''
+        objects = [b'<< /Type /Catalog /Pages 2 0 R >>',
+                   b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+                   b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R >>',
+                   b'<< /Length 11 >>\nstream\n0 0 m 1 1 l\nendstream',
+                   b'(text)', b'[1 2 3]']
+        expected = PdfFileReader(BytesIO(makePdf(objects, b' \n')))
+        self.assertEqual(sorted(expected.xref[0]), list(range(1, 7)))
+        for eol in (b' \r', b'\r\n', b' \r\n', b'\n', [b' \n', b' \r\n', b'\n', b'\r\n', b' \r']):
+            ipdf = PdfFileReader(BytesIO(makePdf(objects, eol)))
+            self.assertEqual(ipdf.xref, expected.xref)
+            for num in range(1, 7):
+                # repr, since references compare equal only within a reader
+                self.assertEqual(repr(ipdf.getObject(IndirectObject(num, 0, ipdf))),
+                                 repr(expected.getObject(IndirectObject(num, 0, expected))))
+            self.assertEqual(ipdf.getPage(0)['/Contents'].getData(), b'0 0 m 1 1 l')
+
+    def test_PdfReaderXrefStreamRecords(self):
+        '''
+        Test decoding xref stream records of various field widths, with
+        NumPy if it is installed and without. Expected outcome: both give
+        the fields written, a zero width gives the default, and records
+        missing from truncated data are dropped.
+        '''
+        def records(widths, rows):
+            return b''.join(b''.join(struct.pack('>Q', value)[8 - width:]
+                                     for width, value in zip(widths, row) if width)
+                            for row in rows)
+        rows = [(i % 3, (i * 2654435761) % (1 << 56), i % 256) for i in range(50)]
+        cases = []
+        for widths in ([1, 1, 1], [1, 2, 1], [1, 3, 2], [1, 4, 2], [2, 7, 1], [1, 8, 3]):
+            fitted = [tuple(value % (1 << (8 * width)) for width, value in zip(widths, row))
+                      for row in rows]
+            cases.append((records(widths, fitted), widths, fitted))
+        fitted = [(1, offset % 65536, 0) for kind, offset, gen in rows]
+        cases.append((records([0, 2, 0], fitted), [0, 2, 0], fitted))
+
+        numpy = pdf.numpy
+        results = []
+        try:
+            for useNumpy in (True, False):
+                if not useNumpy:
+                    pdf.numpy = None
+                decoded = []
+                for data, widths, fitted in cases:
+                    stride = sum(widths)
+                    # two subsections, as listed in /Index
+                    first = pdf._decodeXrefStreamRecords(data, 0, widths, 20)
+                    second = pdf._decodeXrefStreamRecords(data, 20 * stride, widths, 30)
+                    self.assertEqual(list(zip(*first)) + list(zip(*second)), fitted)
+                    truncated = pdf._decodeXrefStreamRecords(data[:-stride - 1], 0, widths, 50)
+                    self.assertEqual(list(zip(*truncated)), fitted[:48])
+                    decoded.append((first, second, truncated))
+                results.append(decoded)
+        finally:
+            pdf.numpy = numpy
+        self.assertEqual(results[0], results[1])
+
+        # a file whose xref stream has two subsections
+        out = BytesIO()
+        out.write(b'%PDF-1.5\n')
+        offsets = []
+        for num, body in enumerate([b'<< /Type /Catalog /Pages 2 0 R >>',
+                                    b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+                                    b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 50 50] >>'], 1):
+            offsets.append(out.tell())
+            out.write(('%d 0 obj\n' % num).encode('ascii') + body + b'\nendobj\n')
+        startxref = out.tell()
+        data = records([1, 2, 1], [(0, 0, 255), (1, offsets[0], 0)]) + \
+            records([1, 2, 1], [(1, offset, 0) for offset in offsets[1:]] + [(1, startxref, 0)])
+        out.write(('4 0 obj\n<< /Type /XRef /Size 5 /Index [0 2 2 3] /W [1 2 1] '
+                   '/Root 1 0 R /Length %d >>\nstream\n' % len(data)).encode('ascii'))
+        out.write(data + ('\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n' % startxref).encode('ascii'))
+        ipdf = PdfFileReader(out)
+        self.assertEqual(ipdf.xref[0], {1: offsets[0], 2: offsets[1], 3: offsets[2], 4: startxref})
+        self.assertEqual(ipdf.getPage(0).mediaBox.getWidth(), 50)
+
+    def test_PdfReaderLazyPageTree(self):
+        '''
+        Test retrieving pages of a file with a nested page tree without
+        flattening it. Expected outcome: the page tree is not flattened and
+        the pages match the ones found by flattening.
+        '''
+        path = os.path.join(TABLES_ROOT, 'sample123.pdf')
+        ipdf = PdfFileReader(path)
+        self.assertEqual(ipdf.getNumPages(), 11)
+        page = ipdf.getPage(7)
+        self.assertIsNone(ipdf.flattenedPages)
+        self.assertIs(ipdf.getPage(7), page)
+
+        flat = PdfFileReader(path)
+        flat._flatten()
+        for num in range(ipdf.getNumPages()):
+            self.assertEqual(ipdf.getPage(num).indirectRef.idnum,
+                             flat.flattenedPages[num].indirectRef.idnum)
+            self.assertEqual(ipdf.getPage(num).mediaBox, flat.flattenedPages[num].mediaBox)
+        self.assertEqual(ipdf.getPage(-1).indirectRef.idnum,
+                         flat.flattenedPages[-1].indirectRef.idnum)
+        self.assertRaises(IndexError, ipdf.getPage, 11)
+
+    def test_PdfReaderInconsistentPageTree(self):
+        '''
+        Test page trees whose /Count entries do not match their pages.
+        Expected outcome: the pages and page count are those found by
+        flattening the tree.
+        '''
+        def page(width):
+            return b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 ' + width + b' 100] >>'
+        catalog = b'<< /Type /Catalog /Pages 2 0 R >>'
+        data = makePdf([catalog, b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 3 >>',
+                        page(b'100'), page(b'200')])
+        ipdf = PdfFileReader(BytesIO(data))
+        self.assertEqual(ipdf.getNumPages(), 2)
+        self.assertEqual([p.mediaBox.getWidth() for p in ipdf.pages], [100, 200])
+
+        data = makePdf([catalog, b'<< /Type /Pages /Kids [3 0 R 6 0 R] /Count 3 >>',
+                        b'<< /Type /Pages /Parent 2 0 R /Kids [4 0 R 5 0 R] /Count 1 >>',
+                        page(b'100'), page(b'200'), page(b'300')])
+        ipdf = PdfFileReader(BytesIO(data))
+        self.assertEqual(ipdf.getPage(1).mediaBox.getWidth(), 200)
+        self.assertEqual(ipdf.getPage(2).mediaBox.getWidth(), 300)
+        self.assertEqual(ipdf.getNumPages(), 3)
+        self.assertEqual([p.mediaBox.getWidth() for p in ipdf.pages], [100, 200, 300])
+
+    def test_PdfReaderLoadObjectStream(self):
+        '''
+        Test reading all objects of an object stream at once. Expected
+        outcome: the objects match the ones resolved one by one.
+        '''
+        path = os.path.join(RESOURCE_ROOT, 'crazyones.pdf')
+        ipdf = PdfFileReader(path)
+        other = PdfFileReader(path)
+        stmnums = set(stmnum for stmnum, idx in ipdf.xref_objStm.values())
+        self.assertTrue(stmnums)
+        for stmnum in stmnums:
+            refs = ipdf.loadObjectStream(stmnum)
+            self.assertTrue(refs)
+            for ref in refs:
+                self.assertIn((0, ref.idnum), ipdf.resolvedObjects)
+                self.assertEqual(repr(ref.getObject()), repr(other.getObject(ref)))
+
+    def test_PdfReaderCacheBytes(self):
+        '''
+        Test reading a file with a small object cache. Expected outcome:
+        the text is the same as with an unlimited cache, objects are evicted
+        and the catalog stays cached.
+        '''
+        path = os.path.join(TABLES_ROOT, 'sample123.pdf')
+        unlimited = PdfFileReader(path)
+        limited = PdfFileReader(path, cache_bytes=4096)
+        for i in range(unlimited.getNumPages()):
+            self.assertEqual(limited.getPage(i).extractText(),
+                             unlimited.getPage(i).extractText())
+        self.assertLess(len(limited.resolvedObjects), len(unlimited.resolvedObjects))
+        root = limited.trailer.raw_get('/Root')
+        self.assertIn((root.generation, root.idnum), limited.resolvedObjects)
+
+    def test_PdfReaderByteSource(self):
+        '''
+        Test reading a page through a fetch callback. Expected outcome: the
+        same text as reading the file, with only part of the file fetched
+        in a few coalesced requests.
+        '''
+        path = os.path.join(TABLES_ROOT, 'GeoBase_NHNC1_Data_Model_UML_EN.pdf')
+        with open(path, 'rb') as f:
+            data = f.read()
+        fetched = []
+        def fetch(offset, length):
+            fetched.append(length)
+            return data[offset:offset + length]
+        stream = SourceStream(CallbackSource(fetch, len(data)), blockSize=4096)
+        ipdf = PdfFileReader(stream)
+        self.assertEqual(ipdf.getPage(0).extractText(),
+                         PdfFileReader(FileSource(path)).getPage(0).extractText())
+        self.assertEqual(stream.fetches, len(fetched))
+        self.assertLess(sum(fetched), len(data) // 4)
+
+    def test_PdfReaderRebuildXref(self):
+        '''
+        Test reading files whose xref table cannot be found. Expected
+        outcome: an error in strict mode; otherwise the table is rebuilt
+        from the objects in the file, including those in object streams.
+        '''
+        for path in (os.path.join(RESOURCE_ROOT, 'crazyones.pdf'),
+                     os.path.join(TABLES_ROOT, 'sample123.pdf')):
+            with open(path, 'rb') as f:
+                data = f.read()
+            expected = [p.extractText() for p in PdfFileReader(BytesIO(data)).pages]
+            startxref = data.rindex(b'startxref')
+            self.assertRaises(PdfReadError, PdfFileReader, BytesIO(data[:startxref]))
+            for damaged in (data[:startxref],
+                            data[:startxref] + b'startxref\n12\n%%EOF\n'):
+                ipdf = PdfFileReader(BytesIO(damaged), strict=False)
+                self.assertEqual([p.extractText() for p in ipdf.pages], expected)
+
+    def test_PdfReaderRevisions(self):
+        '''
+        Test listing and opening the revisions of an incrementally updated
+        file. Expected outcome: the original revision ends where its
+        linearization dictionary says, each revision has its own document
+        information, and the file can be closed while they are open.
+        '''
+        path = os.path.join(TABLES_ROOT, 'table.pdf')
+        ipdf = PdfFileReader(path)
+        self.assertEqual(ipdf.getRevisions(), [57615, os.path.getsize(path)])
+        original = ipdf.getRevision(0)
+        self.assertEqual(original.documentInfo['/ModDate'], "D:20140304180941-05'00'")
+        self.assertEqual(ipdf.documentInfo['/ModDate'], "D:20140304212414-05'00'")
+        self.assertEqual(ipdf.getRevision(-1).documentInfo, ipdf.documentInfo)
+        self.assertEqual(original.getPage(0).extractText(), ipdf.getPage(0).extractText())
+        ipdf.stream.close()
+        self.assertTrue(ipdf.stream.closed)
+
+    def test_PdfReaderOlderTrailers(self):
+        '''
+        Test an incremental update whose trailer does not repeat the /Info
+        and /ID of the original one. Expected outcome: the trailer has them
+        as soon as the file is opened, without the original xref table
+        being read, and reading that table later does not change it.
+        '''
+        data = makePdf([b'<< /Type /Catalog /Pages 2 0 R >>',
+                        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+                        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 100 100] >>',
+                        b'<< /Title (Old) >>'],
+                       trailer=b'/Info 4 0 R /ID [<01> <01>] ')
+        startxref = int(data.split(b'startxref\n')[1].split()[0])
+        offset = len(data)
+        data += b'3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] >>\nendobj\n'
+        xref = len(data)
+        data += (('xref\n3 1\n%010d 00000 n \ntrailer\n<< /Size 5 /Root 1 0 R /Prev %d >>\n'
+                  'startxref\n%d\n%%%%EOF\n') % (offset, startxref, xref)).encode('ascii')
+        ipdf = PdfFileReader(BytesIO(data))
+        self.assertNotIn(startxref, ipdf._xrefSections)
+        self.assertEqual(sorted(ipdf.trailer.keys()), ['/ID', '/Info', '/Prev', '/Root', '/Size'])
+        self.assertEqual(ipdf.getDocumentInfo(), {'/Title': 'Old'})
+        self.assertFalse(ipdf.isEncrypted)
+        trailer = dict(ipdf.trailer)
+        self.assertEqual(ipdf.getPage(0).mediaBox.getWidth(), 200)
+        ipdf._readNextXrefSection()
+        self.assertIn(startxref, ipdf._xrefSections)
+        self.assertEqual(dict(ipdf.trailer), trailer)
+
+    def test_PdfReaderFastFirstPage(self):
+        '''
+        Test reading the first page of a linearized file. Expected outcome:
+        the first page, page count and document information come from the
+        first part of the file and a few entries of the main xref table, and
+        the other pages are still readable.
+        '''
+        path = os.path.join(PROJECT_ROOT, 'PDF_Samples', 'Seige_of_Vicksburg_Sample_OCR.pdf')
+        with open(path, 'rb') as f:
+            data = f.read()
+        fetched = []
+        def fetch(offset, length):
+            fetched.append(length)
+            return data[offset:offset + length]
+        stream = SourceStream(CallbackSource(fetch, len(data)), blockSize=4096)
+        ipdf = PdfFileReader(stream, strict=False, fast_first_page=True)
+        expected = PdfFileReader(path, strict=False)
+        self.assertIsNotNone(ipdf.linearization)
+        self.assertEqual(ipdf.getNumPages(), 6)
+        self.assertEqual(ipdf.getPage(0).extractText(), expected.getPage(0).extractText())
+        self.assertEqual(ipdf.getDocumentInfo(), expected.getDocumentInfo())
+        self.assertLess(sum(fetched), len(data) // 4)
+        self.assertEqual(ipdf.getPage(5).extractText(), expected.getPage(5).extractText())
+
+    def test_PdfReaderLazyDecryption(self):
+        '''
+        Test reading an encrypted file. Expected outcome: stream data stays
+        encrypted until it is used, and then matches the unencrypted file.
+        '''
+        path = os.path.join(PROJECT_ROOT, 'PDF_Samples', 'AutoCad_Simple.pdf')
+        plain = PdfFileReader(path)
+        writer = PdfFileWriter()
+        for page in plain.pages:
+            writer.addPage(page)
+        writer.encrypt('secret')
+        output = BytesIO()
+        writer.write(output)
+
+        ipdf = PdfFileReader(output)
+        self.assertEqual(ipdf.decrypt('secret'), 1)
+        contents = ipdf.getPage(0)['/Contents'][0].getObject()
+        self.assertIsNotNone(contents._encryptionKey)
+        self.assertEqual(contents.getData(), plain.getPage(0)['/Contents'][0].getObject().getData())
+        self.assertIsNone(contents._encryptionKey)
+        self.assertEqual(ipdf.getPage(0).extractText(), plain.getPage(0).extractText())
+
+    def test_PdfReaderPasswordCache(self):
+        '''
+        Test RC4 against a known vector, and repeated password checks on an
+        encrypted file. Expected outcome: the password is checked once, and
+        later calls reuse the outcome.
+        '''
+        self.assertEqual(binascii.hexlify(RC4_encrypt(b'Key', b'Plaintext')), b'bbf316e8d940af0ad3')
+        writer = PdfFileWriter()
+        writer.addPage(PdfFileReader(os.path.join(PROJECT_ROOT, 'PDF_Samples', 'jpeg.pdf')).getPage(0))
+        writer.encrypt('', 'owner')
+        output = BytesIO()
+        writer.write(output)
+
+        ipdf = PdfFileReader(output)
+        checks = []
+        decrypt = ipdf._decrypt
+        ipdf._decrypt = lambda password: checks.append(password) or decrypt(password)
+        for i in range(3):
+            self.assertEqual(ipdf.getNumPages(), 1)
+            self.assertEqual(ipdf.decrypt('owner'), 2)
+            self.assertEqual(ipdf.decrypt('wrong'), 0)
+        self.assertEqual(checks, ['', 'owner', 'wrong'])
+        self.assertEqual(ipdf.getPage(0)['/MediaBox'], [0, 0, 595, 842])
+
+    def test_PdfReaderIndexCache(self):
+        '''
+        Test opening a file through an index cache. Expected outcome: the
+        second reader takes the xref table and page list from the cache and
+        reads the same pages; a cache written for other file contents is
+        ignored and rewritten.
+        '''
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, 'table.pdf')
+            shutil.copy(os.path.join(TABLES_ROOT, 'table.pdf'), path)
+            first = PdfFileReader(path, index_cache=True)
+            self.assertTrue(os.path.exists(path + '.index'))
+            self.assertIsNone(first._pageRefs)
+            second = PdfFileReader(path, index_cache=True)
+            self.assertIsNotNone(second._pageRefs)
+            self.assertEqual(second.xref, first.xref)
+            self.assertEqual(second.getNumPages(), first.getNumPages())
+            self.assertEqual(second.getPage(-1).extractText(), first.getPage(-1).extractText())
+            self.assertEqual(second.getRevisions(), first.getRevisions())
+
+            shutil.copy(os.path.join(PROJECT_ROOT, 'PDF_Samples', 'jpeg.pdf'), path)
+            other = PdfFileReader(path, index_cache=True)
+            self.assertIsNone(other._pageRefs)
+            self.assertEqual(other.getNumPages(), 1)
+
+            # without a path, a rewrite of the middle of the same size is
+            # noticed too
+            objects = [b'<< /Type /Catalog /Pages 2 0 R >>',
+                       b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+                       b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 10 10] >>',
+                       b'(' + b'a' * 200000 + b')']
+            data = makePdf(objects)
+            indexPath = os.path.join(tmp, 'buffer.index')
+            PdfFileReader(BytesIO(data), index_cache=indexPath)
+            self.assertIsNotNone(PdfFileReader(BytesIO(data), index_cache=indexPath)._pageRefs)
+            middle = len(data) // 2
+            data = data[:middle] + b'b' + data[middle + 1:]
+            self.assertIsNone(PdfFileReader(BytesIO(data), index_cache=indexPath)._pageRefs)
+
+            # a cache file that cannot be written leaves nothing behind
+            os.mkdir(os.path.join(tmp, 'dir.index'))
+            unwritten = PdfFileReader(BytesIO(data), index_cache=os.path.join(tmp, 'dir.index'))
+            self.assertEqual(unwritten.getNumPages(), 1)
+            self.assertEqual([name for name in os.listdir(tmp) if name.endswith('.tmp')], [])
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_PdfReaderPrefetchStreams(self):
+        '''
+        Test decoding the streams of pages in worker threads. Expected
+        outcome: the selected kinds of streams are decoded ahead, to the
+        same data as when read on demand, and the document's decoding limit
+        still applies.
+        '''
+        path = os.path.join(TABLES_ROOT, 'sample123.pdf')
+        plain = PdfFileReader(path)
+        ipdf = PdfFileReader(path)
+        self.assertRaises(ValueError, ipdf.prefetch_streams, kinds=['pictures'])
+        self.assertGreater(ipdf.prefetch_streams(pages=[0, 1], kinds=['content'], workers=2), 0)
+        contents = ipdf.getPage(1)['/Contents'].getObject()
+        self.assertIsNotNone(contents.decodedSelf)
+        self.assertIsNone(ipdf.getPage(2)['/Contents'].getObject().decodedSelf)
+        self.assertEqual(contents.getData(), plain.getPage(1)['/Contents'].getObject().getData())
+        self.assertGreater(ipdf.prefetch_streams(workers=4), 0)
+        self.assertEqual(ipdf.prefetchStreams(), 0)
+        self.assertEqual(ipdf.getPage(5).extractText(), plain.getPage(5).extractText())
+
+        limited = PdfFileReader(path, max_decoded_size=100000)
+        self.assertRaises(PdfSizeLimitError, limited.prefetch_streams, workers=2)
+        self.assertLessEqual(limited._decodeLimits.total, 100000)
+
 
 class AddJsTestCase(unittest.TestCase):
     def setUp(self):
@@ -178,3 +643,272 @@ class TablesPdfReader(unittest.TestCase):
             row2 = table_data[1]
             self.assertEqual(row2[0], 'table3')
             self.assertEqual(row2[1], 'table4')
+
+
+class ReadObjectTestCase(unittest.TestCase):
+    def test_buffer_parser(self):
+        '''
+        Test parsing an object from a buffer-backed stream. Expected outcome:
+        the objects and the position after them match the stream-based
+        parser.
+        '''
+        data = (b'<< /Type /XObject /Kids [1 0 R 12  0  R] /Rect [0 -1.5 +3 .25]'
+                b' % comment\n /Open true /Name (x) /Id <0a1B> /N null'
+                b' /Length 6 >>\nstream\r\nabcdef\nendstream 7 0 obj')
+
+        class PlainStream(object):
+            # a file-like object that does not expose its buffer
+            def __init__(self, data):
+                stream = BytesIO(data)
+                self.read, self.seek, self.tell = stream.read, stream.seek, stream.tell
+
+        plain = PlainStream(data)
+        expected = readObject(plain, None)
+        for stream in (BytesIO(data), BufferStream(data)):
+            obj = readObject(stream, None)
+            self.assertEqual(stream.tell(), plain.tell())
+            self.assertEqual(obj.getData(), b'abcdef')
+            self.assertEqual(sorted(obj.keys()), sorted(expected.keys()))
+            self.assertEqual(obj['/Rect'], expected['/Rect'])
+            self.assertEqual([repr(kid) for kid in obj.raw_get('/Kids')],
+                             ['IndirectObject(1, 0)', 'IndirectObject(12, 0)'])
+            self.assertEqual(obj['/Id'], expected['/Id'])
+            self.assertTrue(obj['/Open'].value)
+
+    def test_string_decoding(self):
+        '''
+        Test decoding literal and hexadecimal strings. Expected outcome:
+        escapes, nested parentheses, escaped line breaks and whitespace in
+        hexadecimal strings are handled, and parsing stops after the string.
+        '''
+        data = b'(a (nested) \\(string\\)\\n\\101\\0533\\\r\nend) <48 65\n6c6C 6f 2>'
+        stream = BytesIO(data)
+        self.assertEqual(readObject(stream, None), b'a (nested) (string)\nA+3end')
+        self.assertEqual(stream.read(1), b' ')
+        self.assertEqual(readObject(stream, None), u'Hello ')
+        self.assertEqual(stream.tell(), len(data))
+        self.assertEqual(readStringFromStream(BytesIO(b'(x\\))y')), u'x)')
+
+
+class FilterTestCase(unittest.TestCase):
+    def test_predictors(self):
+        '''
+        Test undoing PNG predictors of every filter type on RGB rows, narrow
+        and wide, with NumPy if it is installed and without, and TIFF
+        predictor 2 on 16-bit samples. Expected outcome: the original
+        samples.
+        '''
+        def paeth(a, b, c):
+            p = a + b - c
+            return min((abs(p - a), 0, a), (abs(p - b), 1, b), (abs(p - c), 2, c))[2]
+        def encode(rows, filterTypes):
+            data = bytearray()
+            prev = bytearray(len(rows[0]))
+            for row, filterType in zip(rows, filterTypes):
+                data.append(filterType)
+                for i in range(len(row)):
+                    a = row[i - 3] if i >= 3 else 0
+                    c = prev[i - 3] if i >= 3 else 0
+                    predicted = (0, a, prev[i], (a + prev[i]) // 2, paeth(a, prev[i], c))[filterType]
+                    data.append((row[i] - predicted) % 256)
+                prev = row
+            return bytes(data)
+        rows = [bytearray((r * 37 + i * i) % 256 for i in range(12)) for r in range(10)]
+        data = encode(rows, [r % 5 for r in range(10)])
+        parms = {'/Predictor': 15, '/Colors': 3, '/Columns': 4}
+        self.assertEqual(FlateDecode.decode(zlib.compress(data), parms),
+                         b''.join(bytes(row) for row in rows))
+
+        # wide rows, with runs of Paeth and Average rows and rows of mixed
+        # filter types, which NumPy undoes a diagonal of pixels at a time
+        rows = [bytearray((r * 37 + i * i // 7) % 256 for i in range(900)) for r in range(80)]
+        filterTypes = [4] * 30 + [3] * 20 + [r % 5 for r in range(30)]
+        data = encode(rows, filterTypes)
+        parms = {'/Predictor': 15, '/Colors': 3, '/Columns': 300}
+        numpy = filters.numpy
+        try:
+            for useNumpy in (True, False):
+                if not useNumpy:
+                    filters.numpy = None
+                self.assertEqual(decodePredictor(data, parms), b''.join(bytes(row) for row in rows))
+        finally:
+            filters.numpy = numpy
+
+        samples = [1000, 65535, 3, 2]
+        deltas = struct.pack('>4H', *[(samples[i] - (samples[i - 1] if i else 0)) % 65536 for i in range(4)])
+        parms = {'/Predictor': 2, '/BitsPerComponent': 16, '/Columns': 4}
+        self.assertEqual(decodePredictor(deltas, parms), struct.pack('>4H', *samples))
+
+    def test_decode_limits(self):
+        '''
+        Test reading streams that expand far beyond their encoded size, and
+        decoding in pieces. Expected outcome: decoding stops at the
+        per-stream and per-document limits, and pieces of any size give the
+        same data as decoding at once.
+        '''
+        writer = PdfFileWriter()
+        writer.addBlankPage(100, 100)
+        refs = []
+        for i in range(2):
+            stream = EncodedStreamObject()
+            stream[NameObject('/Filter')] = NameObject('/FlateDecode')
+            stream._data = zlib.compress(b'\0' * (4 << 20))
+            refs.append(writer._addObject(stream))
+        output = BytesIO()
+        writer.write(output)
+
+        ipdf = PdfFileReader(output, max_stream_size=1 << 20)
+        self.assertRaises(PdfSizeLimitError, ipdf.getObject(refs[0]).getData)
+        ipdf = PdfFileReader(output, max_decoded_size=6 << 20)
+        self.assertEqual(len(ipdf.getObject(refs[0]).getData()), 4 << 20)
+        self.assertRaises(PdfSizeLimitError, ipdf.getObject(refs[1]).getData)
+
+        rows = b''.join(b'\x02' + bytes(bytearray(range(i, i + 5))) for i in range(200))
+        data = zlib.compress(rows)
+        parms = {'/Predictor': 12, '/Columns': 5}
+        decoder = getDecoder('/FlateDecode', parms)
+        pieces = [decoder.feed(data[i:i + 7]) for i in range(0, len(data), 7)]
+        self.assertEqual(b''.join(pieces) + decoder.flush(), FlateDecode.decode(data, parms))
+
+    def test_lzw(self):
+        '''
+        Test the LZW codec on the example of the PDF reference, and round
+        trips with and without early change. Expected outcome: the
+        example's codes, and the original data.
+        '''
+        example = binascii.unhexlify(b'800b6050220c0c8501')
+        self.assertEqual(LZWDecode.encode(b'-----A---B'), example)
+        self.assertEqual(LZWDecode.decode(example), b'-----A---B')
+        data = b''.join(struct.pack('>H', (i * i) % 307) for i in range(20000))
+        for earlyChange in (0, 1):
+            encoded = LZWDecode.encode(data, earlyChange)
+            self.assertLess(len(encoded), len(data))
+            self.assertEqual(LZWDecode.decode(encoded, {'/EarlyChange': earlyChange}), data)
+
+    def test_ascii_codecs(self):
+        '''
+        Test the ASCIIHex and ASCII85 codecs, and writing a file with ASCII
+        stream data. Expected outcome: white space and delimiters are
+        handled, data round-trips, and the written file is 7-bit clean and
+        reads back the same.
+        '''
+        self.assertEqual(ASCIIHexDecode.decode(b'48 65\n6c6C 6\t>junk'), b'Hell`')
+        self.assertEqual(ASCII85Decode.decode(b'<~87cURD]i,"Eb\no80~>'), b'Hello World!')
+        self.assertEqual(ASCII85Decode.decode(b'z!!!$~>'), b'\0\0\0\0\0\0\x01')
+        self.assertRaises(PdfReadError, ASCII85Decode.decode, b'uuuuu~>')
+        self.assertRaises(PdfReadError, ASCII85Decode.decode, b'!!z!!~>')
+        data = bytes(bytearray(range(256))) * 3 + b'\0' * 9
+        self.assertEqual(ASCIIHexDecode.decode(ASCIIHexDecode.encode(data)), data)
+        self.assertEqual(ASCII85Decode.decode(ASCII85Decode.encode(data)), data)
+
+        path = os.path.join(PROJECT_ROOT, 'PDF_Samples', 'jpeg.pdf')
+        writer = PdfFileWriter()
+        writer.addPage(PdfFileReader(path).getPage(0))
+        writer.getPage(0)[NameObject('/Caf\xe9')] = NameObject('/A #1')
+        output = BytesIO()
+        writer.write(output, ascii_filter='/ASCII85Decode')
+        self.assertLess(max(bytearray(output.getvalue())), 128)
+        self.assertIn(b'/Caf#C3#A9 /A#20#231', output.getvalue())
+        self.assertEqual(PdfFileReader(output).getPage(0)['/Caf\xe9'], '/A #1')
+        image = PdfFileReader(output).getPage(0)['/Resources']['/XObject']['/Im4']
+        expected = PdfFileReader(path).getPage(0)['/Resources']['/XObject']['/Im4']
+        self.assertEqual(image['/Filter'], ['/ASCII85Decode', '/DCTDecode'])
+        self.assertEqual(image.getData(), expected.getData())
+
+    def test_run_length(self):
+        '''
+        Test the RunLength codec, also under its short name. Expected
+        outcome: literal and repeated runs decode, data after the end
+        marker is ignored, and encoded data round-trips.
+        '''
+        self.assertEqual(RunLengthDecode.decode(b'\x02abc\xfdz\x80junk'), b'abczzzz')
+        data = b'a' * 1000 + bytes(bytearray(range(256))) + b'bb' + b'c' * 129
+        encoded = RunLengthDecode.encode(data)
+        self.assertLess(len(encoded), 300)
+        decoder = getDecoder('/RL')
+        pieces = [decoder.feed(encoded[i:i + 3]) for i in range(0, len(encoded), 3)]
+        self.assertEqual(b''.join(pieces) + decoder.flush(), data)
+
+    def test_register_filter(self):
+        '''
+        Test replacing a filter in the registry. Expected outcome: streams
+        and encoding use the registered implementation, abbreviations
+        included, until the original one is registered again.
+        '''
+        stream = EncodedStreamObject()
+        stream[NameObject('/Filter')] = NameObject('/AHx')
+        stream._data = b'61 62>'
+        original = filters._decoders['/ASCIIHexDecode'], filters.getEncoder('/ASCIIHexDecode')
+        filters.registerFilter('/ASCIIHexDecode',
+                               lambda parms, stream, limit:
+                                   filters.BufferedDecoder(lambda data: data.upper(), limit),
+                               lambda data: data.lower(), ['/AHx'])
+        try:
+            self.assertEqual(filters.decodeStreamData(stream), b'61 62>')
+            self.assertEqual(filters.getEncoder('/AHx')(b'AB'), b'ab')
+        finally:
+            filters.registerFilter('/ASCIIHexDecode', original[0], original[1], ['/AHx'])
+        self.assertEqual(filters.decodeStreamData(stream), b'ab')
+        self.assertEqual(getDecoder('/DCT').feed(b'\xff\xd8'), b'\xff\xd8')
+        self.assertRaises(NotImplementedError, getDecoder, '/NoSuchDecode')
+        self.assertRaises(NotImplementedError, filters.getEncoder, '/DCTDecode')
+
+
+class BatchTestCase(unittest.TestCase):
+    def test_map(self):
+        '''
+        Test processing files in worker processes. Expected outcome: a
+        result for every file, with the error of the file that is not a PDF
+        isolated to its own result.
+        '''
+        paths = [os.path.join(RESOURCE_ROOT, 'crazyones.pdf'),
+                 os.path.join(TABLES_ROOT, 'sample123.pdf'),
+                 os.path.join(RESOURCE_ROOT, 'crazyones.txt')]
+        results = dict((result.path, result) for result in
+                       batch.map(PdfFileReader.getNumPages, paths, workers=2))
+        self.assertEqual(results[paths[0]].value, 1)
+        self.assertEqual(results[paths[1]].value, 11)
+        self.assertIsNone(results[paths[1]].error)
+        self.assertIsInstance(results[paths[2]].error, PdfReadError)
+
+
+@unittest.skipIf(aio is None, "needs asyncio")
+class AsyncReaderTestCase(unittest.TestCase):
+    def test_concurrent_pages(self):
+        '''
+        Test reading pages concurrently through an asynchronous byte source
+        and writing them back out. Expected outcome: the same pages as the
+        synchronous reader, read in a few coalesced range requests.
+        '''
+        with open(os.path.join(TABLES_ROOT, 'sample123.pdf'), 'rb') as f:
+            data = f.read()
+        reads = []
+
+        class Source(aio.AsyncBufferSource):
+            async def read_at(self, offset, length):
+                reads.append((offset, length))
+                return await aio.AsyncBufferSource.read_at(self, offset, length)
+
+        async def run():
+            reader = await aio.AsyncPdfFileReader.open(Source(data))
+            numPages = await reader.get_num_pages()
+            pages = await asyncio.gather(*[reader.get_page(i) for i in range(numPages)])
+            writer = PdfFileWriter()
+            for page in pages:
+                writer.addPage(page)
+            out = BytesIO()
+            await aio.write(writer, out)
+            await reader.close()
+            return pages, out.getvalue()
+
+        loop = asyncio.new_event_loop()
+        try:
+            pages, output = loop.run_until_complete(run())
+        finally:
+            loop.close()
+        expected = PdfFileReader(BytesIO(data))
+        self.assertEqual(len(pages), 11)
+        self.assertEqual([p.mediaBox for p in pages],
+                         [p.mediaBox for p in expected.pages])
+        self.assertLessEqual(len(reads), 4)
+        self.assertEqual(PdfFileReader(BytesIO(output)).getNumPages(), 11)